@@ -0,0 +1,144 @@
+"""
+Log de atividades dos boards (movimentação de cards, membros, roles).
+
+Registrar um evento não escreve no banco: depois do commit da transação de
+quem o gerou (eventos de transações desfeitas não existem) ele entra num
+buffer do processo, gravado com um bulk_create quando
+
+- o buffer chega a ACTIVITY_LOG['FLUSH_SIZE'] eventos;
+- ao fim de uma requisição, se o evento mais antigo passou de
+  ACTIVITY_LOG['FLUSH_INTERVAL'] segundos (a resposta já foi entregue);
+- o processo termina, ou alguém lê o feed (flush antes da leitura).
+
+Com vários workers cada um tem o seu buffer: o feed pode atrasar até
+FLUSH_INTERVAL em relação a eventos de outro processo.
+"""
+import atexit
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DatabaseError, transaction
+from django.db.models import Max
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Activity
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'FLUSH_SIZE': 200,
+    'FLUSH_INTERVAL': 2.0,
+}
+
+RETENTION = timedelta(days=90)
+# Movimentações de um card mais antigas que isso ficam só a última de cada dia
+COMPACT_AFTER = timedelta(days=7)
+DELETE_CHUNK = 5000
+
+
+def activity_settings():
+    return {**DEFAULTS, **getattr(settings, 'ACTIVITY_LOG', {})}
+
+
+class ActivityBuffer:
+    """Eventos prontos para gravar; seguro entre threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = []
+        self._oldest = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, activity):
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append(activity)
+            full = len(self._pending) >= activity_settings()['FLUSH_SIZE']
+        if full:
+            self.flush()
+
+    def due(self):
+        with self._lock:
+            if not self._pending:
+                return False
+            options = activity_settings()
+            return (
+                len(self._pending) >= options['FLUSH_SIZE']
+                or time.monotonic() - self._oldest >= options['FLUSH_INTERVAL']
+            )
+
+    def flush(self):
+        """Grava tudo o que está pendente num INSERT em lote; retorna quantos"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        try:
+            # Savepoint: uma falha aqui não derruba a transação de quem chamou
+            with transaction.atomic():
+                Activity.objects.bulk_create(pending, batch_size=500)
+        except DatabaseError:
+            logger.exception("Falha ao gravar %s eventos de atividade", len(pending))
+            return 0
+        return len(pending)
+
+
+activity_buffer = ActivityBuffer()
+
+
+def record_activity(verb, actor=None, board_id=None, company_id=None, target_id=None, **data):
+    """Enfileira o evento para depois do commit da transação atual"""
+    activity = Activity(
+        verb=verb,
+        actor_id=getattr(actor, 'pk', None),
+        actor_name=getattr(actor, 'username', ''),
+        company_id=company_id if company_id is not None else getattr(actor, 'company_id', None),
+        board_id=board_id,
+        target_id=target_id,
+        data=data,
+        created_at=timezone.now(),
+    )
+    transaction.on_commit(lambda: activity_buffer.add(activity))
+
+
+@receiver(request_finished)
+def _flush_when_due(sender, **kwargs):
+    if activity_buffer.due():
+        activity_buffer.flush()
+
+
+atexit.register(activity_buffer.flush)
+
+
+def prune_activity(older_than=RETENTION, chunk_size=DELETE_CHUNK):
+    """Apaga eventos mais antigos que a retenção, em blocos"""
+    old = Activity.objects.filter(created_at__lt=timezone.now() - older_than)
+    deleted = 0
+    while ids := list(old.values_list('pk', flat=True)[:chunk_size]):
+        deleted += Activity.objects.filter(pk__in=ids).delete()[0]
+    return deleted
+
+
+def compact_activity(older_than=COMPACT_AFTER):
+    """Das movimentações antigas de cada card, mantém só a última de cada dia (UTC)"""
+    cutoff = timezone.now() - older_than
+    moves = Activity.objects.filter(verb='card.moved', created_at__lt=cutoff)
+    first = moves.order_by('created_at').values_list('created_at', flat=True).first()
+    if first is None:
+        return 0
+    deleted = 0
+    day = first.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < cutoff:
+        window = moves.filter(created_at__gte=day, created_at__lt=day + timedelta(days=1))
+        last = window.values('target_id').annotate(last=Max('pk')).values('last')
+        deleted += window.exclude(pk__in=last).delete()[0]
+        day += timedelta(days=1)
+    return deleted
@@ -1,11 +1,15 @@
 from django.contrib import admin
-from .models import Board, List, Card, Company
+from .models import Activity, Board, BoardTemplate, List, Card, Company
 
 @admin.register(Board)
 class BoardAdmin(admin.ModelAdmin):
-    list_display = ('title', 'end_date', 'id')
+    list_display = ('title', 'end_date', 'archived_at', 'id')
     search_fields = ('title',)
     
+    def get_queryset(self, request):
+        # Inclui arquivados (Board.objects só vê os ativos)
+        return Board.all_objects.all()
+    
     
 @admin.register(List)
 class ListAdmin(admin.ModelAdmin):
@@ -15,5 +19,20 @@ class ListAdmin(admin.ModelAdmin):
     
 @admin.register(Card)
 class CardAdmin(admin.ModelAdmin):
-    list_display = ('title', 'description', 'list') 
-    
\ No newline at end of file
+    list_display = ('title', 'description', 'list', 'archived_at')
+    
+    def get_queryset(self, request):
+        return Card.all_objects.select_related('list')
+    
+
+@admin.register(BoardTemplate)
+class BoardTemplateAdmin(admin.ModelAdmin):
+    list_display = ('name', 'company')
+    list_filter = ('company',)
+
+
+@admin.register(Activity)
+class ActivityAdmin(admin.ModelAdmin):
+    list_display = ('verb', 'actor_name', 'board', 'target_id', 'created_at')
+    list_filter = ('verb',)
+    list_select_related = ('board',)
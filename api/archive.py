@@ -0,0 +1,174 @@
+"""
+Arquivamento: cards concluídos há tempo e boards encerrados saem do caminho
+quente, e voltam sob demanda.
+
+Arquivar é preencher `archived_at`. Os managers padrão (`objects`) só veem
+linhas com `archived_at` nulo e os índices das consultas quentes são parciais
+na mesma condição, então tabelas e índices consultados pela API não crescem
+com o histórico; `all_objects` enxerga tudo.
+
+Contadores do board e CompanyStats contam só o que está ativo: arquivar e
+restaurar ajustam os dois, o índice de busca e os tombstones do sync, como uma
+exclusão/criação. As posições são mantidas: o card restaurado volta ao lugar.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .counters import (
+    adjust_board_counters, adjust_company_stats, bump_board_version, deferred_board_updates, locked_company_stats,
+)
+from .models import Board, Card, SearchEntry
+from .search import index_boards, index_cards
+from .sync import record_deletions
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+# Cards em listas concluídas sem alteração há mais que isso são arquivados
+DONE_CARDS_AGE = timedelta(days=30)
+# Boards com end_date anterior a isso são arquivados
+STALE_BOARDS_AGE = timedelta(days=90)
+
+
+def _adjust_cards(rows, sign):
+    """
+    rows: (card, board, is_done). Ajusta contadores e estatísticas de cada
+    board uma vez e devolve {board: [ids dos cards]}
+    """
+    per_board, done = defaultdict(list), defaultdict(int)
+    for pk, board_id, is_done in rows:
+        per_board[board_id].append(pk)
+        done[board_id] += is_done
+    for board_id, ids in per_board.items():
+        adjust_board_counters(board_id=board_id, cards=sign * len(ids))
+        adjust_company_stats(board_id=board_id, cards=sign * len(ids), done_cards=sign * done[board_id])
+    return per_board
+
+
+def archive_cards(card_ids, board=None):
+    """
+    Arquiva os cards ativos informados e retorna quantos foram arquivados;
+    com `board`, ids que não são do board invalidam o lote
+    """
+    cards = Card.all_objects.filter(pk__in=card_ids)
+    if board is not None:
+        missing = sorted(set(card_ids) - set(cards.filter(list__board=board).values_list('pk', flat=True)))
+        if missing:
+            raise ValidationError({'cards': f"Cards não encontrados: {missing}"})
+
+    now = timezone.now()
+    with transaction.atomic(), deferred_board_updates():
+        rows = list(
+            Card.objects.filter(pk__in=card_ids).select_for_update(of=('self',))
+            .values_list('pk', 'list__board_id', 'list__is_done')
+        )
+        if not rows:
+            return 0
+        ids = [pk for pk, _, _ in rows]
+        Card.objects.filter(pk__in=ids).update(archived_at=now)
+        for board_id, archived in _adjust_cards(rows, -1).items():
+            # Para o sync incremental o card arquivado foi removido
+            record_deletions(board_id, cards=archived)
+        index_cards(ids)
+    return len(rows)
+
+
+def restore_cards(board, card_ids):
+    """Restaura cards arquivados do board; ids de cards já ativos são ignorados"""
+    known = set(Card.all_objects.filter(pk__in=card_ids, list__board=board).values_list('pk', flat=True))
+    missing = sorted(set(card_ids) - known)
+    if missing:
+        raise ValidationError({'cards': f"Cards não encontrados: {missing}"})
+
+    with transaction.atomic(), deferred_board_updates():
+        rows = list(
+            Card.all_objects.filter(pk__in=known, archived_at__isnull=False)
+            .values_list('pk', 'list__board_id', 'list__is_done')
+        )
+        if not rows:
+            return 0
+        ids = [pk for pk, _, _ in rows]
+        # update_at: o card reaparece no sync incremental
+        Card.all_objects.filter(pk__in=ids).update(archived_at=None, update_at=timezone.now())
+        _adjust_cards(rows, 1)
+        index_cards(ids)
+    return len(rows)
+
+
+def _board_totals(board_id):
+    """(listas, cards, cards concluídos) ativos do board"""
+    lists, cards = Board.all_objects.filter(pk=board_id).values_list('lists_count', 'cards_count').get()
+    done = Card.objects.filter(list__board_id=board_id, list__is_done=True).count()
+    return lists, cards, done
+
+
+def archive_board(board):
+    """Tira o board (com listas e cards) do caminho quente; False se já estava"""
+    with transaction.atomic():
+        if not Board.objects.filter(pk=board.pk).update(archived_at=timezone.now()):
+            return False
+        lists, cards, done = _board_totals(board.pk)
+        adjust_company_stats(company_id=board.company_id, boards=-1, lists=-lists, cards=-cards, done_cards=-done)
+        SearchEntry.objects.filter(board_id=board.pk).delete()
+    return True
+
+
+def restore_board(board):
+    """Volta o board arquivado, dentro da cota de boards; False se já estava ativo"""
+    company = board.company
+    with transaction.atomic():
+        if company and locked_company_stats(company).boards >= company.max_boards:
+            raise ValidationError(f"Limite de {company.max_boards} projetos atingido")
+        if not Board.all_objects.filter(pk=board.pk, archived_at__isnull=False).update(archived_at=None):
+            return False
+        bump_board_version(board_id=board.pk)
+        lists, cards, done = _board_totals(board.pk)
+        adjust_company_stats(company_id=board.company_id, boards=1, lists=lists, cards=cards, done_cards=done)
+        index_boards([board.pk])
+        card_ids = list(Card.objects.filter(list__board_id=board.pk).values_list('pk', flat=True))
+        for start in range(0, len(card_ids), 2000):
+            index_cards(card_ids[start:start + 2000])
+    return True
+
+
+def _in_chunks(queryset, chunk_size, action):
+    """Aplica `action` a blocos de ids até o queryset (só ativos) esvaziar"""
+    total = 0
+    while ids := list(queryset.values_list('pk', flat=True)[:chunk_size]):
+        total += action(ids)
+        logger.info("%s %s arquivados até agora", total, queryset.model._meta.verbose_name_plural)
+    return total
+
+
+def done_cards_queryset(older_than=DONE_CARDS_AGE, company_id=None):
+    # Boards arquivados já saíram das estatísticas com tudo o que têm
+    cards = Card.objects.filter(
+        list__is_done=True, list__board__archived_at__isnull=True, update_at__lt=timezone.now() - older_than,
+    )
+    if company_id is not None:
+        cards = cards.filter(list__board__company_id=company_id)
+    return cards.order_by()
+
+
+def stale_boards_queryset(older_than=STALE_BOARDS_AGE, company_id=None):
+    boards = Board.objects.filter(end_date__lt=(timezone.now() - older_than).date())
+    if company_id is not None:
+        boards = boards.filter(company_id=company_id)
+    return boards.order_by()
+
+
+def archive_done_cards(older_than=DONE_CARDS_AGE, company_id=None, chunk_size=CHUNK_SIZE):
+    """Arquiva em blocos (uma transação por bloco) os cards concluídos antigos"""
+    return _in_chunks(done_cards_queryset(older_than, company_id), chunk_size, archive_cards)
+
+
+def archive_stale_boards(older_than=STALE_BOARDS_AGE, company_id=None, chunk_size=CHUNK_SIZE):
+    """Arquiva em blocos os boards encerrados há mais de `older_than`"""
+    def archive(ids):
+        return sum(archive_board(board) for board in Board.objects.filter(pk__in=ids))
+    return _in_chunks(stale_boards_queryset(older_than, company_id), chunk_size, archive)
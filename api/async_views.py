@@ -0,0 +1,149 @@
+"""
+Leituras assíncronas dos endpoints mais consultados (lista e detalhe de
+boards, cards de uma lista), para rodar sob ASGI (setup/asgi.py).
+
+Mesmas respostas dos viewsets (serializers, ?fields=/?include=, paginação por
+cursor, ETag do snapshot), mas autenticação, cache e ORM usam a API async do Django: a
+requisição esperando o banco não prende uma thread de worker. Escritas
+continuam nos viewsets; `async_reads` faz o roteamento por método. O
+throttling por empresa (api/throttling.py) vale aqui também.
+"""
+from asgiref.sync import sync_to_async
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .authentication import CachedTokenAuthentication
+from .fastpath import aboard_tree
+from .fieldsets import Fieldset, prefetch_lookups, sparse_queryset, validate_fieldset
+from .models import Board, Card
+from .pagination import BoardPagination, PositionPagination
+from .serializers import BoardListSerializer, BoardSerializer, CardSerializer
+from .snapshots import aboard_snapshot, board_etag, etag_matches
+from .throttling import athrottle
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+def _response(data, status=status.HTTP_200_OK, headers=None):
+    """Response do DRF renderizado com o renderer padrão, fora de um APIView"""
+    response = Response(data, status=status, headers=headers)
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    response.accepted_renderer = renderer
+    response.accepted_media_type = renderer.media_type
+    response.renderer_context = {}
+    return response
+
+
+def _error(exc):
+    headers = None
+    if exc.status_code == 401:
+        headers = {'WWW-Authenticate': CachedTokenAuthentication.keyword}
+    elif isinstance(exc, exceptions.Throttled) and exc.wait is not None:
+        headers = {'Retry-After': str(exc.wait)}
+    return _response({'detail': exc.detail}, status=exc.status_code, headers=headers)
+
+
+async def _authenticate(request):
+    """(usuário, None) ou (None, resposta de erro), como IsAuthenticated + TenantThrottle"""
+    try:
+        credentials = await CachedTokenAuthentication().aauthenticate(request)
+    except exceptions.AuthenticationFailed as exc:
+        return None, _error(exc)
+    if credentials is None:
+        return None, _error(exceptions.NotAuthenticated())
+    # Como o DRF faz: o middleware de perfil vê o usuário autenticado
+    request.user = credentials[0]
+    wait = await athrottle(request, credentials[0])
+    if wait:
+        return None, _error(exceptions.Throttled(wait))
+    return credentials[0], None
+
+
+def _sparse_serializer(request, serializer_class):
+    """(serializer podado pelo ?fields=/?include=, fieldset) ou ValidationError"""
+    fieldset = Fieldset.from_request(request)
+    serializer = serializer_class(context={'fieldset': fieldset})
+    validate_fieldset(serializer)
+    return serializer, fieldset
+
+
+async def _paginated(paginator, queryset, request, serializer_class, prefetch=()):
+    """Página serializada; `prefetch` são as relações, cortadas pelo ?include="""
+    request = Request(request)
+    try:
+        serializer, fieldset = _sparse_serializer(request, serializer_class)
+    except exceptions.ValidationError as exc:
+        return _response(exc.detail, status=exc.status_code)
+    queryset = queryset.prefetch_related(*prefetch_lookups(fieldset, *prefetch))
+    if fieldset is not None:
+        queryset = sparse_queryset(queryset, serializer, [name.lstrip('-') for name in paginator.ordering])
+    page = await paginator.apaginate_queryset(queryset, request)
+    data = serializer_class(page, many=True, context={'fieldset': fieldset}).data
+    return _response(paginator.get_paginated_response(data).data)
+
+
+def _company_boards(user):
+    if not user.company_id:
+        return Board.objects.none()
+    return Board.objects.filter(company_id=user.company_id)
+
+
+async def board_list(request):
+    user, error = await _authenticate(request)
+    if error:
+        return error
+    return await _paginated(BoardPagination(), _company_boards(user), request, BoardListSerializer)
+
+
+async def board_detail(request, pk):
+    """Snapshot em cache por versão do board, com ETag / 304"""
+    user, error = await _authenticate(request)
+    if error:
+        return error
+
+    try:
+        serializer, fieldset = _sparse_serializer(request, BoardSerializer)
+    except exceptions.ValidationError as exc:
+        return _response(exc.detail, status=exc.status_code)
+
+    queryset = _company_boards(user)
+    version = await queryset.filter(pk=pk).values_list('version', flat=True).afirst()
+    if version is None:
+        return _error(exceptions.NotFound())
+
+    variant = fieldset.key if fieldset else ''
+    etag = board_etag(pk, version, variant)
+    if etag_matches(etag, request.headers.get('If-None-Match', '')):
+        return _response(None, status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    async def build():
+        # Mesmo snapshot do BoardViewSet, com as queries (uma por nível) no ORM async
+        return await aboard_tree(queryset, pk, serializer)
+
+    return _response(await aboard_snapshot(pk, version, build, variant), headers={'ETag': etag})
+
+
+async def card_list(request, board_pk, list_pk):
+    user, error = await _authenticate(request)
+    if error:
+        return error
+    queryset = (
+        Card.objects.filter(list__id=list_pk, list__board__owner=user, list__board__archived_at__isnull=True)
+        .select_related('list')
+    )
+    return await _paginated(PositionPagination(), queryset, request, CardSerializer, prefetch=('members',))
+
+
+def async_reads(read_view, write_view):
+    """GET/HEAD na view assíncrona; demais métodos no viewset, numa thread"""
+    write_view = sync_to_async(write_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method in READ_METHODS:
+            return await read_view(request, *args, **kwargs)
+        return await write_view(request, *args, **kwargs)
+
+    return csrf_exempt(view)
@@ -0,0 +1,98 @@
+"""
+TokenAuthentication com cache de token -> (usuário, empresa).
+
+O cache fica no alias CACHES['auth'] (LocMemCache: em processo, com TTL e
+descarte LRU; Redis com AUTH_CACHE_URL). É invalidado pelos signals em
+api/signals.py quando o token é apagado ou o usuário/empresa é salvo.
+
+A invalidação só alcança o processo que tratou a escrita: com vários workers,
+só um cache compartilhado (AUTH_CACHE_URL) garante que um token apagado ou um
+usuário desativado deixe de autenticar nos outros na hora; em processo, os
+outros workers seguem com a entrada antiga até o TTL (5 min). Escritas via
+QuerySet.update() não disparam signals e também ficam limitadas pelo TTL.
+"""
+import hashlib
+
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+from .profiling import profile_section
+
+AUTH_CACHE = 'auth'
+
+
+def token_cache_key(key):
+    # Não usa o token em claro como chave (backends compartilhados)
+    return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_tokens(keys):
+    caches[AUTH_CACHE].delete_many([token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Zero queries de autenticação com o cache quente"""
+
+    def authenticate(self, request):
+        with profile_section('auth'):
+            return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        cache = caches[AUTH_CACHE]
+        cache_key = token_cache_key(key)
+
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        model = self.get_model()
+        try:
+            # company junto: request.user.company não gera query depois
+            token = model.objects.select_related('user__company').get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        credentials = self._credentials(token)
+        cache.set(cache_key, credentials)
+        return credentials
+
+    async def aauthenticate(self, request):
+        """authenticate() para views assíncronas: cache e ORM via API async"""
+        with profile_section('auth'):
+            auth = get_authorization_header(request).split()
+            if not auth or auth[0].lower() != self.keyword.lower().encode():
+                return None
+            if len(auth) != 2:
+                raise exceptions.AuthenticationFailed(_('Invalid token header. No credentials provided.'))
+            try:
+                key = auth[1].decode()
+            except UnicodeError:
+                raise exceptions.AuthenticationFailed(
+                    _('Invalid token header. Token string should not contain invalid characters.')
+                )
+            return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        cache = caches[AUTH_CACHE]
+        cache_key = token_cache_key(key)
+
+        cached = await cache.aget(cache_key)
+        if cached is not None:
+            return cached
+
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related('user__company').aget(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        credentials = self._credentials(token)
+        await cache.aset(cache_key, credentials)
+        return credentials
+
+    def _credentials(self, token):
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return (token.user, token)
@@ -0,0 +1,217 @@
+"""
+Lote de operações em cards de um board (create / update / move / delete).
+
+Tudo roda numa transação com número constante de queries: carrega listas,
+cards e membros referenciados uma vez, calcula as posições em memória e grava
+com bulk_create / bulk_update / um DELETE. Contadores e versão do board são
+ajustados uma única vez no fim.
+"""
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .activity import record_activity
+from .counters import adjust_board_counters, adjust_company_stats, deferred_board_updates
+from .models import Card, User
+from .ranking import needs_rebalance, rank_between, schedule_rebalance, spaced_ranks
+from .search import index_cards
+from .sync import record_deletions
+
+
+class _ListOrder:
+    """
+    Ordem (position, item) de uma lista, mantida em memória durante o lote;
+    item é o Card do lote (novo ou movido) ou só o pk dos demais
+    """
+
+    def __init__(self, list_id, entries):
+        self.list_id = list_id
+        self.entries = entries
+        # pk -> chave dos cards fora do lote renumerados em memória
+        self.renumbered = {}
+
+    def remove(self, pk):
+        self.entries = [entry for entry in self.entries if _pk(entry[1]) != pk]
+        self.renumbered.pop(pk, None)
+
+    def insert(self, card, index=None):
+        if index is None or index >= len(self.entries):
+            before = self.entries[-1][0] if self.entries else None
+            key = rank_between(before, None)
+            self.entries.append((key, card))
+            return key
+
+        before = self.entries[index - 1][0] if index > 0 else None
+        try:
+            key = rank_between(before, self.entries[index][0])
+        except ValueError:
+            # Vizinhos empatados: renumera em memória (itens pendentes do
+            # lote inclusive) e grava tudo junto no fim
+            self.rebalance()
+            return self.insert(card, index)
+        self.entries.insert(index, (key, card))
+        return key
+
+    def rebalance(self):
+        self.entries = [(key, item) for key, (_, item) in zip(spaced_ranks(len(self.entries)), self.entries)]
+        for key, item in self.entries:
+            if isinstance(item, Card):
+                item.position = key
+            else:
+                self.renumbered[item] = key
+
+
+def _pk(item):
+    return item.pk if isinstance(item, Card) else item
+
+
+def _load_orders(list_ids):
+    orders = {list_id: _ListOrder(list_id, []) for list_id in list_ids}
+    rows = (
+        Card.objects.filter(list_id__in=list_ids)
+        .order_by('list_id', 'position', 'pk')
+        .values_list('list_id', 'position', 'pk')
+    )
+    for list_id, position, pk in rows:
+        orders[list_id].entries.append((position, pk))
+    return orders
+
+
+def _validate_references(board, operations):
+    """Confere listas/cards/membros do lote contra o board, em 3 queries"""
+    done_lists = dict(board.lists.values_list('pk', 'is_done'))
+    card_ids = {op['id'] for op in operations if 'id' in op}
+    cards = Card.objects.filter(pk__in=card_ids, list__board=board).in_bulk()
+    member_ids = {pk for op in operations for pk in op.get('members', ())}
+    members = set(
+        User.objects.filter(pk__in=member_ids, company_id=board.company_id)
+        .values_list('pk', flat=True)
+    )
+
+    errors = []
+    deleted = set()
+    for op in operations:
+        error = {}
+        if 'list_id' in op and op['list_id'] not in done_lists:
+            error['list_id'] = ["Lista não encontrada neste board"]
+        if 'id' in op and (op['id'] not in cards or op['id'] in deleted):
+            error['id'] = ["Card não encontrado neste board"]
+        if set(op.get('members', ())) - members:
+            error['members'] = ["Usuário não encontrado nesta empresa"]
+        if op['op'] == 'delete':
+            deleted.add(op['id'])
+        errors.append(error)
+
+    if any(errors):
+        raise ValidationError({'operations': errors})
+    return cards, done_lists
+
+
+def apply_card_operations(board, user, operations):
+    """
+    Aplica as operações (já validadas por CardBatchSerializer) e retorna um
+    resultado por operação, na mesma ordem.
+    """
+    with transaction.atomic(), deferred_board_updates():
+        cards, done_lists = _validate_references(board, operations)
+        targets = {
+            op.get('list_id') or cards[op['id']].list_id
+            for op in operations if op['op'] in ('create', 'move')
+        }
+        orders = _load_orders(targets)
+        now = timezone.now()
+
+        new_cards, new_members, changed, deleted = [], [], {}, set()
+        results = []
+        for op in operations:
+            kind = op['op']
+            if kind == 'create':
+                card = Card(title=op['title'], description=op.get('description'), list_id=op['list_id'])
+                card.position = orders[op['list_id']].insert(card)
+                new_cards.append(card)
+                # Mesmo comportamento do create: o autor entra como membro
+                new_members.append((card, {user.pk, *op.get('members', ())}))
+                results.append({'op': kind, 'status': 'created', 'card': card})
+                continue
+
+            card = cards[op['id']]
+            if kind == 'delete':
+                deleted.add(card.pk)
+                changed.pop(card.pk, None)
+                if card.list_id in orders:
+                    orders[card.list_id].remove(card.pk)
+                results.append({'op': kind, 'status': 'deleted', 'id': card.pk})
+                continue
+
+            if kind == 'update':
+                for field in ('title', 'description'):
+                    if field in op:
+                        setattr(card, field, op[field])
+            else:
+                if card.list_id in orders:
+                    orders[card.list_id].remove(card.pk)
+                previous = card.list_id
+                card.list_id = op.get('list_id', card.list_id)
+                card.position = orders[card.list_id].insert(card, op.get('position'))
+                record_activity(
+                    'card.moved', user, board_id=board.pk, company_id=board.company_id, target_id=card.pk,
+                    title=card.title, from_list=previous, to_list=card.list_id, position=card.position,
+                )
+            card.update_at = now
+            changed[card.pk] = card
+            results.append({'op': kind, 'status': 'updated', 'card': card})
+
+        # Renumerados em memória: os do lote já têm a chave nova; os demais
+        # entram com update_at, para o sync incremental ver as chaves
+        renumbered = []
+        for order in orders.values():
+            for pk, key in order.renumbered.items():
+                if pk in cards:
+                    cards[pk].position, cards[pk].update_at = key, now
+                    changed[pk] = cards[pk]
+                else:
+                    renumbered.append(Card(pk=pk, position=key, update_at=now))
+        if renumbered:
+            Card.objects.bulk_update(renumbered, ['position', 'update_at'], batch_size=500)
+
+        Card.objects.bulk_create(new_cards, batch_size=500)
+        Card.members.through.objects.bulk_create(
+            [
+                Card.members.through(card_id=card.pk, user_id=member_id)
+                for card, member_ids in new_members
+                for member_id in member_ids
+            ],
+            batch_size=500,
+        )
+        if changed:
+            Card.objects.bulk_update(
+                changed.values(),
+                ['title', 'description', 'list', 'position', 'update_at'],
+                batch_size=500,
+            )
+        if deleted:
+            Card.objects.filter(pk__in=deleted).delete()
+            record_deletions(board.pk, cards=deleted)
+
+        adjust_board_counters(board_id=board.pk, cards=len(new_cards) - len(deleted))
+        done = (
+            sum(done_lists[card.list_id] for card in new_cards)
+            - sum(done_lists[cards[pk]._loaded_list_id] for pk in deleted)
+            + sum(done_lists[card.list_id] - done_lists[card._loaded_list_id] for card in changed.values())
+        )
+        adjust_company_stats(
+            company_id=board.company_id, cards=len(new_cards) - len(deleted), done_cards=done,
+        )
+        index_cards([card.pk for card in new_cards] + [
+            pk for pk, card in changed.items() if card._loaded_text != (card.title, card.description)
+        ])
+
+        for order in orders.values():
+            if any(needs_rebalance(key) for key, _ in order.entries):
+                schedule_rebalance(Card.objects.filter(list_id=order.list_id))
+
+    for result in results:
+        card = result.pop('card', None)
+        if card is not None:
+            result.update(id=card.pk, list_id=card.list_id, position=card.position)
+    return results
@@ -0,0 +1,277 @@
+"""
+Benchmark por endpoint: percorre as rotas de api/urls.py com o Client de
+teste, contra os dados de uma empresa (ver api/seeding.py).
+
+Cada requisição roda numa transação desfeita no fim, então as mutações podem
+ser repetidas sem alterar o banco. Mede p50/p95 de latência, tempo de
+renderização (Server-Timing), número de queries e bytes transferidos (com o
+Accept-Encoding pedido); `compare` aponta o que passou do baseline.
+`serialization_benchmark` compara o custo de CPU de montar o detalhe de um
+board pelo BoardSerializer e pelas linhas .values() (api/fastpath.py);
+`rendering_benchmark`, renderers JSON e codificações na lista e no detalhe.
+"""
+import json
+import math
+import re
+import time
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+
+from .compression import ENCODINGS, compress
+from .fastpath import board_tree
+from .fieldsets import Fieldset
+from .models import Board, BoardTemplate, Card, List, User
+from .profiling import profiling_settings
+from .renderers import BACKEND, FastJSONRenderer
+from .serializers import BoardSerializer
+from .sync import encode_cursor
+from .throttling import reset_throttle
+from .views import board_tree_queryset
+
+RENDER_TIMING = re.compile(r'(?:^|,)\s*render;dur=([0-9.]+)')
+
+# Rotas fora do benchmark, com o motivo
+SKIPPED_ROUTES = {
+    'board-events': "stream SSE sem fim",
+    'metrics': "operacional, restrita a staff",
+}
+
+
+def _admin(company):
+    return User.objects.filter(company=company, role='admin', is_active=True).order_by('pk').first()
+
+
+def benchmark_cases(company, password=None):
+    """(rota, método, kwargs da URL, corpo/query string) sobre o maior board do admin"""
+    admin = _admin(company)
+    board = admin.boards.order_by('-cards_count', 'pk').first()
+    first, second = List.objects.filter(board=board).order_by('position', 'pk')[:2]
+    card = Card.objects.filter(list=first).order_by('position', 'pk').first()
+    word = card.title.split()[0]
+    cards = list(Card.objects.filter(list__board=board).order_by('pk').values_list('pk', flat=True)[:100])
+
+    on_board = {'pk': board.pk}
+    on_list = {'board_pk': board.pk, 'pk': first.pk}
+    in_list = {'board_pk': board.pk, 'list_pk': first.pk}
+    on_card = {**in_list, 'pk': card.pk}
+    since = encode_cursor(timezone.now() - timedelta(hours=1))
+
+    cases = [
+        ('board-list', 'get', {}, None),
+        ('board-list', 'post', {}, {'title': "Benchmark"}),
+        ('board-detail', 'get', on_board, None),
+        ('board-detail', 'patch', on_board, {'title': "Benchmark"}),
+        ('board-cards-batch', 'post', on_board, {'operations': [
+            {'op': 'create', 'list_id': first.pk, 'title': "Benchmark"},
+            {'op': 'move', 'id': card.pk, 'list_id': second.pk, 'position': 0},
+        ]}),
+        ('board-changes', 'get', on_board, {'since': since}),
+        ('board-activity', 'get', on_board, None),
+        ('board-clone', 'post', on_board, {'title': "Benchmark"}),
+        ('board-archived-list', 'get', {}, None),
+        ('board-archive', 'post', on_board, None),
+        ('board-restore', 'post', on_board, None),
+        ('board-archived-cards', 'get', on_board, None),
+        ('board-cards-archive', 'post', on_board, {'cards': cards}),
+        ('board-cards-restore', 'post', on_board, {'cards': cards}),
+        ('board-export', 'get', on_board, None),
+        ('board-import', 'post', {}, {
+            'name': "Benchmark", 'members': [{'id': 'm1', 'username': admin.username}],
+            'lists': [{'id': 'l1', 'name': "A Fazer", 'pos': 1}],
+            'cards': [{'name': "Benchmark", 'idList': 'l1', 'pos': i, 'idMembers': ['m1']} for i in range(20)],
+        }),
+        ('board-template-list', 'get', {}, None),
+        ('board-template-list', 'post', {}, {'name': "Benchmark", 'board': board.pk}),
+        ('board-list-list', 'get', {'board_pk': board.pk}, None),
+        ('board-list-list', 'post', {'board_pk': board.pk}, {'title': "Benchmark"}),
+        ('board-list-detail', 'get', on_list, None),
+        ('board-list-detail', 'patch', on_list, {'title': "Benchmark"}),
+        ('board-list-reorder', 'patch', on_list, {'position': 1}),
+        ('list-card-list', 'get', in_list, None),
+        ('list-card-list', 'post', in_list, {'title': "Benchmark"}),
+        ('list-card-detail', 'get', on_card, None),
+        ('list-card-detail', 'patch', on_card, {'title': "Benchmark"}),
+        ('list-card-move', 'patch', on_card, {'list_id': second.pk, 'position': 0}),
+        ('list-card-add-member', 'post', on_card, {'user_id': admin.pk}),
+        ('list-card-remove-member', 'post', on_card, {'user_id': admin.pk}),
+        ('card-members-batch', 'post', {}, {'cards': cards, 'add': [admin.pk]}),
+        ('my-card-list', 'get', {}, None),
+        ('activity-list', 'get', {}, None),
+        ('company-list', 'get', {}, None),
+        ('company-export', 'get', {}, {'compression': 'gzip'}),
+        ('search', 'get', {}, {'q': word}),
+        ('user-list', 'get', {}, None),
+        ('user-detail', 'get', {'pk': admin.pk}, None),
+        ('user-change-role', 'patch', {'pk': admin.pk}, {'role': 'admin'}),
+    ]
+    template = BoardTemplate.objects.filter(company=company).first()
+    if template is not None:
+        cases += [
+            ('board-template-detail', 'get', {'pk': template.pk}, None),
+            ('board-template-detail', 'patch', {'pk': template.pk}, {'description': "Benchmark"}),
+        ]
+    if password is not None:
+        cases.append(('auth-token', 'post', {}, {'username': admin.username, 'password': password}))
+    return admin, cases
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _request(client, method, path, data):
+    if method == 'get':
+        return client.get(path, data)
+    return getattr(client, method)(path, json.dumps(data), content_type='application/json')
+
+
+def _render_ms(response):
+    match = RENDER_TIMING.search(response.get('Server-Timing', ''))
+    return float(match.group(1)) if match else 0.0
+
+
+def _client(admin, accept_encoding=''):
+    token, _ = Token.objects.get_or_create(user=admin)
+    # Host de ALLOWED_HOSTS: o comando roda fora do ambiente de teste
+    return Client(
+        SERVER_NAME='localhost', HTTP_AUTHORIZATION=f"Token {token.key}", HTTP_ACCEPT_ENCODING=accept_encoding,
+    )
+
+
+def run_benchmark(company, iterations=20, warmup=2, password=None, accept_encoding=''):
+    """
+    {"MÉTODO rota": {p50_ms, p95_ms, render_ms, queries, bytes, status}};
+    `bytes` é o corpo como sai do servidor, comprimido se `accept_encoding` pedir
+    """
+    admin, cases = benchmark_cases(company, password)
+    # render_ms vem do Server-Timing, que por padrão não sai na resposta
+    with override_settings(PROFILING={**profiling_settings(), 'EXPOSE_HEADER': True}):
+        return _run_cases(company, _client(admin, accept_encoding), cases, iterations, warmup)
+
+
+def _run_cases(company, client, cases, iterations, warmup):
+    results = {}
+    for route, method, kwargs, data in cases:
+        path = reverse(route, kwargs=kwargs)
+        timings, renders = [], []
+        for i in range(warmup + iterations):
+            # Mede o throttle, mas sem deixar o balde da empresa secar no meio
+            reset_throttle(company.pk)
+            with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = _request(client, method, path, data)
+                elapsed = time.perf_counter() - start
+                transaction.set_rollback(True)
+            if i >= warmup:
+                timings.append(elapsed * 1000)
+                renders.append(_render_ms(response))
+
+        results[f"{method.upper()} {route}"] = {
+            'p50_ms': round(_percentile(timings, 0.50), 3),
+            'p95_ms': round(_percentile(timings, 0.95), 3),
+            'render_ms': round(_percentile(renders, 0.50), 3),
+            'queries': len(queries),
+            'bytes': len(b''.join(response) if response.streaming else response.content),
+            'status': response.status_code,
+        }
+    return results
+
+
+def compare(results, baseline, margin=0.2):
+    """
+    Regressões contra o baseline: latência e tamanho podem passar até
+    `margin`; número de queries é determinístico e não pode subir.
+    """
+    regressions = []
+    for name, expected in baseline.items():
+        current = results.get(name)
+        if current is None:
+            continue
+        for metric in ('p95_ms', 'bytes'):
+            if metric in expected and current[metric] > expected[metric] * (1 + margin):
+                regressions.append(f"{name}: {metric} {current[metric]} > {expected[metric]} (+{margin:.0%})")
+        if 'queries' in expected and current['queries'] > expected['queries']:
+            regressions.append(f"{name}: queries {current['queries']} > {expected['queries']}")
+        if current['status'] != expected.get('status', current['status']):
+            regressions.append(f"{name}: status {current['status']} != {expected['status']}")
+    return regressions
+
+
+def serialization_benchmark(board_id, iterations=10, fields=None):
+    """
+    {caminho: {cpu_p50_ms, cpu_p95_ms, p50_ms, bytes}} para montar o detalhe
+    do board: 'serializer' (BoardSerializer sobre board_tree_queryset),
+    'values' (board_tree) e, com `fields` ("id,title,lists.cards.title"),
+    'values+fields'. CPU é process_time: inclui o ORM, não a espera do banco.
+    """
+    queryset = Board.objects.filter(pk=board_id)
+    paths = {
+        'serializer': lambda: BoardSerializer(board_tree_queryset(queryset).get()).data,
+        'values': lambda: board_tree(queryset, board_id, BoardSerializer()),
+    }
+    if fields:
+        fieldset = Fieldset.parse(fields)
+        paths['values+fields'] = lambda: board_tree(queryset, board_id, BoardSerializer(context={'fieldset': fieldset}))
+
+    results = {}
+    for name, build in paths.items():
+        cpu, wall = [], []
+        for _ in range(iterations):
+            start_cpu, start = time.process_time(), time.perf_counter()
+            data = build()
+            cpu.append((time.process_time() - start_cpu) * 1000)
+            wall.append((time.perf_counter() - start) * 1000)
+        results[name] = {
+            'cpu_p50_ms': round(_percentile(cpu, 0.50), 3),
+            'cpu_p95_ms': round(_percentile(cpu, 0.95), 3),
+            'p50_ms': round(_percentile(wall, 0.50), 3),
+            'bytes': len(json.dumps(data, default=str)),
+        }
+    return results
+
+
+def rendering_benchmark(company, iterations=20):
+    """
+    Para a lista de boards e o detalhe do maior board do admin:
+    {rota: {'render': {backend: p50_ms}, 'bytes': {codificação: bytes},
+    'compress_ms': {codificação: p50_ms}}}. 'json' é o JSONRenderer do DRF
+    (stdlib); o backend do FastJSONRenderer aparece pelo nome (orjson).
+    """
+    admin = _admin(company)
+    board = admin.boards.order_by('-cards_count', 'pk').first()
+    client = _client(admin)
+    renderers = {'json': JSONRenderer()}
+    if BACKEND != 'json':
+        renderers[BACKEND] = FastJSONRenderer()
+
+    results = {}
+    for route, kwargs in (('board-list', {}), ('board-detail', {'pk': board.pk})):
+        data = client.get(reverse(route, kwargs=kwargs)).json()
+        render = {}
+        for name, renderer in renderers.items():
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                content = renderer.render(data)
+                timings.append((time.perf_counter() - start) * 1000)
+            render[name] = round(_percentile(timings, 0.50), 3)
+
+        sizes, compress_ms = {'identity': len(content)}, {}
+        for encoding in ENCODINGS:
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                compressed = compress(content, encoding)
+                timings.append((time.perf_counter() - start) * 1000)
+            sizes[encoding] = len(compressed)
+            compress_ms[encoding] = round(_percentile(timings, 0.50), 3)
+        results[route] = {'render': render, 'bytes': sizes, 'compress_ms': compress_ms}
+    return results
@@ -0,0 +1,144 @@
+"""
+Criação de boards a partir de templates e cópia profunda (clone) de boards.
+
+Listas, cards e membros são copiados com bulk_create, com os signals
+adiados; contadores, estatísticas e índice de busca são ajustados uma vez.
+Os cards são lidos por keyset (id) em blocos, então o número de INSERTs
+depende do número de blocos, não de cards, e a memória fica constante.
+
+Boards com mais de SYNC_CLONE_LIMIT cards são copiados depois do commit,
+num executor em segundo plano; a requisição devolve o board novo (ainda
+vazio) e o conteúdo aparece de uma vez, numa transação.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, transaction
+
+from .counters import adjust_board_counters, adjust_company_stats, bump_board_version, deferred_board_updates
+from .events import publish_event
+from .models import Board, Card, List
+from .ranking import spaced_ranks
+from .search import index_cards
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+# Acima deste número de cards o clone roda fora da requisição
+SYNC_CLONE_LIMIT = 2000
+
+# Estrutura usada quando o board é criado sem template
+DEFAULT_LISTS = [
+    {'title': "A Fazer", 'is_done': False},
+    {'title': "Em Andamento", 'is_done': False},
+    {'title': "Concluído", 'is_done': True},
+]
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='board-clone')
+
+
+def create_lists(board, entries):
+    """Listas de um board novo ({title, is_done}) num INSERT só"""
+    lists = List.objects.bulk_create([
+        List(title=entry['title'], is_done=entry.get('is_done', False), board=board, position=rank)
+        for entry, rank in zip(entries, spaced_ranks(len(entries)))
+    ])
+    adjust_board_counters(board_id=board.pk, lists=len(lists))
+    adjust_company_stats(company_id=board.company_id, lists=len(lists))
+    return lists
+
+
+def template_lists(board):
+    """Estrutura das listas de um board, no formato de BoardTemplate.lists"""
+    return [
+        {'title': title, 'is_done': is_done}
+        for title, is_done in board.lists.order_by('position', 'id').values_list('title', 'is_done')
+    ]
+
+
+def _card_batches(source_id):
+    cards = Card.objects.filter(list__board_id=source_id).order_by('id')
+    last = 0
+    while batch := list(
+        cards.filter(id__gt=last).values('id', 'list_id', 'title', 'description', 'position')[:BATCH_SIZE]
+    ):
+        yield batch
+        last = batch[-1]['id']
+
+
+def copy_board_contents(source_id, target, include_cards=True, include_members=True):
+    """Copia listas, cards e (opcionalmente) membros de `source_id` para `target`"""
+    report = {'lists': 0, 'cards': 0, 'memberships': 0}
+    with transaction.atomic(), deferred_board_updates():
+        sources = list(
+            List.objects.filter(board_id=source_id).order_by('position', 'id')
+            .values('id', 'title', 'position', 'is_done')
+        )
+        # Posições copiadas como estão: a ordem é a mesma do original
+        lists = List.objects.bulk_create([
+            List(title=row['title'], position=row['position'], is_done=row['is_done'], board=target)
+            for row in sources
+        ])
+        copies = {row['id']: list_obj for row, list_obj in zip(sources, lists)}
+        report['lists'] = len(lists)
+
+        done_cards, card_ids = 0, []
+        for batch in _card_batches(source_id) if include_cards else ():
+            cards = Card.objects.bulk_create([
+                Card(title=row['title'], description=row['description'], position=row['position'],
+                     list=copies[row['list_id']])
+                for row in batch
+            ])
+            copied = {row['id']: card.pk for row, card in zip(batch, cards)}
+            if include_members:
+                members = Card.members.through.objects.filter(card_id__in=copied).values_list('card_id', 'user_id')
+                memberships = Card.members.through.objects.bulk_create([
+                    Card.members.through(card_id=copied[card_id], user_id=user_id)
+                    for card_id, user_id in members
+                ], batch_size=BATCH_SIZE)
+                report['memberships'] += len(memberships)
+            done_cards += sum(card.list.is_done for card in cards)
+            card_ids.extend(copied.values())
+
+        report['cards'] = len(card_ids)
+        adjust_board_counters(board_id=target.pk, lists=len(lists), cards=len(card_ids))
+        adjust_company_stats(
+            company_id=target.company_id, lists=len(lists), cards=len(card_ids), done_cards=done_cards,
+        )
+        for start in range(0, len(card_ids), 2000):
+            index_cards(card_ids[start:start + 2000])
+        # Quem já leu o board vazio (clone em segundo plano) precisa recarregar
+        bump_board_version(board_id=target.pk)
+    return report
+
+
+def _run_clone(source_id, target_id, include_cards, include_members):
+    try:
+        target = Board.objects.get(pk=target_id)
+        report = copy_board_contents(source_id, target, include_cards, include_members)
+        logger.info("Board %s clonado em %s: %s listas, %s cards", source_id, target_id, report['lists'], report['cards'])
+        publish_event(target_id, 'board.cloned', **report)
+    except Exception:
+        logger.exception("Falha ao clonar o board %s em %s", source_id, target_id)
+    finally:
+        close_old_connections()
+
+
+def clone_board(source, owner, title=None, include_cards=True, include_members=True):
+    """
+    Cria a cópia de `source` para `owner` (mesma empresa) e devolve
+    (board, relatório); o relatório é None quando a cópia foi agendada.
+    Deve rodar dentro de uma transação (a quota é conferida antes).
+    """
+    board = Board.objects.create(
+        title=title or f"{source.title} (cópia)"[:255],
+        description=source.description, priority=source.priority,
+        start_date=source.start_date, end_date=source.end_date,
+        company=source.company, owner=owner,
+    )
+    if include_cards and source.cards_count > SYNC_CLONE_LIMIT:
+        transaction.on_commit(
+            lambda: _executor.submit(_run_clone, source.pk, board.pk, include_cards, include_members)
+        )
+        return board, None
+    return board, copy_board_contents(source.pk, board, include_cards, include_members)
@@ -0,0 +1,153 @@
+"""
+Compressão das respostas negociada pelo Accept-Encoding (q-values
+respeitados): brotli quando o pacote `brotli` está instalado, senão gzip.
+
+Comprime só texto/JSON com pelo menos COMPRESSION['MIN_SIZE'] bytes e sem
+Content-Encoding próprio (o export com ?compression=gzip já vem comprimido).
+Respostas em streaming (exports) são comprimidas pedaço a pedaço, com flush
+em cada um, para o cliente descomprimir conforme chega; SSE
+(text/event-stream) fica de fora, porque o flush por evento anula o ganho.
+O tempo de compressão entra no Server-Timing como `compress`.
+"""
+import re
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+from .profiling import profile_section
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    # 11 (padrão do brotli) é para conteúdo estático; respostas dinâmicas usam 4-5
+    'BROTLI_QUALITY': 4,
+}
+
+# Em ordem de preferência, no empate de q-values
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+TEXT_TYPES = {'application/json', 'application/x-ndjson', 'application/javascript', 'application/xml'}
+QVALUE = re.compile(r'q\s*=\s*([0-9.]+)')
+
+
+def compression_settings():
+    return {**DEFAULTS, **getattr(settings, 'COMPRESSION', {})}
+
+
+def negotiate(accept_encoding, encodings=ENCODINGS):
+    """Codificação preferida pelo cliente entre `encodings`, ou None"""
+    weights = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.partition(';')
+        match = QVALUE.search(params)
+        try:
+            weights[name.strip().lower()] = float(match.group(1)) if match else 1.0
+        except ValueError:
+            continue
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compressible(content_type):
+    media_type = content_type.split(';')[0].strip().lower()
+    if media_type == 'text/event-stream':
+        return False
+    return media_type.startswith('text/') or media_type in TEXT_TYPES or media_type.endswith('+json')
+
+
+def compress(content, encoding, options=None):
+    options = options or compression_settings()
+    if encoding == 'br':
+        return brotli.compress(content, quality=options['BROTLI_QUALITY'])
+    compressor = zlib.compressobj(options['GZIP_LEVEL'], zlib.DEFLATED, 31)  # cabeçalho gzip
+    return compressor.compress(content) + compressor.flush()
+
+
+def _stream_compressor(encoding, options):
+    """(comprime e faz flush de um pedaço, finaliza)"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=options['BROTLI_QUALITY'])
+        return (lambda chunk: compressor.process(chunk) + compressor.flush()), compressor.finish
+    compressor = zlib.compressobj(options['GZIP_LEVEL'], zlib.DEFLATED, 31)
+    return (lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)), compressor.flush
+
+
+def compress_stream(chunks, encoding, options=None):
+    process, finish = _stream_compressor(encoding, options or compression_settings())
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+async def acompress_stream(chunks, encoding, options=None):
+    process, finish = _stream_compressor(encoding, options or compression_settings())
+    async for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware:
+    """Logo depois do ProfilingMiddleware: comprime a resposta já renderizada"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.options = compression_settings()
+        if not self.options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not compressible(response.get('Content-Type', '')):
+            return response
+        if not response.streaming and len(response.content) < self.options['MIN_SIZE']:
+            return response
+        encoding = negotiate(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            stream = acompress_stream if response.is_async else compress_stream
+            response.streaming_content = stream(response.streaming_content, encoding, self.options)
+            del response['Content-Length']
+        else:
+            with profile_section('compress'):
+                compressed = compress(response.content, encoding, self.options)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # Bytes diferentes por codificação: ETag fraco, como no GZipMiddleware
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,123 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Board, Card, Company, CompanyStats, List, User
+
+_state = threading.local()
+
+
+@contextmanager
+def deferred_board_updates():
+    """
+    Dentro do bloco os signals não mexem em contadores/versão do board.
+    Quem escreve em lote chama adjust_board_counters uma vez no fim.
+    """
+    previous = getattr(_state, 'deferred', False)
+    _state.deferred = True
+    try:
+        yield
+    finally:
+        _state.deferred = previous
+
+
+def board_updates_deferred():
+    return getattr(_state, 'deferred', False)
+
+
+def _boards(board_id=None, list_id=None, card_ids=None):
+    if board_id is not None:
+        return Board.objects.filter(pk=board_id)
+    if list_id is not None:
+        return Board.objects.filter(lists__id=list_id)
+    return Board.objects.filter(lists__cards__id__in=card_ids)
+
+
+def adjust_board_counters(board_id=None, list_id=None, lists=0, cards=0):
+    """
+    Soma `lists`/`cards` aos contadores do board e incrementa `version`, com um
+    único UPDATE atômico. Aceita o board diretamente ou a lista (o board é
+    resolvido no próprio UPDATE).
+
+    Caminhos que não disparam signals (bulk_create, QuerySet.update) devem chamar
+    esta função explicitamente.
+    """
+    updates = {'version': F('version') + 1}
+    if lists:
+        updates['lists_count'] = F('lists_count') + lists
+    if cards:
+        updates['cards_count'] = F('cards_count') + cards
+    _boards(board_id, list_id).update(**updates)
+
+
+def bump_board_version(board_id=None, list_id=None, card_ids=None):
+    """Marca o board como alterado (invalida o snapshot em cache e o ETag)"""
+    _boards(board_id, list_id, card_ids).update(version=F('version') + 1)
+
+
+def locked_company_stats(company):
+    """
+    Estatísticas da empresa com lock de linha até o fim da transação: quem
+    confere a cota e cria o objeto não corre com outra requisição paralela.
+    """
+    stats, _ = CompanyStats.objects.select_for_update().get_or_create(company=company)
+    return stats
+
+
+def adjust_company_stats(company_id=None, board_id=None, list_id=None, **deltas):
+    """
+    Soma os deltas (active_users, boards, lists, cards, done_cards) às
+    estatísticas da empresa, resolvida pelo board ou pela lista se preciso.
+    Um único UPDATE atômico; roda na transação de quem escreve.
+    """
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not updates:
+        return
+    if company_id is not None:
+        queryset = CompanyStats.objects.filter(company_id=company_id)
+    elif board_id is not None:
+        queryset = CompanyStats.objects.filter(company__boards__id=board_id)
+    else:
+        queryset = CompanyStats.objects.filter(company__boards__lists__id=list_id)
+    queryset.update(**updates)
+
+
+def _count_subquery(queryset, field):
+    counts = queryset.values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def rebuild_board_counters(queryset=None):
+    """
+    Recalcula os contadores a partir das tabelas (corrige qualquer divergência);
+    arquivados inclusive, para voltarem certos no restore
+    """
+    if queryset is None:
+        queryset = Board.all_objects.all()
+    return queryset.update(
+        lists_count=_count_subquery(List.objects.filter(board=OuterRef('pk')), 'board'),
+        cards_count=_count_subquery(Card.objects.filter(list__board=OuterRef('pk')), 'list__board'),
+    )
+
+
+def rebuild_company_stats(queryset=None):
+    """Recalcula CompanyStats a partir das tabelas (cria as linhas que faltarem)"""
+    if queryset is None:
+        queryset = Company.objects.all()
+    CompanyStats.objects.bulk_create(
+        [CompanyStats(company_id=pk) for pk in queryset.values_list('pk', flat=True)],
+        ignore_conflicts=True,
+    )
+    company = OuterRef('company_id')
+    # Boards arquivados (e o que há neles) ficam fora dos totais
+    lists = List.objects.filter(board__company=company, board__archived_at__isnull=True)
+    cards = Card.objects.filter(list__board__company=company, list__board__archived_at__isnull=True)
+    return CompanyStats.objects.filter(company__in=queryset).update(
+        active_users=_count_subquery(User.objects.filter(company=company, is_active=True), 'company'),
+        boards=_count_subquery(Board.objects.filter(company=company), 'company'),
+        lists=_count_subquery(lists, 'board__company'),
+        cards=_count_subquery(cards, 'list__board__company'),
+        done_cards=_count_subquery(cards.filter(list__is_done=True), 'list__board__company'),
+    )
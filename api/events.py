@@ -0,0 +1,113 @@
+"""
+Eventos de mudança por board, entregues aos clientes via Server-Sent Events.
+
+As mutações dos viewsets chamam `publish_event` (enviado após o commit); o
+broker faz o fan-out para todos os inscritos no board. O broker padrão é em
+processo; para várias instâncias/processos configure BOARD_EVENTS_BROKER com
+uma implementação de `Broker` sobre um pub/sub compartilhado.
+"""
+import asyncio
+import itertools
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+DEFAULT_BROKER = 'api.events.InProcessBroker'
+
+
+class Subscription:
+    """Fila de eventos de um cliente conectado"""
+
+    def __init__(self, broker, board_id, maxsize=1000):
+        self.broker = broker
+        self.board_id = board_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def push(self, event):
+        """Chamado no loop do inscrito"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Cliente lento: descarta o atraso e pede para recarregar o board
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({'type': 'resync', 'board': self.board_id})
+
+    async def get(self):
+        return await self.queue.get()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Interface de pub/sub de eventos por board"""
+
+    def publish(self, board_id, event):
+        raise NotImplementedError
+
+    def subscribe(self, board_id):
+        """Retorna uma Subscription (usar com `async with`)"""
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InProcessBroker(Broker):
+    """Fan-out em memória; `publish` pode ser chamado de qualquer thread"""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def publish(self, board_id, event):
+        event = {'id': next(self._ids), **event}
+        with self._lock:
+            subscribers = list(self._subscribers.get(board_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, event)
+            except RuntimeError:
+                # Loop encerrado: a conexão já caiu
+                self.unsubscribe(subscription)
+
+    def subscribe(self, board_id):
+        subscription = Subscription(self, board_id)
+        with self._lock:
+            self._subscribers.setdefault(board_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.board_id, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.board_id, None)
+
+    def subscriber_count(self, board_id):
+        with self._lock:
+            return len(self._subscribers.get(board_id, ()))
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(getattr(settings, 'BOARD_EVENTS_BROKER', DEFAULT_BROKER))()
+
+
+def publish_event(board_id, event_type, **data):
+    """Publica o evento no board depois do commit da transação atual"""
+    event = {'type': event_type, 'board': board_id, 'data': data}
+    transaction.on_commit(lambda: get_broker().publish(board_id, event))
+
+
+def card_event_data(card):
+    return {'id': card.pk, 'list_id': card.list_id, 'position': card.position, 'title': card.title}
@@ -0,0 +1,158 @@
+"""
+Exportação em streaming de um board ou de uma empresa inteira.
+
+Os registros (company, user, board, list, card) saem um a um, em JSON Lines
+ou CSV, opcionalmente em gzip. Cards são lidos com iterator(chunk_size) e os
+membros de cada bloco numa query, então a memória é constante e os primeiros
+bytes saem logo, qualquer que seja o tamanho do tenant. Boards e cards
+arquivados (api/archive.py) vão junto, com `archived_at` preenchido.
+"""
+import csv
+import io
+import zlib
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from .models import Board, Card, List, User
+
+CHUNK_SIZE = 2000
+# Tamanho dos pedaços enviados ao cliente (o primeiro registro vai sozinho)
+BUFFER_SIZE = 64 * 1024
+
+FORMATS = {
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'csv': ('text/csv', 'csv'),
+}
+
+# CSV é uma tabela só: cada tipo de registro preenche as suas colunas
+CSV_COLUMNS = [
+    'type', 'id', 'board_id', 'list_id', 'title', 'description', 'position',
+    'priority', 'start_date', 'end_date', 'owner', 'is_done', 'members',
+    'name', 'slug', 'username', 'email', 'first_name', 'last_name', 'role',
+    'created_at', 'update_at', 'archived_at',
+]
+
+BOARD_FIELDS = (
+    'id', 'title', 'description', 'priority', 'start_date', 'end_date', 'owner__username',
+    'created_at', 'update_at', 'archived_at',
+)
+LIST_FIELDS = ('id', 'board_id', 'title', 'position', 'is_done')
+CARD_FIELDS = ('id', 'list_id', 'title', 'description', 'position', 'created_at', 'update_at', 'archived_at')
+USER_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name', 'role')
+
+
+def _chunks(iterator, size):
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _board_records(board):
+    board = dict(board)
+    board['owner'] = board.pop('owner__username')
+    yield {'type': 'board', **board}
+
+    for row in List.objects.filter(board_id=board['id']).order_by('position', 'id').values(*LIST_FIELDS):
+        yield {'type': 'list', **row}
+
+    cards = (
+        Card.all_objects.filter(list__board_id=board['id'])
+        .order_by('list_id', 'position', 'id')
+        .values(*CARD_FIELDS)
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for chunk in _chunks(cards, CHUNK_SIZE):
+        members = {}
+        rows = (
+            Card.members.through.objects.filter(card_id__in=[card['id'] for card in chunk])
+            .order_by('card_id', 'user__username')
+            .values_list('card_id', 'user__username')
+        )
+        for card_id, username in rows:
+            members.setdefault(card_id, []).append(username)
+        for card in chunk:
+            yield {'type': 'card', 'board_id': board['id'], **card, 'members': members.get(card['id'], [])}
+
+
+def board_records(board_ids):
+    """Registros dos boards informados (ids ou queryset de ids)"""
+    boards = (
+        Board.all_objects.filter(pk__in=board_ids).order_by('id')
+        .values(*BOARD_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    )
+    for board in boards:
+        yield from _board_records(board)
+
+
+def company_records(company):
+    """Empresa, usuários e todos os boards"""
+    yield {'type': 'company', 'id': company.pk, 'name': company.name, 'slug': company.slug}
+    users = User.objects.filter(company=company).order_by('id').values(*USER_FIELDS)
+    for user in users.iterator(chunk_size=CHUNK_SIZE):
+        yield {'type': 'user', **user}
+    yield from board_records(Board.all_objects.filter(company=company).values('pk'))
+
+
+def encode_jsonl(records):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for record in records:
+        yield encoder.encode(record) + '\n'
+
+
+def encode_csv(records):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    for record in records:
+        if 'members' in record:
+            record['members'] = ';'.join(record['members'])
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _buffered(lines, size=BUFFER_SIZE):
+    """Agrupa as linhas em pedaços de ~`size` bytes; a primeira sai sozinha"""
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return
+    yield first.encode()
+
+    pending, length = [], 0
+    for line in lines:
+        data = line.encode()
+        pending.append(data)
+        length += len(data)
+        if length >= size:
+            yield b''.join(pending)
+            pending, length = [], 0
+    if pending:
+        yield b''.join(pending)
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=31)  # cabeçalho gzip
+    for chunk in chunks:
+        # Z_SYNC_FLUSH: cada pedaço pode ser descomprimido assim que chega
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def export_stream(records, output='jsonl', compression=None):
+    encode = encode_csv if output == 'csv' else encode_jsonl
+    chunks = _buffered(encode(records))
+    return gzip_chunks(chunks) if compression == 'gzip' else chunks
+
+
+def export_response(records, filename, output='jsonl', compression=None):
+    content_type, extension = FORMATS[output]
+    filename = f"{filename}.{extension}"
+    if compression == 'gzip':
+        content_type, filename = 'application/gzip', f"{filename}.gz"
+    response = StreamingHttpResponse(export_stream(records, output, compression), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['X-Accel-Buffering'] = 'no'
+    return response
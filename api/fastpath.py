@@ -0,0 +1,158 @@
+"""
+Serialização só-leitura direto de linhas de .values(): sem instanciar models
+nem percorrer os campos do serializer objeto a objeto.
+
+RowSerializer compila uma vez, a partir de um serializer DRF (já podado pelo
+Fieldset, api/fieldsets.py), a lista (nome, lookup, conversão); cada linha
+vira um dict com as mesmas chaves, ordem e valores que o serializer daria.
+board_tree() (e aboard_tree(), com o ORM async) monta o detalhe do board
+assim, com uma query por nível.
+"""
+from collections import defaultdict
+
+from django.utils.encoding import force_str
+from rest_framework import serializers
+
+from .fieldsets import DISPLAY, is_relation, source_lookup
+from .models import Card, List
+from .profiling import profile_section
+
+# Campos cujo to_representation devolve o próprio valor lido do banco
+IDENTITY = (
+    serializers.IntegerField, serializers.CharField, serializers.BooleanField,
+    serializers.PrimaryKeyRelatedField, serializers.ReadOnlyField,
+)
+
+
+def _converter(model, field):
+    match = DISPLAY.fullmatch(field.source_attrs[-1])
+    if match:
+        choices = dict(model._meta.get_field(match.group(1)).flatchoices)
+        return lambda value: force_str(choices.get(value, value), strings_only=True)
+    if type(field) in IDENTITY:
+        return None
+    return field.to_representation
+
+
+class RowSerializer:
+    """
+    Representação de linhas .values() com os campos de `serializer`;
+    relações aninhadas entram prontas como argumentos nomeados de __call__.
+    ValueError se algum campo não for coluna (ex.: SerializerMethodField).
+    """
+
+    def __init__(self, serializer):
+        model = serializer.Meta.model
+        self.fields = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if is_relation(field):
+                self.fields.append((name, None, None))
+                continue
+            try:
+                lookup = source_lookup(model, field)
+            except LookupError:
+                raise ValueError(f"{type(serializer).__name__}.{name} não é coluna")
+            self.fields.append((name, lookup, _converter(model, field)))
+
+    @property
+    def lookups(self):
+        return [lookup for _, lookup, _ in self.fields if lookup]
+
+    def __call__(self, row, **nested):
+        data = {}
+        for name, lookup, convert in self.fields:
+            if lookup is None:
+                data[name] = nested[name]
+                continue
+            value = row[lookup]
+            data[name] = value if value is None or convert is None else convert(value)
+        return data
+
+
+def _values(queryset, *lookups):
+    return queryset.values(*dict.fromkeys(lookups))
+
+
+class _BoardTree:
+    """
+    Queries e montagem do detalhe do board, compartilhadas por board_tree e
+    aboard_tree: cada query é um .values() e a montagem não toca o banco
+    """
+
+    def __init__(self, serializer, pk):
+        self.pk = pk
+        self.board = RowSerializer(serializer)
+        self.lists_field = serializer.fields.get('lists')
+        self.cards_field = self.members_field = None
+        if self.lists_field is not None:
+            self.lists = RowSerializer(self.lists_field.child)
+            self.cards_field = self.lists_field.child.fields.get('cards')
+        if self.cards_field is not None:
+            self.cards = RowSerializer(self.cards_field.child)
+            self.members_field = self.cards_field.child.fields.get('members')
+
+    def board_rows(self, queryset):
+        return queryset.filter(pk=self.pk).values(*self.board.lookups)
+
+    def list_rows(self):
+        return _values(List.objects.filter(board_id=self.pk).order_by('position', 'id'), 'id', *self.lists.lookups)
+
+    def card_rows(self, list_rows):
+        return _values(
+            Card.objects.filter(list_id__in=[l['id'] for l in list_rows]).order_by('list_id', 'position', 'id'),
+            'id', 'list_id', *self.cards.lookups,
+        )
+
+    def membership_rows(self):
+        slug = self.members_field.child_relation.slug_field
+        return (
+            Card.members.through.objects
+            .filter(card__list__board_id=self.pk, card__archived_at__isnull=True)
+            .order_by('pk').values_list('card_id', f'user__{slug}')
+        )
+
+    def build(self, row, list_rows=(), card_rows=(), memberships=()):
+        with profile_section('serialize'):
+            if self.lists_field is None:
+                return self.board(row)
+            members = defaultdict(list)
+            for card_id, value in memberships:
+                members[card_id].append(value)
+            per_list = defaultdict(list)
+            for card in card_rows:
+                per_list[card['list_id']].append(self.cards(card, members=members[card['id']]))
+            return self.board(row, lists=[self.lists(l, cards=per_list[l['id']]) for l in list_rows])
+
+
+def board_tree(queryset, pk, serializer):
+    """
+    Detalhe do board no formato de `serializer` (BoardSerializer, podado ou
+    não) ou None se o board não está em `queryset`. Queries: board (com
+    company), listas, cards e membros; as relações fora do fieldset são puladas.
+    """
+    tree = _BoardTree(serializer, pk)
+    row = tree.board_rows(queryset).first()
+    if row is None:
+        return None
+    if tree.lists_field is None:
+        return tree.build(row)
+    list_rows = list(tree.list_rows())
+    card_rows = list(tree.card_rows(list_rows)) if tree.cards_field is not None else []
+    memberships = list(tree.membership_rows()) if tree.members_field is not None else []
+    return tree.build(row, list_rows, card_rows, memberships)
+
+
+async def aboard_tree(queryset, pk, serializer):
+    """board_tree() com o ORM async, para as views de api/async_views.py"""
+    tree = _BoardTree(serializer, pk)
+    row = await tree.board_rows(queryset).afirst()
+    if row is None:
+        return None
+    if tree.lists_field is None:
+        return tree.build(row)
+    list_rows = [l async for l in tree.list_rows()]
+    card_rows = [c async for c in tree.card_rows(list_rows)] if tree.cards_field is not None else []
+    memberships = [m async for m in tree.membership_rows()] if tree.members_field is not None else []
+    return tree.build(row, list_rows, card_rows, memberships)
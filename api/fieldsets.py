@@ -0,0 +1,248 @@
+"""
+Sparse fieldsets nas leituras: ?fields= escolhe os campos e ?include= as
+relações aninhadas, os dois com caminhos separados por ponto:
+
+    GET /api/boards/1/?fields=id,title,lists.title,lists.cards.title
+    GET /api/boards/1/?include=lists          (listas, sem os cards)
+    GET /api/boards/?fields=id,title,cards_count
+
+Sem `include`, relações seguem o `fields` (ou vêm todas); com ele, só as
+listadas. Serializers com SparseFieldsMixin podam os próprios campos pelo
+Fieldset do contexto e `columns()` traduz o que sobrou em .only() /
+select_related, então o ORM lê só as colunas da resposta. Vale para GET/HEAD;
+escritas respondem com a representação completa.
+"""
+import hashlib
+import json
+import re
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+READ_METHODS = ('GET', 'HEAD')
+DISPLAY = re.compile(r'get_(\w+)_display')
+
+
+def _parse(value, param):
+    """'a,b.c' -> {'a': None, 'b': {'c': None}}; em `include` a folha é {}"""
+    tree = {}
+    for path in value.split(','):
+        if not path.strip():
+            continue
+        names = [name.strip() for name in path.split('.')]
+        if not all(names):
+            raise ValidationError({param: f"Caminho inválido: {path.strip()!r}"})
+        node = tree
+        for name in names[:-1]:
+            if node.get(name, {}) is None:
+                # Campo já pedido inteiro
+                break
+            node = node.setdefault(name, {})
+        else:
+            if param == 'fields':
+                node[names[-1]] = None
+            else:
+                node.setdefault(names[-1], {})
+    return tree
+
+
+def is_relation(field):
+    """Relações aninhadas (serializers e many=True), controladas por `include`"""
+    return isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField))
+
+
+class Fieldset:
+    """Seleção de um nível: `fields`/`include` None = sem restrição"""
+    __slots__ = ('fields', 'include')
+
+    def __init__(self, fields=None, include=None):
+        self.fields = fields
+        self.include = include
+
+    @classmethod
+    def from_request(cls, request):
+        """Fieldset da query string; None sem ?fields= nem ?include= (ou em escritas)"""
+        if request.method not in READ_METHODS:
+            return None
+        params = getattr(request, 'query_params', request.GET)
+        if 'fields' not in params and 'include' not in params:
+            return None
+        return cls.parse(params.get('fields'), params.get('include'))
+
+    @classmethod
+    def parse(cls, fields=None, include=None):
+        """Fieldset dos valores de ?fields= e ?include= (None: parâmetro ausente)"""
+        return cls(
+            None if fields is None else _parse(fields, 'fields'),
+            None if include is None else _parse(include, 'include'),
+        )
+
+    @property
+    def key(self):
+        """Identifica a seleção em chaves de cache e ETags"""
+        canonical = json.dumps([self.fields, self.include], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+    def keeps(self, name, relation=False):
+        if relation and self.include is not None:
+            return name in self.include
+        return self.fields is None or name in self.fields
+
+    def nested(self, name):
+        return Fieldset(
+            None if self.fields is None else self.fields.get(name),
+            None if self.include is None else self.include.get(name, {}),
+        )
+
+    def select(self, fields):
+        """Campos mantidos (dict nome -> campo); nomes desconhecidos são 400"""
+        unknown = sorted(set(self.fields or ()) - fields.keys())
+        if unknown:
+            raise ValidationError({'fields': f"Campos desconhecidos: {unknown}"})
+        relations = {name for name, field in fields.items() if is_relation(field)}
+        unknown = sorted(set(self.include or ()) - relations)
+        if unknown:
+            raise ValidationError({'include': f"Relações desconhecidas: {unknown}"})
+        return {
+            name: field for name, field in fields.items()
+            if field.write_only or self.keeps(name, name in relations)
+        }
+
+
+def validate_fieldset(serializer):
+    """
+    Poda os campos do serializer agora (a poda é preguiçosa, em .fields), para
+    ?fields=/?include= desconhecidos virarem 400 antes de qualquer query
+    """
+    return serializer.fields
+
+
+def _path(serializer):
+    """Nomes dos campos da raiz até `serializer` (filhos de many=True não têm nome)"""
+    names = []
+    while serializer.parent is not None:
+        if serializer.field_name:
+            names.append(serializer.field_name)
+        serializer = serializer.parent
+    return reversed(names)
+
+
+class SparseFieldsMixin:
+    """Poda os campos pelo Fieldset em context['fieldset'], em qualquer nível"""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.context.get('fieldset')
+        if fieldset is None:
+            return fields
+        for name in _path(self):
+            fieldset = fieldset.nested(name)
+        return fieldset.select(fields)
+
+
+def source_lookup(model, field):
+    """
+    Lookup do ORM para o source do campo ('title', 'company__name',
+    'priority' para get_priority_display); '' para relações multivaloradas,
+    lidas por prefetch. LookupError quando o source não é coluna.
+    """
+    if field.source == '*':
+        raise LookupError(field.field_name)
+    names = []
+    for attr in field.source_attrs:
+        match = DISPLAY.fullmatch(attr)
+        try:
+            model_field = model._meta.get_field(match.group(1) if match else attr)
+        except FieldDoesNotExist:
+            raise LookupError(field.field_name)
+        if model_field.many_to_many or model_field.one_to_many:
+            return ''
+        names.append(model_field.name)
+        if not model_field.is_relation:
+            break
+        model = model_field.related_model
+    return '__'.join(names)
+
+
+def columns(serializer, required=()):
+    """
+    (only, select_related) com as colunas dos campos legíveis do serializer
+    (já podado) mais `required` (FK do pai, chaves de paginação); None quando
+    algum campo não corresponde a uma coluna.
+    """
+    model = serializer.Meta.model
+    only, related = set(required), set()
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        try:
+            lookup = source_lookup(model, field)
+        except LookupError:
+            return None
+        if not lookup:
+            continue
+        only.add(lookup)
+        parts = lookup.split('__')
+        for depth in range(1, len(parts)):
+            prefix = '__'.join(parts[:depth])
+            related.add(prefix)
+            # FK no caminho de um select_related não pode ficar adiado
+            if model._meta.get_field(parts[0]).concrete:
+                only.add(prefix)
+    return sorted(only), sorted(related)
+
+
+def sparse_queryset(queryset, serializer, required=()):
+    """Aplica columns() ao queryset; sem mapeamento completo, devolve como está"""
+    selection = columns(serializer, required)
+    if selection is None:
+        return queryset
+    only, related = selection
+    # select_related do viewset serve às escritas; aqui só o que os campos usam
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*only)
+
+
+def prefetch_lookups(fieldset, *lookups):
+    """
+    Lookups de prefetch ('cards__members') cortados na última relação pedida;
+    os que não ficam com nenhuma relação saem
+    """
+    if fieldset is None:
+        return list(lookups)
+    kept = []
+    for lookup in lookups:
+        names, current = [], fieldset
+        for name in lookup.split('__'):
+            if not current.keeps(name, relation=True):
+                break
+            names.append(name)
+            current = current.nested(name)
+        if names:
+            kept.append('__'.join(names))
+    return list(dict.fromkeys(kept))
+
+
+class SparseFieldsetViewMixin:
+    """?fields=/?include= nos GenericAPIView: contexto do serializer e .only()"""
+
+    def get_fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = Fieldset.from_request(self.request)
+        return self._fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fieldset'] = self.get_fieldset()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.get_fieldset() is None:
+            return queryset
+        # Chaves da paginação por cursor são lidas do último item da página
+        ordering = [name.lstrip('-') for name in getattr(self.paginator, 'ordering', None) or ()]
+        return sparse_queryset(queryset, self.get_serializer(), ordering)
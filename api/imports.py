@@ -0,0 +1,303 @@
+"""
+Importação de boards a partir de exports do Trello (JSON do board) ou do
+formato nativo (registros de api/exports.py, em JSON Lines ou lista JSON).
+
+O export vem do cliente: campos com tipo errado são 400, antes de qualquer
+escrita. Cada board entra numa transação: o board com save() e listas, cards
+e membros com bulk_create, com os signals adiados; contadores, estatísticas
+e índice de busca são ajustados uma vez no fim. A cota é conferida para o
+export inteiro antes do primeiro board; se mesmo assim um board falhar, os
+já gravados continuam no relatório, com status por board. Membros são
+resolvidos por username ou e-mail entre os usuários da empresa, em uma query.
+"""
+import json
+import logging
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .counters import adjust_board_counters, adjust_company_stats, deferred_board_updates, locked_company_stats
+from .models import Board, Card, List, User
+from .ranking import spaced_ranks
+from .search import index_boards, index_cards
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+PRIORITIES = {priority for priority, _ in Board.PRIORITY_CHOICES}
+# Listas do Trello com estes nomes contam como concluídas (List.is_done)
+DONE_TITLES = {'concluído', 'concluido', 'done', 'feito'}
+
+
+# Tipos aceitos nos campos do export (o payload vem do cliente)
+TEXT, NUMBER, KEY = (str,), (int, float), (str, int)
+TYPE_NAMES = {TEXT: "texto", NUMBER: "número", KEY: "texto ou número", (list,): "lista"}
+
+
+def _field(obj, name, types, where, default=None):
+    """obj[name] conferido contra `types` (ausente ou null: default); senão ValidationError"""
+    value = obj.get(name)
+    if value is None:
+        return default
+    if not isinstance(value, types) or isinstance(value, bool):
+        raise ValidationError(f"{where}.{name}: esperado {TYPE_NAMES[types]}, recebido {type(value).__name__}")
+    return value
+
+
+def _items(obj, name, where, types=(dict,)):
+    """Lista em obj[name] com itens de `types` (objetos, por padrão)"""
+    items = _field(obj, name, (list,), where, [])
+    for item in items:
+        if not isinstance(item, types) or isinstance(item, bool):
+            raise ValidationError(f"{where}.{name}: itens inválidos ({type(item).__name__})")
+    return items
+
+
+def _text(value, limit=None):
+    value = (value or '').strip()
+    return value[:limit] if limit else value
+
+
+def _date(value):
+    """Data ISO (ou início de datetime ISO) do export; None se ausente ou inválida"""
+    if not value:
+        return None
+    try:
+        date = parse_date(str(value)[:10])
+    except ValueError:
+        date = None
+    if date is None:
+        logger.warning("Data inválida ignorada na importação: %r", value)
+    return date
+
+
+def load_payload(payload):
+    """JSON (objeto do Trello ou lista de registros) ou JSON Lines"""
+    if isinstance(payload, bytes):
+        payload = payload.decode('utf-8-sig')
+    if not isinstance(payload, str):
+        return payload
+    try:
+        return json.loads(payload)
+    except json.JSONDecodeError:
+        try:
+            return [json.loads(line) for line in payload.splitlines() if line.strip()]
+        except json.JSONDecodeError as exc:
+            raise ValidationError(f"Arquivo não é JSON nem JSON Lines: {exc}")
+
+
+def _from_trello(doc, include_archived=False):
+    members = {
+        _field(m, 'id', KEY, 'members'): _field(m, 'username', TEXT, 'members')
+        for m in _items(doc, 'members', 'board')
+    }
+    lists = [
+        l for l in sorted(_items(doc, 'lists', 'board'), key=lambda l: _field(l, 'pos', NUMBER, 'lists', 0))
+        if include_archived or not l.get('closed')
+    ]
+    cards = {}
+    for card in sorted(_items(doc, 'cards', 'board'), key=lambda c: _field(c, 'pos', NUMBER, 'cards', 0)):
+        if include_archived or not card.get('closed'):
+            cards.setdefault(_field(card, 'idList', KEY, 'cards'), []).append({
+                'title': _text(_field(card, 'name', TEXT, 'cards'), 255) or "(sem título)",
+                'description': _field(card, 'desc', TEXT, 'cards') or None,
+                'members': [members[m] for m in _items(card, 'idMembers', 'cards', KEY) if members.get(m)],
+            })
+    return {
+        'title': _text(_field(doc, 'name', TEXT, 'board'), 255) or "Importado do Trello",
+        'description': _field(doc, 'desc', TEXT, 'board') or None,
+        'priority': 'medium',
+        'lists': [
+            {
+                'title': _text(_field(l, 'name', TEXT, 'lists'), 255) or "(sem título)",
+                'is_done': _text(l.get('name')).lower() in DONE_TITLES,
+                'cards': cards.get(_field(l, 'id', KEY, 'lists'), []),
+            }
+            for l in lists
+        ],
+    }
+
+
+def _from_native(records, include_archived=False):
+    boards, lists = [], {}
+    skipping = False
+    for record in records:
+        kind = record.get('type')
+        if kind == 'board':
+            # Board arquivado (api/archive.py) fica de fora, com listas e cards
+            skipping = bool(record.get('archived_at')) and not include_archived
+            if skipping:
+                continue
+            priority = _field(record, 'priority', TEXT, 'board')
+            boards.append({
+                'title': _text(_field(record, 'title', TEXT, 'board'), 255) or "Importado",
+                'description': _field(record, 'description', TEXT, 'board'),
+                'priority': priority if priority in PRIORITIES else 'medium',
+                'start_date': _date(record.get('start_date')),
+                'end_date': _date(record.get('end_date')),
+                'lists': [],
+            })
+        elif skipping:
+            continue
+        elif kind == 'list' and boards:
+            entry = {
+                'title': _text(_field(record, 'title', TEXT, 'list'), 255) or "(sem título)",
+                'is_done': bool(record.get('is_done')),
+                'position': _field(record, 'position', TEXT, 'list', ''),
+                'cards': [],
+            }
+            lists[(len(boards), _field(record, 'id', KEY, 'list'))] = entry
+            boards[-1]['lists'].append(entry)
+        elif kind == 'card' and boards:
+            entry = lists.get((len(boards), _field(record, 'list_id', KEY, 'card')))
+            if entry is not None and (include_archived or not record.get('archived_at')):
+                entry['cards'].append({
+                    'title': _text(_field(record, 'title', TEXT, 'card'), 255) or "(sem título)",
+                    'description': _field(record, 'description', TEXT, 'card'),
+                    'members': list(_items(record, 'members', 'card', TEXT)),
+                    'position': _field(record, 'position', TEXT, 'card', ''),
+                })
+    for board in boards:
+        board['lists'].sort(key=lambda l: l['position'])
+        for entry in board['lists']:
+            entry['cards'].sort(key=lambda c: c['position'])
+    return boards
+
+
+def parse_export(payload, include_archived=False):
+    """Boards normalizados ({title, ..., lists: [{title, is_done, cards: [...]}]})"""
+    data = load_payload(payload)
+    if isinstance(data, dict) and 'lists' in data and 'cards' in data:
+        return [_from_trello(data, include_archived)]
+    if isinstance(data, dict):
+        data = [data]
+    if isinstance(data, list) and all(isinstance(record, dict) for record in data):
+        boards = _from_native(data, include_archived)
+        if boards:
+            return boards
+    raise ValidationError("Formato não reconhecido: esperado export do Trello ou registros nativos")
+
+
+def _resolve_members(company, boards):
+    """username/e-mail (minúsculo) -> id, só dos referenciados, em uma query"""
+    refs = {
+        ref.lower()
+        for board in boards for entry in board['lists'] for card in entry['cards']
+        for ref in card['members']
+    }
+    if not refs:
+        return {}
+    users = (
+        User.objects.filter(company=company, is_active=True)
+        .annotate(username_lower=Lower('username'), email_lower=Lower('email'))
+        .filter(Q(username_lower__in=refs) | Q(email_lower__in=refs))
+        .values_list('pk', 'username', 'email')
+    )
+    lookup = {}
+    for pk, username, email in users:
+        if email:
+            lookup.setdefault(email.lower(), pk)
+        lookup[username.lower()] = pk
+    return lookup
+
+
+def _batches(items, size=BATCH_SIZE):
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def import_board(company, owner, data, members, enforce_quota=True, progress=None):
+    """Cria um board normalizado por parse_export; retorna o relatório"""
+    report = {'title': data['title'], 'lists': 0, 'cards': 0, 'memberships': 0, 'unmatched_members': set()}
+    with transaction.atomic(), deferred_board_updates():
+        if enforce_quota and locked_company_stats(company).boards >= company.max_boards:
+            raise ValidationError(f"Limite de {company.max_boards} projetos atingido")
+
+        board = Board.objects.create(
+            title=data['title'], description=data.get('description'), priority=data.get('priority', 'medium'),
+            start_date=data.get('start_date'), end_date=data.get('end_date'),
+            company=company, owner=owner,
+        )
+        lists = List.objects.bulk_create([
+            List(title=entry['title'], is_done=entry['is_done'], board=board, position=rank)
+            for entry, rank in zip(data['lists'], spaced_ranks(len(data['lists'])))
+        ])
+        report['lists'] = len(lists)
+        if progress:
+            progress(board, 'lists', len(lists))
+
+        done_cards = 0
+        pending = (
+            (list_obj, card, rank)
+            for list_obj, entry in zip(lists, data['lists'])
+            for card, rank in zip(entry['cards'], spaced_ranks(len(entry['cards'])))
+        )
+        card_ids = []
+        for batch in _batches(pending):
+            cards = Card.objects.bulk_create([
+                Card(title=card['title'], description=card['description'], list=list_obj, position=rank)
+                for list_obj, card, rank in batch
+            ])
+            memberships = []
+            for card_obj, (list_obj, card, _) in zip(cards, batch):
+                done_cards += list_obj.is_done
+                for user_id in dict.fromkeys(members.get(ref.lower()) for ref in card['members']):
+                    if user_id:
+                        memberships.append(Card.members.through(card_id=card_obj.pk, user_id=user_id))
+                report['unmatched_members'].update(ref for ref in card['members'] if ref.lower() not in members)
+            Card.members.through.objects.bulk_create(memberships, batch_size=BATCH_SIZE)
+            card_ids.extend(card.pk for card in cards)
+            report['cards'] += len(cards)
+            report['memberships'] += len(memberships)
+            if progress:
+                progress(board, 'cards', report['cards'])
+
+        adjust_board_counters(board_id=board.pk, lists=len(lists), cards=len(card_ids))
+        adjust_company_stats(
+            company_id=company.pk, boards=1, lists=len(lists), cards=len(card_ids), done_cards=done_cards,
+        )
+        index_boards([board.pk])
+        for batch in _batches(card_ids, 2000):
+            index_cards(batch)
+
+    report['board'] = board.pk
+    report['unmatched_members'] = sorted(report['unmatched_members'])
+    logger.info("Board %s importado: %s listas, %s cards", board.pk, report['lists'], report['cards'])
+    return report
+
+
+def import_boards(company, owner, payload, include_archived=False, enforce_quota=True, progress=None):
+    """
+    Importa todos os boards do export, cada um na sua transação. Um relatório
+    por board, com status 'created' ou 'failed' (e o erro); se nenhum entrar,
+    o primeiro erro é levantado.
+    """
+    if company is None:
+        raise ValidationError("Usuário sem empresa não pode importar boards")
+    boards = parse_export(payload, include_archived)
+    if enforce_quota:
+        with transaction.atomic():
+            stats = locked_company_stats(company)
+            if stats.boards + len(boards) > company.max_boards:
+                raise ValidationError(
+                    f"Limite de {company.max_boards} projetos atingido: o export tem {len(boards)} "
+                    f"boards e restam {max(company.max_boards - stats.boards, 0)}"
+                )
+    members = _resolve_members(company, boards)
+
+    reports, errors = [], []
+    for data in boards:
+        try:
+            reports.append({'status': 'created', **import_board(company, owner, data, members, enforce_quota, progress)})
+        except ValidationError as exc:
+            # Cota tomada por outra requisição no meio da importação
+            errors.append(exc)
+            reports.append({'title': data['title'], 'status': 'failed', 'error': exc.detail})
+    if errors and len(errors) == len(reports):
+        raise errors[0]
+    return reports
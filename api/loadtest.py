@@ -0,0 +1,94 @@
+"""
+Carga concorrente contra uma implantação em execução (WSGI ou ASGI), para
+comparar vazão das leituras assíncronas (api/async_views.py).
+
+Cada worker é uma thread com conexão keep-alive própria; o mesmo gerador é
+usado para as duas implantações, então a diferença medida é do servidor.
+
+Todas as threads usam o token de uma só empresa, então o throttling por
+empresa (api/throttling.py) corta a carga acima de THROTTLING['RATE']: para
+medir vazão, suba os servidores com THROTTLING_ENABLED=0. Respostas 429 são
+contadas à parte (`throttled`), não como erro, e o comando avisa quando
+aparecem: números com throttling ligado não comparam com rodadas sem ele.
+"""
+import http.client
+import itertools
+import math
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from .benchmark import benchmark_cases
+
+# Rotas com leitura assíncrona (ver api/urls.py)
+READ_ROUTES = ('board-list', 'board-detail', 'list-card-list')
+
+
+def read_paths(company):
+    """Caminhos de leitura e token do admin da empresa"""
+    admin, cases = benchmark_cases(company)
+    paths = [
+        reverse(route, kwargs=kwargs)
+        for route, method, kwargs, _ in cases
+        if method == 'get' and route in READ_ROUTES
+    ]
+    token, _ = Token.objects.get_or_create(user=admin)
+    return paths, token.key
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)] if ordered else None
+
+
+def run_load(base_url, paths, token, concurrency=50, requests=1000, timeout=30):
+    """{requests, errors, throttled, rps, p50_ms, p95_ms} de `requests` GETs em `concurrency` conexões"""
+    url = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+    prefix = url.path.rstrip('/')
+    headers = {'Authorization': f"Token {token}"}
+    counter = itertools.count()
+    latencies, errors, throttled = [], [], []
+
+    def worker():
+        connection = connection_class(url.hostname, url.port, timeout=timeout)
+        mine, failed, limited = [], 0, 0
+        while (i := next(counter)) < requests:
+            start = time.perf_counter()
+            try:
+                connection.request('GET', prefix + paths[i % len(paths)], headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status == 429:
+                    limited += 1
+                else:
+                    failed += response.status >= 400
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = connection_class(url.hostname, url.port, timeout=timeout)
+            mine.append((time.perf_counter() - start) * 1000)
+        connection.close()
+        latencies.extend(mine)
+        errors.append(failed)
+        throttled.append(limited)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'throttled': sum(throttled),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(_percentile(latencies, 0.50), 2),
+        'p95_ms': round(_percentile(latencies, 0.95), 2),
+    }
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.archive import (
+    CHUNK_SIZE, DONE_CARDS_AGE, STALE_BOARDS_AGE, archive_done_cards, archive_stale_boards,
+    done_cards_queryset, stale_boards_queryset,
+)
+from api.models import Company
+
+
+class Command(BaseCommand):
+    help = (
+        "Arquiva cards de listas concluídas sem alteração há N dias e boards "
+        "encerrados (end_date) há N dias, em blocos; pode rodar periodicamente"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--card-days', type=int, default=DONE_CARDS_AGE.days)
+        parser.add_argument('--board-days', type=int, default=STALE_BOARDS_AGE.days)
+        parser.add_argument('--company', help="Slug da empresa (padrão: todas)")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Só conta o que seria arquivado")
+
+    def handle(self, *args, **options):
+        company_id = None
+        if options['company']:
+            company_id = Company.objects.filter(slug=options['company']).values_list('pk', flat=True).first()
+            if company_id is None:
+                raise CommandError(f"Empresa {options['company']} não encontrada")
+        cards_age = timedelta(days=options['card_days'])
+        boards_age = timedelta(days=options['board_days'])
+
+        if options['dry_run']:
+            cards = done_cards_queryset(cards_age, company_id).count()
+            boards = stale_boards_queryset(boards_age, company_id).count()
+            self.stdout.write(f"Seriam arquivados {cards} cards e {boards} boards")
+            return
+
+        cards = archive_done_cards(cards_age, company_id, options['chunk_size'])
+        boards = archive_stale_boards(boards_age, company_id, options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"{cards} cards e {boards} boards arquivados"))
@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import SKIPPED_ROUTES, compare, run_benchmark
+from api.models import Company
+
+
+class Command(BaseCommand):
+    help = "Mede latência (p50/p95), queries e tamanho de resposta de cada rota da API"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', help="Slug da empresa (padrão: a com mais cards)")
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--password', help="Senha do admin, para medir auth-token")
+        parser.add_argument('--output', help="Arquivo JSON com os resultados")
+        parser.add_argument('--baseline', help="JSON de resultados anteriores para comparar")
+        parser.add_argument('--margin', type=float, default=0.2, help="Folga sobre o baseline (0.2 = 20%%)")
+        parser.add_argument(
+            '--accept-encoding', default='',
+            help="Accept-Encoding das requisições (ex.: 'gzip, br'); bytes passam a ser os comprimidos",
+        )
+
+    def handle(self, *args, **options):
+        companies = Company.objects.select_related('stats')
+        if options['company']:
+            company = companies.filter(slug=options['company']).first()
+        else:
+            company = companies.order_by('-stats__cards').first()
+        if company is None:
+            raise CommandError("Empresa não encontrada (gere dados com seed_data)")
+
+        results = run_benchmark(
+            company, iterations=options['iterations'],
+            warmup=options['warmup'], password=options['password'],
+            accept_encoding=options['accept_encoding'],
+        )
+        for name, metrics in results.items():
+            self.stdout.write(
+                f"{name:32} p50 {metrics['p50_ms']:8.2f}ms  p95 {metrics['p95_ms']:8.2f}ms  "
+                f"render {metrics['render_ms']:7.2f}ms  "
+                f"{metrics['queries']:3} queries  {metrics['bytes']:8} bytes  [{metrics['status']}]"
+            )
+        for route, reason in SKIPPED_ROUTES.items():
+            self.stdout.write(f"{route:32} ignorada: {reason}")
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2, sort_keys=True)
+
+        if options['baseline']:
+            with open(options['baseline']) as baseline:
+                regressions = compare(results, json.load(baseline), options['margin'])
+            if regressions:
+                raise CommandError("Regressões:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("Dentro do baseline"))
@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.loadtest import read_paths, run_load
+from api.models import Company
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a vazão concorrente das leituras (boards, board, cards) entre as "
+        "implantações WSGI e ASGI já em execução. Ex.: gunicorn setup.wsgi -w 4 -b :8000 "
+        "e uvicorn setup.asgi:application --workers 4 --port 8001, ambas com o mesmo banco "
+        "e com THROTTLING_ENABLED=0 (a carga sai toda de uma empresa)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi', help="URL base da API sob WSGI (ex.: http://127.0.0.1:8000)")
+        parser.add_argument('--asgi', help="URL base da API sob ASGI (ex.: http://127.0.0.1:8001)")
+        parser.add_argument('--company', help="Slug da empresa (padrão: a com mais cards)")
+        parser.add_argument('--concurrency', default="1,10,50,200", help="Níveis de concorrência, separados por vírgula")
+        parser.add_argument('--requests', type=int, default=2000, help="Requisições por nível")
+        parser.add_argument('--output', help="Arquivo JSON com os resultados")
+
+    def handle(self, *args, **options):
+        targets = {name: options[name] for name in ('wsgi', 'asgi') if options[name]}
+        if not targets:
+            raise CommandError("Informe --wsgi e/ou --asgi")
+
+        companies = Company.objects.select_related('stats')
+        if options['company']:
+            company = companies.filter(slug=options['company']).first()
+        else:
+            company = companies.order_by('-stats__cards').first()
+        if company is None:
+            raise CommandError("Empresa não encontrada (gere dados com seed_data)")
+        paths, token = read_paths(company)
+
+        results = {}
+        for level in [int(value) for value in options['concurrency'].split(',')]:
+            for name, base_url in targets.items():
+                result = run_load(base_url, paths, token, concurrency=level, requests=options['requests'])
+                results.setdefault(name, {})[level] = result
+                self.stdout.write(
+                    f"{name} c={level:<4} {result['rps']:8.1f} req/s  p50 {result['p50_ms']:8.2f}ms  "
+                    f"p95 {result['p95_ms']:8.2f}ms  {result['errors']} erros  {result['throttled']} throttled"
+                )
+                if result['throttled']:
+                    self.stdout.write(self.style.WARNING(
+                        f"{name}: respostas 429; suba o servidor com THROTTLING_ENABLED=0 para medir vazão"
+                    ))
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
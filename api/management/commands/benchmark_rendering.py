@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import rendering_benchmark
+from api.models import Company
+
+
+class Command(BaseCommand):
+    help = (
+        "Tempo de renderização (JSONRenderer da stdlib x FastJSONRenderer) e bytes por "
+        "codificação (identity, gzip, br) da lista de boards e do maior board do admin"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', help="Slug da empresa (padrão: a com mais cards)")
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--output', help="Arquivo JSON com os resultados")
+
+    def handle(self, *args, **options):
+        companies = Company.objects.select_related('stats')
+        if options['company']:
+            company = companies.filter(slug=options['company']).first()
+        else:
+            company = companies.order_by('-stats__cards').first()
+        if company is None:
+            raise CommandError("Empresa não encontrada (gere dados com seed_data)")
+
+        results = rendering_benchmark(company, iterations=options['iterations'])
+        for route, metrics in results.items():
+            render = "  ".join(f"{name} {ms:8.2f}ms" for name, ms in metrics['render'].items())
+            self.stdout.write(f"{route:14} render p50: {render}")
+            for encoding, size in metrics['bytes'].items():
+                ms = metrics['compress_ms'].get(encoding)
+                timing = f"  compressão p50 {ms:7.2f}ms" if ms is not None else ""
+                self.stdout.write(f"{'':14} {encoding:8} {size:10} bytes{timing}")
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
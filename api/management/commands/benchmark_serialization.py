@@ -0,0 +1,57 @@
+import json
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.benchmark import serialization_benchmark
+from api.models import Board
+from api.seeding import seed_company
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a CPU de montar o detalhe de um board pelo BoardSerializer e pelas "
+        "linhas .values() (api/fastpath.py). Sem --board, gera um board temporário "
+        "(desfeito no fim) com --cards cards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--board', type=int, help="Id de um board existente")
+        parser.add_argument('--cards', type=int, default=5000, help="Cards do board gerado")
+        parser.add_argument('--lists', type=int, default=5, help="Listas do board gerado")
+        parser.add_argument('--iterations', type=int, default=10)
+        parser.add_argument(
+            '--fields', default="id,title,lists.id,lists.title,lists.cards.id,lists.cards.title",
+            help="Seleção medida também pelo fast path (vazio: não mede)",
+        )
+        parser.add_argument('--output', help="Arquivo JSON com os resultados")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['board']:
+                if not Board.objects.filter(pk=options['board']).exists():
+                    raise CommandError("Board não encontrado")
+                board_id = options['board']
+            else:
+                lists = max(options['lists'], 1)
+                company = seed_company(
+                    random.Random(0), users=10, boards=1, lists=lists, cards=options['cards'] // lists,
+                    password_hash=make_password(None),
+                )
+                board_id = Board.objects.get(company=company).pk
+            results = serialization_benchmark(board_id, options['iterations'], options['fields'] or None)
+            transaction.set_rollback(not options['board'])
+
+        baseline = results['serializer']['cpu_p50_ms']
+        for name, metrics in results.items():
+            saving = 1 - metrics['cpu_p50_ms'] / baseline if baseline else 0
+            self.stdout.write(
+                f"{name:16} cpu p50 {metrics['cpu_p50_ms']:9.2f}ms  p95 {metrics['cpu_p95_ms']:9.2f}ms  "
+                f"tempo p50 {metrics['p50_ms']:9.2f}ms  {metrics['bytes']:9} bytes  economia {saving:6.1%}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
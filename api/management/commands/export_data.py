@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.exports import FORMATS, board_records, company_records, export_stream
+from api.models import Company
+
+
+class Command(BaseCommand):
+    help = "Exporta uma empresa inteira ou boards em JSON Lines/CSV, em streaming"
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--company', help="Slug da empresa")
+        target.add_argument('--board', type=int, action='append', help="Id do board (pode repetir)")
+        parser.add_argument('--output', default='-', help="Arquivo de saída (padrão: stdout)")
+        parser.add_argument('--format', choices=sorted(FORMATS), default='jsonl')
+        parser.add_argument('--gzip', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['company']:
+            company = Company.objects.filter(slug=options['company']).first()
+            if company is None:
+                raise CommandError(f"Empresa não encontrada: {options['company']}")
+            records = company_records(company)
+        else:
+            records = board_records(options['board'])
+
+        chunks = export_stream(records, options['format'], 'gzip' if options['gzip'] else None)
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
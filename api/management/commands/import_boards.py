@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.imports import import_boards
+from api.models import Company, User
+
+
+class Command(BaseCommand):
+    help = "Importa boards de um export do Trello (JSON) ou nativo (JSON Lines de export_data)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('file')
+        parser.add_argument('--company', required=True, help="Slug da empresa de destino")
+        parser.add_argument('--owner', help="Username do dono dos boards (padrão: primeiro admin)")
+        parser.add_argument('--include-archived', action='store_true', help="Traz também boards, listas e cards arquivados")
+        parser.add_argument('--ignore-quota', action='store_true', help="Não confere max_boards da empresa")
+
+    def handle(self, *args, **options):
+        company = Company.objects.filter(slug=options['company']).first()
+        if company is None:
+            raise CommandError(f"Empresa não encontrada: {options['company']}")
+        owners = User.objects.filter(company=company, is_active=True)
+        if options['owner']:
+            owner = owners.filter(username=options['owner']).first()
+        else:
+            owner = owners.filter(role='admin').order_by('pk').first()
+        if owner is None:
+            raise CommandError("Dono dos boards não encontrado na empresa")
+
+        def progress(board, stage, count):
+            self.stdout.write(f"board {board.pk}: {count} {stage}")
+
+        with open(options['file'], 'rb') as source:
+            reports = import_boards(
+                company, owner, source.read(),
+                include_archived=options['include_archived'],
+                enforce_quota=not options['ignore_quota'],
+                progress=progress,
+            )
+        for report in reports:
+            if report['status'] == 'failed':
+                self.stdout.write(self.style.ERROR(f"{report['title']}: {report['error']}"))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f"Board {report['board']} ({report['title']}): {report['lists']} listas, "
+                f"{report['cards']} cards, {report['memberships']} membros"
+            ))
+            if report['unmatched_members']:
+                self.stdout.write(self.style.WARNING(
+                    "Sem usuário correspondente: " + ", ".join(report['unmatched_members'])
+                ))
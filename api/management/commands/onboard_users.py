@@ -0,0 +1,72 @@
+import csv
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.onboarding import CHUNK_SIZE, Onboarding, read_checkpoint, read_rows, write_checkpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Cria empresas, usuários e tokens a partir de um CSV/JSONL (colunas: company, "
+        "company_name, username, email, first_name, last_name, role, password). "
+        "Retomável: reexecutar continua do último bloco gravado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Padrão: pela extensão do arquivo")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Usuários por transação")
+        parser.add_argument('--workers', type=int, help="Processos para o hash das senhas (0: no próprio processo; padrão: nº de CPUs)")
+        parser.add_argument('--tokens-out', help="CSV (username, token) dos usuários criados")
+        parser.add_argument('--checkpoint', help="Arquivo de progresso (padrão: <file>.checkpoint)")
+        parser.add_argument('--restart', action='store_true', help="Ignora o checkpoint e começa do início")
+        parser.add_argument('--max-users', type=int, help="Limite de usuários das empresas novas")
+        parser.add_argument('--max-boards', type=int, help="Limite de boards das empresas novas")
+        parser.add_argument(
+            '--grow-limits', action='store_true',
+            help="Eleva max_users das empresas até caber o arquivo (padrão: recusa os usuários além do limite)",
+        )
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['file']):
+            raise CommandError(f"Arquivo não encontrado: {options['file']}")
+
+        checkpoint = options['checkpoint'] or f"{options['file']}.checkpoint"
+        start_after = 0 if options['restart'] else read_checkpoint(checkpoint)
+        company_defaults = {
+            field: options[field] for field in ('max_users', 'max_boards') if options[field] is not None
+        }
+
+        tokens_file = open(options['tokens_out'], 'a', newline='') if options['tokens_out'] else None
+
+        def committed(line):
+            # Tokens do bloco no disco antes de avançar o checkpoint
+            if tokens_file:
+                tokens_file.flush()
+            write_checkpoint(checkpoint, line)
+
+        try:
+            onboarding = Onboarding(
+                chunk_size=options['chunk_size'],
+                workers=options['workers'],
+                tokens_out=csv.writer(tokens_file) if tokens_file else None,
+                company_defaults=company_defaults,
+                grow_limits=options['grow_limits'],
+            )
+            created, skipped, rejected = onboarding.run(
+                read_rows(options['file'], options['format']),
+                start_after=start_after,
+                on_chunk=committed,
+            )
+        finally:
+            if tokens_file:
+                tokens_file.close()
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(f"{created} usuários criados, {skipped} já existentes"))
+        if rejected:
+            self.stdout.write(self.style.WARNING(
+                f"{rejected} usuários recusados pela cota (use --max-users ou --grow-limits)"
+            ))
@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from api.activity import COMPACT_AFTER, DELETE_CHUNK, RETENTION, compact_activity, prune_activity
+
+
+class Command(BaseCommand):
+    help = "Compacta movimentações antigas e apaga atividades mais antigas que a retenção"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=RETENTION.days, help="Retenção em dias")
+        parser.add_argument(
+            '--compact-days', type=int, default=COMPACT_AFTER.days,
+            help="Movimentações mais antigas que isso ficam só a última do dia por card",
+        )
+        parser.add_argument('--chunk-size', type=int, default=DELETE_CHUNK)
+
+    def handle(self, *args, **options):
+        compacted = compact_activity(timedelta(days=options['compact_days']))
+        deleted = prune_activity(timedelta(days=options['days']), options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"{compacted} movimentações compactadas, {deleted} atividades removidas"))
@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from api.sync import TOMBSTONE_RETENTION, prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Apaga tombstones do sync incremental mais antigos que a retenção"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=TOMBSTONE_RETENTION.days,
+            help="Retenção em dias (cursores mais antigos recebem reset)",
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones(timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f"{deleted} tombstones removidos"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.counters import rebuild_board_counters
+from api.models import Board
+
+
+class Command(BaseCommand):
+    help = "Recalcula os contadores de listas/cards dos boards"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help="Apenas boards desta empresa (id)")
+
+    def handle(self, *args, **options):
+        queryset = Board.all_objects.all()
+        if options['company']:
+            queryset = queryset.filter(company_id=options['company'])
+
+        updated = rebuild_board_counters(queryset)
+        self.stdout.write(self.style.SUCCESS(f"{updated} boards recalculados"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.counters import rebuild_company_stats
+from api.models import Company
+
+
+class Command(BaseCommand):
+    help = "Recalcula as estatísticas (usuários, boards, listas, cards) das empresas"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help="Apenas esta empresa (id)")
+
+    def handle(self, *args, **options):
+        queryset = Company.objects.all()
+        if options['company']:
+            queryset = queryset.filter(pk=options['company'])
+
+        updated = rebuild_company_stats(queryset)
+        self.stdout.write(self.style.SUCCESS(f"{updated} empresas recalculadas"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Recria o índice de busca de boards e cards"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help="Apenas esta empresa (id)")
+
+    def handle(self, *args, **options):
+        boards, cards = rebuild_index(options['company'])
+        self.stdout.write(self.style.SUCCESS(f"{boards} boards e {cards} cards indexados"))
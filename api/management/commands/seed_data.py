@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from api.seeding import seed_companies
+
+
+class Command(BaseCommand):
+    help = "Gera empresas sintéticas (usuários, boards, listas, cards e membros) via bulk_create"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=1)
+        parser.add_argument('--users', type=int, default=10, help="Usuários por empresa (o primeiro é admin)")
+        parser.add_argument('--boards', type=int, default=5, help="Boards por empresa")
+        parser.add_argument('--lists', type=int, default=4, help="Listas por board")
+        parser.add_argument('--cards', type=int, default=25, help="Cards por lista")
+        parser.add_argument('--members', type=int, default=2, help="Membros por card")
+        parser.add_argument('--password', default="senha123", help="Senha de todos os usuários")
+        parser.add_argument('--seed', type=int, help="Semente do gerador (conteúdo reprodutível)")
+
+    def handle(self, *args, **options):
+        companies = seed_companies(
+            companies=options['companies'],
+            password=options['password'],
+            seed=options['seed'],
+            users=options['users'],
+            boards=options['boards'],
+            lists=options['lists'],
+            cards=options['cards'],
+            members=options['members'],
+        )
+        for company in companies:
+            stats = company.stats
+            stats.refresh_from_db()
+            self.stdout.write(
+                f"{company.slug}: {stats.active_users} usuários, {stats.boards} boards, "
+                f"{stats.lists} listas, {stats.cards} cards"
+            )
+        self.stdout.write(self.style.SUCCESS(f"{len(companies)} empresas criadas"))
@@ -0,0 +1,80 @@
+"""
+Membros de cards em lote: adiciona e/ou remove vários usuários de vários
+cards (de qualquer board da empresa) numa transação.
+
+Cards e usuários são validados contra a empresa antes de qualquer escrita;
+as linhas da tabela de membros são gravadas com um bulk_create e um DELETE.
+Como o m2m_changed não dispara, versão dos boards, update_at dos cards
+(sync incremental) e eventos são ajustados aqui, uma vez por lote; o log de
+atividades recebe uma entrada por card e usuário (api/activity.py).
+"""
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .activity import record_activity
+from .counters import bump_board_version
+from .events import publish_event
+from .models import Card, User
+
+BATCH_SIZE = 1000
+
+
+def change_card_members(company_id, card_ids, add=(), remove=(), actor=None):
+    """Retorna {'added': n, 'removed': n}; ids fora da empresa invalidam o lote"""
+    through = Card.members.through
+    add, remove = list(dict.fromkeys(add)), list(dict.fromkeys(remove))
+    with transaction.atomic():
+        cards = dict(
+            Card.objects.filter(pk__in=card_ids, list__board__company_id=company_id)
+            .values_list('pk', 'list__board_id')
+        )
+        # Remover vale também para usuários desativados
+        users = {
+            pk: (username, is_active)
+            for pk, username, is_active in User.objects.filter(pk__in={*add, *remove}, company_id=company_id)
+            .values_list('pk', 'username', 'is_active')
+        }
+        errors = {}
+        missing_cards = sorted(set(card_ids) - cards.keys())
+        if missing_cards:
+            errors['cards'] = f"Cards não encontrados: {missing_cards}"
+        missing_users = sorted(
+            {pk for pk in add if not users.get(pk, (None, False))[1]} | (set(remove) - users.keys())
+        )
+        if missing_users:
+            errors['users'] = f"Usuários não encontrados: {missing_users}"
+        if errors:
+            raise ValidationError(errors)
+
+        existing = set(
+            through.objects.filter(card_id__in=cards, user_id__in=users).values_list('card_id', 'user_id')
+        )
+        added = [(card_id, user_id) for card_id in cards for user_id in add if (card_id, user_id) not in existing]
+        removed = [(card_id, user_id) for card_id in cards for user_id in remove if (card_id, user_id) in existing]
+
+        through.objects.bulk_create(
+            [through(card_id=card_id, user_id=user_id) for card_id, user_id in added],
+            batch_size=BATCH_SIZE, ignore_conflicts=True,
+        )
+        if removed:
+            through.objects.filter(card_id__in=cards, user_id__in=remove).delete()
+
+        changed = {card_id for card_id, _ in added + removed}
+        if changed:
+            Card.objects.filter(pk__in=changed).update(update_at=timezone.now())
+            bump_board_version(card_ids=changed)
+
+        events = {}
+        for kind, pairs in (('added', added), ('removed', removed)):
+            for card_id, user_id in pairs:
+                board = events.setdefault(cards[card_id], {'added': [], 'removed': []})
+                board[kind].append({'card_id': card_id, 'username': users[user_id][0]})
+                record_activity(
+                    f'member.{kind}', actor, board_id=cards[card_id], company_id=company_id,
+                    target_id=card_id, username=users[user_id][0],
+                )
+        for board_id, data in events.items():
+            publish_event(board_id, 'members.changed', **data)
+
+    return {'added': len(added), 'removed': len(removed)}
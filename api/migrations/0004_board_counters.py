@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Board = apps.get_model('api', 'Board')
+    List = apps.get_model('api', 'List')
+    Card = apps.get_model('api', 'Card')
+
+    lists = List.objects.filter(board=OuterRef('pk')).values('board').annotate(total=Count('pk')).values('total')
+    cards = Card.objects.filter(list__board=OuterRef('pk')).values('list__board').annotate(total=Count('pk')).values('total')
+    Board.objects.update(
+        lists_count=Coalesce(Subquery(lists), Value(0)),
+        cards_count=Coalesce(Subquery(cards), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_company_user_role_board_company_user_company'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='board',
+            name='cards_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='lists_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
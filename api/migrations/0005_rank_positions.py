@@ -0,0 +1,95 @@
+from django.db import migrations, models
+
+# Cópia congelada de api.ranking.spaced_ranks como era nesta migração:
+# mudanças no módulo não podem alterar o que ela grava
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+KEY_WIDTH = 6
+STEP = BASE ** 2
+START = BASE ** KEY_WIDTH // 4
+
+
+def _encode(value, width):
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return ''.join(reversed(digits))
+
+
+def spaced_ranks(count):
+    step = min(STEP, (BASE ** KEY_WIDTH - START) // (count + 1))
+    return [_encode(START + i * step, KEY_WIDTH) for i in range(count)]
+
+
+def _convert(queryset, parent_field, source, target, values):
+    """Renumera `target` a partir da ordem de `source`, por board/lista"""
+    model = queryset.model
+    parents = queryset.values_list(parent_field, flat=True).distinct()
+    for parent_id in parents.iterator():
+        pks = list(
+            queryset.filter(**{parent_field: parent_id})
+            .order_by(source, 'pk')
+            .values_list('pk', flat=True)
+        )
+        objs = [model(pk=pk, **{target: value}) for pk, value in zip(pks, values(len(pks)))]
+        model.objects.bulk_update(objs, [target], batch_size=500)
+
+
+def integer_to_rank(apps, schema_editor):
+    for name, parent in (('List', 'board_id'), ('Card', 'list_id')):
+        model = apps.get_model('api', name)
+        _convert(model.objects.all(), parent, 'position', 'rank', spaced_ranks)
+
+
+def rank_to_integer(apps, schema_editor):
+    for name, parent in (('List', 'board_id'), ('Card', 'list_id')):
+        model = apps.get_model('api', name)
+        _convert(model.objects.all(), parent, 'rank', 'position', range)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_board_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='rank',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='rank',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.RunPython(integer_to_rank, rank_to_integer),
+        migrations.RemoveField(
+            model_name='list',
+            name='position',
+        ),
+        migrations.RemoveField(
+            model_name='card',
+            name='position',
+        ),
+        migrations.RenameField(
+            model_name='list',
+            old_name='rank',
+            new_name='position',
+        ),
+        migrations.RenameField(
+            model_name='card',
+            old_name='rank',
+            new_name='position',
+        ),
+        migrations.AlterModelOptions(
+            name='card',
+            options={'ordering': ['position', 'id']},
+        ),
+        migrations.AlterModelOptions(
+            name='list',
+            options={'ordering': ['position', 'id']},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_rank_positions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='board',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_board_version'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='board',
+            index=models.Index(fields=['company', '-created_at', 'id'], name='board_company_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['list', 'position', 'id'], name='card_list_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='list',
+            index=models.Index(fields=['board', 'position', 'id'], name='list_board_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['company', 'username', 'id'], name='user_company_username_idx'),
+        ),
+    ]
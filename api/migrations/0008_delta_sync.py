@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('list', 'Lista'), ('card', 'Card')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='update_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['list', 'update_at'], name='card_list_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='list',
+            index=models.Index(fields=['board', 'update_at'], name='list_board_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='board',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to='api.board'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['board', 'deleted_at'], name='tombstone_board_deleted_idx'),
+        ),
+    ]
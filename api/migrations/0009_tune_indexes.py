@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='board',
+            name='company',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='boards', to='api.company'),
+        ),
+        migrations.AlterField(
+            model_name='card',
+            name='list',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='cards', to='api.list'),
+        ),
+        migrations.AlterField(
+            model_name='list',
+            name='board',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='lists', to='api.board'),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Mantém em sincronia com api/search.py
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE api_searchentry_fts USING fts5(
+        title, body, content='api_searchentry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER api_searchentry_ai AFTER INSERT ON api_searchentry BEGIN
+        INSERT INTO api_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER api_searchentry_ad AFTER DELETE ON api_searchentry BEGIN
+        INSERT INTO api_searchentry_fts(api_searchentry_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER api_searchentry_au AFTER UPDATE ON api_searchentry BEGIN
+        INSERT INTO api_searchentry_fts(api_searchentry_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO api_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS api_searchentry_au",
+    "DROP TRIGGER IF EXISTS api_searchentry_ad",
+    "DROP TRIGGER IF EXISTS api_searchentry_ai",
+    "DROP TABLE IF EXISTS api_searchentry_fts",
+]
+
+POSTGRES_FORWARD = [
+    """CREATE INDEX api_searchentry_tsv_idx ON api_searchentry
+        USING GIN (to_tsvector('portuguese', title || ' ' || body))""",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS api_searchentry_tsv_idx",
+]
+
+BACKFILL = [
+    """INSERT INTO api_searchentry (company_id, board_id, card_id, kind, title, body)
+        SELECT company_id, id, NULL, 'board', title, COALESCE(description, '') FROM api_board""",
+    """INSERT INTO api_searchentry (company_id, board_id, card_id, kind, title, body)
+        SELECT b.company_id, b.id, c.id, 'card', c.title, COALESCE(c.description, '')
+        FROM api_card c
+        JOIN api_list l ON l.id = c.list_id
+        JOIN api_board b ON b.id = l.board_id""",
+]
+
+
+def _run(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_FORWARD)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    _run(schema_editor, BACKFILL)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_BACKWARD)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_tune_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('board', 'Board'), ('card', 'Card')], max_length=10)),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True, default='')),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.board')),
+                ('card', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.card')),
+                ('company', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.company')),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, field):
+    counts = queryset.values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def populate_stats(apps, schema_editor):
+    Company = apps.get_model('api', 'Company')
+    CompanyStats = apps.get_model('api', 'CompanyStats')
+    User = apps.get_model('api', 'User')
+    Board = apps.get_model('api', 'Board')
+    List = apps.get_model('api', 'List')
+    Card = apps.get_model('api', 'Card')
+
+    # Lista padrão de concluídos criada pelo BoardViewSet
+    List.objects.filter(title='Concluído').update(is_done=True)
+
+    CompanyStats.objects.bulk_create(
+        [CompanyStats(company_id=pk) for pk in Company.objects.values_list('pk', flat=True)]
+    )
+    company = OuterRef('company_id')
+    CompanyStats.objects.update(
+        active_users=_count(User.objects.filter(company=company, is_active=True), 'company'),
+        boards=_count(Board.objects.filter(company=company), 'company'),
+        lists=_count(List.objects.filter(board__company=company), 'board__company'),
+        cards=_count(Card.objects.filter(list__board__company=company), 'list__board__company'),
+        done_cards=_count(
+            Card.objects.filter(list__board__company=company, list__is_done=True), 'list__board__company'
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyStats',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='api.company')),
+                ('active_users', models.IntegerField(default=0)),
+                ('boards', models.IntegerField(default=0)),
+                ('lists', models.IntegerField(default=0)),
+                ('cards', models.IntegerField(default=0)),
+                ('done_cards', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Company stats',
+            },
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='max_boards',
+            field=models.IntegerField(default=5),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='max_users',
+            field=models.IntegerField(default=10),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='is_done',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='company',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
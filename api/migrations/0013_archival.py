@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_board_templates'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='board',
+            name='board_company_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='card',
+            name='card_list_position_idx',
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='board',
+            index=models.Index(condition=models.Q(('archived_at__isnull', True)), fields=['company', '-created_at', 'id'], name='board_company_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='board',
+            index=models.Index(condition=models.Q(('archived_at__isnull', False)), fields=['company', '-archived_at', 'id'], name='board_company_archived_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(condition=models.Q(('archived_at__isnull', True)), fields=['list', 'position', 'id'], name='card_list_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(condition=models.Q(('archived_at__isnull', False)), fields=['list', '-archived_at', 'id'], name='card_list_archived_idx'),
+        ),
+    ]
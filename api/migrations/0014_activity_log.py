@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_archival'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Activity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('actor_name', models.CharField(blank=True, default='', max_length=150)),
+                ('verb', models.CharField(max_length=50)),
+                ('target_id', models.BigIntegerField(null=True)),
+                ('data', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('board', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.board')),
+                ('company', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.company')),
+            ],
+            options={
+                'verbose_name_plural': 'Activities',
+                'indexes': [models.Index(fields=['board', '-created_at', 'id'], name='activity_board_created_idx'), models.Index(fields=['company', '-created_at', 'id'], name='activity_company_created_idx'), models.Index(fields=['created_at'], name='activity_created_idx')],
+            },
+        ),
+    ]
@@ -2,17 +2,26 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 
 from django.conf import settings
+from django.utils import timezone
+
+
+class HotManager(models.Manager):
+    """Só as linhas não arquivadas (api/archive.py); `all_objects` vê todas"""
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(archived_at__isnull=True)
 
 
 class Company(models.Model):
     """Empresa"""
     name = models.CharField(max_length=255)
     slug = models.SlugField(unique=True)
-    created_at = models.DateTimeField(default=True)
+    created_at = models.DateTimeField(default=timezone.now)
     is_active = models.BooleanField(default=True)
     
-    # max_users = models.IntegerField(default=10)
-    # max_boards = models.IntegerField(default=5)
+    # Limites do plano, conferidos contra CompanyStats
+    max_users = models.IntegerField(default=10)
+    max_boards = models.IntegerField(default=5)
     
     class Meta:
         verbose_name_plural = "Companies"
@@ -21,6 +30,26 @@ class Company(models.Model):
         return self.name
 
 
+class CompanyStats(models.Model):
+    """Totais da empresa, mantidos incrementalmente (api/counters.py)"""
+    company = models.OneToOneField(Company, on_delete=models.CASCADE, related_name="stats", primary_key=True)
+    active_users = models.IntegerField(default=0)
+    boards = models.IntegerField(default=0)
+    lists = models.IntegerField(default=0)
+    cards = models.IntegerField(default=0)
+    done_cards = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name_plural = "Company stats"
+    
+    @property
+    def open_cards(self):
+        return self.cards - self.done_cards
+    
+    def __str__(self):
+        return f"Stats de {self.company_id}"
+
+
 class User(AbstractUser):
     company = models.ForeignKey(
         Company, 
@@ -42,9 +71,22 @@ class User(AbstractUser):
         default="member"
     )
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Listagem paginada por empresa (api/pagination.py)
+            models.Index(fields=['company', 'username', 'id'], name='user_company_username_idx'),
+        ]
+    
     def is_company_admin(self):
         return self.role == "admin"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Para ajustar CompanyStats.active_users quando empresa/ativo mudam
+        instance._loaded_membership = (instance.__dict__.get('company_id'), instance.__dict__.get('is_active'))
+        return instance
+    
     def __str__(self):
         return f"{self.username} ({self.company.name if self.company else 'Sem empresa'})"
 
@@ -59,7 +101,9 @@ class Board(models.Model):
     
     
     title = models.CharField(max_length=255)
-    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="boards",null=True)
+    # Índice próprio dispensado: coberto por board_company_created_idx (ativos)
+    # e board_company_archived_idx (arquivados)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="boards",null=True, db_index=False)
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="boards")
     description = models.TextField(blank=True, null=True)
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium')
@@ -68,36 +112,210 @@ class Board(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     update_at = models.DateTimeField(auto_now=True)
     
+    # Contadores desnormalizados, mantidos via F() em api/counters.py
+    lists_count = models.IntegerField(default=0, editable=False)
+    cards_count = models.IntegerField(default=0, editable=False)
+    # Incrementa a cada mudança no board, listas, cards ou membros (ETag/cache)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # Arquivado (api/archive.py): fora de `objects` e dos índices quentes
+    archived_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
+    objects = HotManager()
+    all_objects = models.Manager()
+    
+    MANAGED_FIELDS = ('lists_count', 'cards_count', 'version', 'archived_at')
+    
     def __str__(self):
         return f"{self.title} - {self.company.name}"
     
+    def save(self, *args, **kwargs):
+        # Não sobrescreve contadores/versão com o valor (possivelmente velho) em memória
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.MANAGED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Listagem paginada por empresa (api/pagination.py); só boards ativos
+            models.Index(
+                fields=['company', '-created_at', 'id'], name='board_company_created_idx',
+                condition=models.Q(archived_at__isnull=True),
+            ),
+            models.Index(
+                fields=['company', '-archived_at', 'id'], name='board_company_archived_idx',
+                condition=models.Q(archived_at__isnull=False),
+            ),
+        ]
+    
+class BoardTemplate(models.Model):
+    """Estrutura de listas reutilizável na criação de boards da empresa"""
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="board_templates")
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    # [{"title": ..., "is_done": bool}, ...], na ordem do board
+    lists = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return self.name
     
+    class Meta:
+        ordering = ['name', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'name'], name='board_template_company_name_uniq'),
+        ]
+
+
 class List(models.Model):
     title = models.CharField(max_length=255)
-    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name="lists")
-    position = models.IntegerField(default=0)
+    # Índice próprio dispensado: coberto por list_board_position_idx
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name="lists", db_index=False)
+    # Chave lexicográfica (api/ranking.py)
+    position = models.CharField(max_length=64, default="")
+    # Cards nesta lista contam como concluídos (CompanyStats.done_cards)
+    is_done = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True, null=True)
+    update_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.title} in {self.board.title}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_done = instance.__dict__.get('is_done')
+        return instance
+    
     class Meta:
-        ordering = ['position']
+        ordering = ['position', 'id']
+        indexes = [
+            models.Index(fields=['board', 'position', 'id'], name='list_board_position_idx'),
+            # Sync incremental (api/sync.py)
+            models.Index(fields=['board', 'update_at'], name='list_board_updated_idx'),
+        ]
     
 class Card(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
-    list = models.ForeignKey(List, on_delete=models.CASCADE, related_name="cards")
-    position = models.IntegerField(default=0)
+    # Índice próprio dispensado: coberto por card_list_updated_idx
+    list = models.ForeignKey(List, on_delete=models.CASCADE, related_name="cards", db_index=False)
+    # Chave lexicográfica (api/ranking.py)
+    position = models.CharField(max_length=64, default="")
     created_at = models.DateTimeField(auto_now_add=True)
     update_at = models.DateTimeField(auto_now=True)
     members = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='assigned_cards', blank=True)
+    # Arquivado (api/archive.py): fora de `objects` e dos índices quentes
+    archived_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
+    objects = HotManager()
+    all_objects = models.Manager()
     
     def __str__(self):
         return self.title
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda a lista original para detectar movimentação entre boards
+        instance._loaded_list_id = instance.__dict__.get('list_id')
+        # e o texto original, para só reindexar a busca quando ele muda
+        instance._loaded_text = (instance.__dict__.get('title'), instance.__dict__.get('description'))
+        return instance
+    
+    class Meta:
+        ordering = ['position', 'id']
+        indexes = [
+            models.Index(
+                fields=['list', 'position', 'id'], name='card_list_position_idx',
+                condition=models.Q(archived_at__isnull=True),
+            ),
+            # Sync incremental (api/sync.py) e seleção para arquivar; completo
+            # (sem condição) porque também atende a FK em exclusões em cascata
+            models.Index(fields=['list', 'update_at'], name='card_list_updated_idx'),
+            models.Index(
+                fields=['list', '-archived_at', 'id'], name='card_list_archived_idx',
+                condition=models.Q(archived_at__isnull=False),
+            ),
+        ]
+
+
+class Tombstone(models.Model):
+    """Registro de exclusão de lista/card, para o sync incremental (api/sync.py)"""
+    KIND_CHOICES = [
+        ('list', 'Lista'),
+        ('card', 'Card'),
+    ]
+    
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name="tombstones")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.kind} {self.object_id} removido de {self.board_id}"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['board', 'deleted_at'], name='tombstone_board_deleted_idx'),
+        ]
+
+
+class SearchEntry(models.Model):
+    """Documento do índice de busca (api/search.py): um por board e um por card"""
+    KIND_CHOICES = [
+        ('board', 'Board'),
+        ('card', 'Card'),
+    ]
+    
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="+", null=True)
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name="+")
+    # Exclusão do card (inclusive em cascata) remove a entrada junto
+    card = models.ForeignKey(Card, on_delete=models.CASCADE, related_name="+", null=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True, default="")
+    
+    def __str__(self):
+        return f"{self.kind}: {self.title}"
+
+
+class Activity(models.Model):
+    """
+    Evento do log de atividades (api/activity.py), só inserido. Board e ator
+    sem constraint: o evento sobrevive ao que descreve e o lote gravado em
+    segundo plano não falha se o board/usuário sumiu nesse meio tempo.
+    """
+    company = models.ForeignKey(
+        Company, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+", null=True, db_index=False
+    )
+    board = models.ForeignKey(
+        Board, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+", null=True, db_index=False
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+", null=True,
+        db_index=False,
+    )
+    actor_name = models.CharField(max_length=150, blank=True, default="")
+    verb = models.CharField(max_length=50)
+    # Objeto do evento (card, usuário), para filtros e compactação
+    target_id = models.BigIntegerField(null=True)
+    data = models.JSONField(default=dict)
+    # Momento do evento, não da gravação do lote
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.actor_name} {self.verb} ({self.created_at:%Y-%m-%d %H:%M})"
+    
     class Meta:
-        ordering = ['position']
-    
\ No newline at end of file
+        verbose_name_plural = "Activities"
+        indexes = [
+            # Feeds paginados (api/pagination.py)
+            models.Index(fields=['board', '-created_at', 'id'], name='activity_board_created_idx'),
+            models.Index(fields=['company', '-created_at', 'id'], name='activity_company_created_idx'),
+            # Retenção e compactação (prune_activity)
+            models.Index(fields=['created_at'], name='activity_created_idx'),
+        ]
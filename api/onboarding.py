@@ -0,0 +1,232 @@
+"""
+Onboarding em lote de empresas, usuários e tokens a partir de exports de RH
+(CSV com cabeçalho ou JSONL, uma linha por usuário).
+
+Colunas: company (slug), company_name, username, email, first_name,
+last_name, role, password. Sem `password` o usuário fica com senha
+inutilizável (login só por token / reset).
+
+O arquivo é lido em streaming e gravado em blocos (bulk_create, uma transação
+por bloco), então a memória não depende do tamanho do arquivo. O hash das
+senhas, gargalo de CPU, roda num pool de processos. Depois de cada bloco o
+número da última linha gravada vai para o checkpoint; numa nova execução as
+linhas até ali são puladas, e usernames já existentes também.
+
+A cota de usuários (Company.max_users) vale aqui como na API: a cada bloco as
+CompanyStats das empresas envolvidas ficam travadas e as linhas além do limite
+são recusadas (com aviso no log). Com `grow_limits` o limite é elevado até
+caber o arquivo, também com aviso; empresas novas pegam `max_users` de
+`company_defaults` (--max-users) ou o padrão do model.
+"""
+import csv
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from .counters import adjust_company_stats, locked_company_stats
+from .models import Company, User
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+ROLES = {role for role, _ in User.ROLE_CHOICES}
+
+
+def read_rows(path, format=None):
+    """(número da linha, dict) de cada registro, sem carregar o arquivo"""
+    format = format or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, newline='', encoding='utf-8') as source:
+        if format == 'jsonl':
+            for line_no, line in enumerate(source, 1):
+                if line.strip():
+                    yield line_no, json.loads(line)
+        else:
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _init_worker():
+    # Com spawn (macOS/Windows) o processo filho começa sem o Django configurado
+    if not apps.ready:
+        django.setup()
+
+
+def _hash_passwords(passwords, executor):
+    """Hash de cada senha (None: senha inutilizável, sem custo)"""
+    pending = [password for password in passwords if password]
+    hashed = iter(executor.map(make_password, pending, chunksize=16) if executor else map(make_password, pending))
+    return [next(hashed) if password else make_password(None) for password in passwords]
+
+
+def _clean(line_no, row):
+    username = (row.get('username') or '').strip()
+    company = (row.get('company') or '').strip()
+    if not username or not company:
+        logger.warning("Linha %s ignorada: username e company são obrigatórios", line_no)
+        return None
+    role = (row.get('role') or 'member').strip()
+    if role not in ROLES:
+        logger.warning("Linha %s: role %r inválido, usando 'member'", line_no, role)
+        role = 'member'
+    return {
+        'company': company,
+        'company_name': (row.get('company_name') or '').strip() or company,
+        'username': username,
+        'email': (row.get('email') or '').strip(),
+        'first_name': (row.get('first_name') or '').strip(),
+        'last_name': (row.get('last_name') or '').strip(),
+        'role': role,
+        'password': row.get('password') or None,
+    }
+
+
+class Onboarding:
+    def __init__(self, chunk_size=CHUNK_SIZE, workers=None, tokens_out=None, company_defaults=None, grow_limits=False):
+        self.chunk_size = chunk_size
+        self.grow_limits = grow_limits
+        self.workers = workers
+        self.tokens_out = tokens_out
+        self.company_defaults = company_defaults or {}
+        # slug -> id; cresce com o número de empresas, não de usuários
+        self.companies = {}
+        self.created = self.skipped = self.rejected = 0
+
+    def _company_ids(self, rows):
+        missing = {row['company'] for row in rows} - self.companies.keys()
+        if missing:
+            self.companies.update(Company.objects.filter(slug__in=missing).values_list('slug', 'pk'))
+        for row in rows:
+            if row['company'] not in self.companies:
+                # create(): o signal cria as CompanyStats da empresa
+                company = Company.objects.create(
+                    slug=row['company'], name=row['company_name'], **self.company_defaults
+                )
+                self.companies[company.slug] = company.pk
+                logger.info("Empresa %s criada", company.slug)
+        return self.companies
+
+    def _quota(self, counts):
+        """Vagas por empresa ({id: n}) para `counts` novos usuários, com as CompanyStats travadas"""
+        free = {}
+        # Ordem fixa de locks entre execuções paralelas
+        for company in Company.objects.filter(pk__in=counts).order_by('pk'):
+            active = locked_company_stats(company).active_users
+            needed = active + counts[company.pk]
+            if needed > company.max_users and self.grow_limits:
+                logger.warning(
+                    "Empresa %s: limite de usuários elevado de %s para %s", company.slug, company.max_users, needed
+                )
+                company.max_users = needed
+                company.save(update_fields=['max_users'])
+            free[company.pk] = max(company.max_users - active, 0)
+        return free
+
+    def _write_chunk(self, rows, executor):
+        existing = set(
+            User.objects.filter(username__in=[row['username'] for row in rows])
+            .values_list('username', flat=True)
+        )
+        fresh, seen = [], set()
+        for row in rows:
+            if row['username'] in existing or row['username'] in seen:
+                self.skipped += 1
+                continue
+            seen.add(row['username'])
+            fresh.append(row)
+        if not fresh:
+            return []
+
+        hashes = _hash_passwords([row['password'] for row in fresh], executor)
+        with transaction.atomic():
+            companies = self._company_ids(fresh)
+            counts = {}
+            for row in fresh:
+                counts[companies[row['company']]] = counts.get(companies[row['company']], 0) + 1
+            free = self._quota(counts)
+            accepted = []
+            for row, password in zip(fresh, hashes):
+                company_id = companies[row['company']]
+                if free[company_id] <= 0:
+                    logger.warning("Usuário %s recusado: limite de usuários de %s atingido", row['username'], row['company'])
+                    self.rejected += 1
+                    continue
+                free[company_id] -= 1
+                accepted.append((row, password))
+            users = User.objects.bulk_create(
+                [
+                    User(
+                        username=row['username'], email=row['email'],
+                        first_name=row['first_name'], last_name=row['last_name'],
+                        role=row['role'], password=password, company_id=companies[row['company']],
+                    )
+                    for row, password in accepted
+                ],
+                batch_size=self.chunk_size,
+            )
+            tokens = Token.objects.bulk_create(
+                [Token(key=Token.generate_key(), user=user) for user in users],
+                batch_size=self.chunk_size,
+            )
+            # bulk_create não dispara signals: estatísticas ajustadas por empresa
+            per_company = {}
+            for user in users:
+                per_company[user.company_id] = per_company.get(user.company_id, 0) + 1
+            for company_id, count in per_company.items():
+                adjust_company_stats(company_id=company_id, active_users=count)
+        self.created += len(users)
+        return tokens
+
+    def run(self, rows, start_after=0, on_chunk=None):
+        """
+        Processa `rows` ((linha, dict), em streaming) pulando as linhas até
+        `start_after`; `on_chunk(última linha)` é chamado após cada commit.
+        """
+        executor = ProcessPoolExecutor(self.workers, initializer=_init_worker) if self.workers != 0 else None
+        try:
+            rows = ((line_no, row) for line_no, row in rows if line_no > start_after)
+            for chunk in _chunks(rows, self.chunk_size):
+                cleaned = [row for row in (_clean(line_no, row) for line_no, row in chunk) if row]
+                tokens = self._write_chunk(cleaned, executor) if cleaned else []
+                if self.tokens_out is not None:
+                    self.tokens_out.writerows((token.user.username, token.key) for token in tokens)
+                last_line = chunk[-1][0]
+                logger.info(
+                    "Até a linha %s: %s usuários criados, %s já existentes, %s recusados pela cota",
+                    last_line, self.created, self.skipped, self.rejected,
+                )
+                if on_chunk:
+                    on_chunk(last_line)
+        finally:
+            if executor:
+                executor.shutdown()
+        return self.created, self.skipped, self.rejected
+
+
+def read_checkpoint(path):
+    try:
+        with open(path) as checkpoint:
+            return json.load(checkpoint)['line']
+    except FileNotFoundError:
+        return 0
+
+
+def write_checkpoint(path, line):
+    # Troca atômica: uma falha no meio da escrita não corrompe o checkpoint
+    with open(f'{path}.tmp', 'w') as checkpoint:
+        json.dump({'line': line}, checkpoint)
+    os.replace(f'{path}.tmp', path)
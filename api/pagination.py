@@ -0,0 +1,93 @@
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Paginação por cursor (keyset): cada página é um WHERE na chave de ordenação
+    + LIMIT, então o custo não cresce com a profundidade da rolagem.
+    As subclasses definem `ordering`, que deve ter índice correspondente.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset para views assíncronas (api/async_views.py): mesma
+        lógica do CursorPagination, com a página lida por aiterator().
+        """
+        page_queryset = self._page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        results = [obj async for obj in page_queryset.aiterator(chunk_size=self.page_size + 1)]
+        return self._set_page(results)
+
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, position = self.cursor or (0, False, None)
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if position is not None:
+            order = self.ordering[0]
+            lookup = 'lt' if self.cursor.reverse != order.startswith('-') else 'gt'
+            queryset = queryset.filter(**{f"{order.lstrip('-')}__{lookup}": position})
+        return queryset[offset:offset + self.page_size + 1]
+
+    def _set_page(self, results):
+        offset, reverse, position = self.cursor or (0, False, None)
+        self.page = results[:self.page_size]
+
+        has_following = len(results) > len(self.page)
+        following = self._get_position_from_instance(results[-1], self.ordering) if has_following else None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None or offset > 0
+            self.has_previous = has_following
+            self.next_position = position
+            self.previous_position = following
+        else:
+            self.has_next = has_following
+            self.has_previous = position is not None or offset > 0
+            self.next_position = following
+            self.previous_position = position
+        return self.page
+
+
+class BoardPagination(KeysetPagination):
+    ordering = ('-created_at', 'id')
+
+
+class PositionPagination(KeysetPagination):
+    """Listas e cards, na ordem do quadro"""
+    ordering = ('position', 'id')
+
+
+class AssignedCardPagination(KeysetPagination):
+    """Cards do usuário em todos os boards, mais novos primeiro"""
+    ordering = ('-id',)
+
+
+class ArchivePagination(KeysetPagination):
+    """Boards/cards arquivados, mais recentes primeiro (índices parciais)"""
+    ordering = ('-archived_at', 'id')
+
+
+class ActivityPagination(KeysetPagination):
+    """Feed de atividades, mais recentes primeiro"""
+    ordering = ('-created_at', 'id')
+
+
+class UserPagination(KeysetPagination):
+    ordering = ('username', 'id')
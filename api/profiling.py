@@ -0,0 +1,280 @@
+"""
+Perfil por requisição: queries (quantidade/tempo), autenticação, serialização,
+renderização e total, agregados em histogramas por rota (`GET board-detail`,
+`PATCH list-card-move`, ...), lidos em /api/metrics/.
+
+O header Server-Timing expõe tempos e número de queries do backend, então só
+sai com PROFILING['EXPOSE_HEADER']: True (todos) ou 'staff' (usuários is_staff
+já autenticados); o padrão é não enviar.
+
+O custo fora de uma requisição perfilada é uma leitura de ContextVar por
+query/serializer. Queries lentas só são guardadas numa amostra das
+requisições (PROFILING['SLOW_QUERY_SAMPLE_RATE']). Os histogramas são por
+processo: com vários workers cada um responde pelos seus.
+"""
+import bisect
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.utils.functional import SimpleLazyObject
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SLOW_QUERY_MS': 100,
+    'SLOW_QUERY_SAMPLE_RATE': 0.05,
+    'EXPOSE_HEADER': False,
+}
+
+# Limites superiores (ms) dos buckets do histograma; o último é +inf
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+SLOW_QUERY_LOG = 100
+
+_current = ContextVar('request_profile', default=None)
+
+
+def profiling_settings():
+    return {**DEFAULTS, **getattr(settings, 'PROFILING', {})}
+
+
+class RequestProfile:
+    __slots__ = ('durations', 'queries', 'sample', 'slow_ms', 'serializing')
+
+    def __init__(self, sample=False, slow_ms=None):
+        self.durations = {}
+        self.queries = 0
+        self.sample = sample
+        self.slow_ms = slow_ms
+        self.serializing = False
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def server_timing(self):
+        parts = []
+        for name, seconds in self.durations.items():
+            entry = f'{name};dur={seconds * 1000:.2f}'
+            if name == 'db':
+                entry += f';desc="{self.queries} queries"'
+            parts.append(entry)
+        return ', '.join(parts)
+
+
+@contextmanager
+def profile_section(name):
+    """Soma o tempo do bloco em `name` na requisição perfilada atual (se houver)"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - start)
+
+
+class ProfiledSerializerMixin:
+    """Tempo de serialização; só a chamada mais externa conta (aninhados e many=True)"""
+
+    def to_representation(self, instance):
+        profile = _current.get()
+        if profile is None or profile.serializing:
+            return super().to_representation(instance)
+        profile.serializing = True
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            profile.serializing = False
+            profile.add('serialize', time.perf_counter() - start)
+
+
+def _query_timer(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        profile.queries += 1
+        profile.add('db', elapsed)
+        if profile.sample and elapsed * 1000 >= profile.slow_ms:
+            metrics.slow_query(sql, elapsed * 1000)
+
+
+def _install_query_timer(connection, **kwargs):
+    # Fica instalado na conexão; sem requisição perfilada só repassa a query
+    if _query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_timer)
+
+
+connection_created.connect(_install_query_timer)
+
+
+class RouteHistogram:
+    __slots__ = ('count', 'total_ms', 'db_ms', 'queries', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.db_ms = 0.0
+        self.queries = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def observe(self, total_ms, db_ms, queries):
+        self.count += 1
+        self.total_ms += total_ms
+        self.db_ms += db_ms
+        self.queries += queries
+        self.buckets[bisect.bisect_left(BUCKETS_MS, total_ms)] += 1
+
+    def quantile(self, fraction):
+        """Limite superior do bucket que contém o quantil (None: acima do último)"""
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total_ms / self.count, 3),
+            'avg_db_ms': round(self.db_ms / self.count, 3),
+            'avg_queries': round(self.queries / self.count, 2),
+            'p50_ms': self.quantile(0.50),
+            'p95_ms': self.quantile(0.95),
+            'p99_ms': self.quantile(0.99),
+            'buckets': {
+                **{str(bound): count for bound, count in zip(BUCKETS_MS, self.buckets)},
+                '+inf': self.buckets[-1],
+            },
+        }
+
+
+class Metrics:
+    """Histogramas por rota + últimas queries lentas amostradas"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+            self._slow_queries = deque(maxlen=SLOW_QUERY_LOG)
+
+    def observe(self, route, total_ms, db_ms=0.0, queries=0):
+        with self._lock:
+            histogram = self._routes.get(route)
+            if histogram is None:
+                histogram = self._routes[route] = RouteHistogram()
+            histogram.observe(total_ms, db_ms, queries)
+
+    def slow_query(self, sql, duration_ms):
+        logger.warning("Query lenta (%.1fms): %s", duration_ms, sql)
+        with self._lock:
+            self._slow_queries.append({'sql': sql, 'duration_ms': round(duration_ms, 3)})
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'buckets_ms': list(BUCKETS_MS),
+                'routes': {route: h.as_dict() for route, h in sorted(self._routes.items())},
+                'slow_queries': list(self._slow_queries),
+            }
+
+
+metrics = Metrics()
+
+
+def _route(request):
+    match = request.resolver_match
+    return f"{request.method} {match.url_name if match and match.url_name else 'unmatched'}"
+
+
+class ProfilingMiddleware:
+    """Deve ser o primeiro de MIDDLEWARE, para o total cobrir a pilha inteira"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = profiling_settings()
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = config['SLOW_QUERY_MS']
+        self.sample_rate = config['SLOW_QUERY_SAMPLE_RATE']
+        self.expose = config['EXPOSE_HEADER']
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _start(self):
+        profile = RequestProfile(random.random() < self.sample_rate, self.slow_ms)
+        return profile, _current.set(profile), time.perf_counter()
+
+    def _finish(self, request, response, profile, token, start):
+        _current.reset(token)
+        total = time.perf_counter() - start
+        profile.add('total', total)
+        if self._exposes(request):
+            response['Server-Timing'] = profile.server_timing()
+        metrics.observe(
+            _route(request), total * 1000, profile.durations.get('db', 0.0) * 1000, profile.queries
+        )
+        return response
+
+    def _exposes(self, request):
+        if self.expose != 'staff':
+            return bool(self.expose)
+        # Só o usuário já resolvido pelo DRF/views async: o lazy da sessão faria query
+        user = getattr(request, 'user', None)
+        return not isinstance(user, SimpleLazyObject) and getattr(user, 'is_staff', False)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        _install_query_timer(connection)
+        profile, token, start = self._start()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            _current.reset(token)
+            raise
+        return self._finish(request, response, profile, token, start)
+
+    async def __acall__(self, request):
+        # Queries em sync_to_async herdam o contexto e entram no perfil
+        profile, token, start = self._start()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            _current.reset(token)
+            raise
+        return self._finish(request, response, profile, token, start)
+
+    def process_template_response(self, request, response):
+        # Response do DRF: renderização acontece depois daqui, dentro da pilha
+        profile = _current.get()
+        if profile is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: profile.add('render', time.perf_counter() - start)
+            )
+        return response
@@ -0,0 +1,166 @@
+"""
+Ordenação por chaves lexicográficas (rank) para listas e cards.
+
+Cada item guarda uma string em base 36; a ordem da coleção é a ordem das
+strings. Inserir entre dois itens gera uma chave entre as duas vizinhas, então
+só a linha movida é escrita. Quando as chaves ficam longas demais a coleção é
+renumerada (rebalance) em segundo plano.
+
+Só dígitos e minúsculas: a ordem é a mesma em qualquer collation do banco.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+
+# Chaves "inteiras" de largura fixa: novas posições no fim andam de STEP em STEP
+KEY_WIDTH = 6
+STEP = BASE ** 2
+START = BASE ** KEY_WIDTH // 4
+
+# Acima deste tamanho a coleção é renumerada
+REBALANCE_LENGTH = 12
+
+# Enviado após renumerar uma coleção: sender=model, pks=ids (mesmo pai)
+positions_rebalanced = Signal()
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rank-rebalance')
+
+
+def _encode(value, width):
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return ''.join(reversed(digits))
+
+
+def _decode(key):
+    value = 0
+    for char in key:
+        value = value * BASE + DIGITS.index(char)
+    return value
+
+
+def _midpoint(before, after):
+    """Menor chave "no meio" de before < x < after (after=None: sem limite)"""
+    result = []
+    n = 0
+    while True:
+        low = DIGITS.index(before[n]) if n < len(before) else 0
+        high = BASE if after is None else (DIGITS.index(after[n]) if n < len(after) else 0)
+
+        if low == high:
+            result.append(DIGITS[low])
+            n += 1
+            continue
+
+        mid = (low + high) // 2
+        if mid > low:
+            result.append(DIGITS[mid])
+            return ''.join(result)
+
+        # Sem espaço neste dígito: fica com o de before e o limite superior some
+        result.append(DIGITS[low])
+        after = None
+        n += 1
+
+
+def rank_after(key):
+    """Chave logo após `key`, mantendo a largura fixa enquanto houver espaço"""
+    value = _decode(key[:KEY_WIDTH].ljust(KEY_WIDTH, '0')) + STEP
+    if value < BASE ** KEY_WIDTH:
+        return _encode(value, KEY_WIDTH)
+    return _midpoint(key, None)
+
+
+def rank_between(before=None, after=None):
+    """
+    Chave estritamente entre `before` e `after` (None = ponta aberta).
+    Levanta ValueError se não existir (vizinhos empatados ou fora de ordem).
+    """
+    if before is None and after is None:
+        return _encode(START, KEY_WIDTH)
+    if after is None:
+        return rank_after(before)
+    before = before or ''
+    if before >= after or after.rstrip('0') == before.rstrip('0'):
+        raise ValueError(f"Não há chave entre {before!r} e {after!r}")
+    return _midpoint(before, after)
+
+
+def spaced_ranks(count):
+    """`count` chaves de largura fixa igualmente espaçadas (usado no rebalance)"""
+    step = min(STEP, (BASE ** KEY_WIDTH - START) // (count + 1))
+    return [_encode(START + i * step, KEY_WIDTH) for i in range(count)]
+
+
+def needs_rebalance(key):
+    return len(key) > REBALANCE_LENGTH
+
+
+def _ordered_ranks(queryset):
+    return queryset.order_by('position', 'pk').values_list('position', flat=True)
+
+
+def last_rank(queryset):
+    """Chave para adicionar um item no fim da coleção"""
+    last = queryset.order_by('-position', '-pk').values_list('position', flat=True).first()
+    return rank_between(last, None)
+
+
+def rank_for_index(queryset, index):
+    """
+    Chave para inserir na posição `index` (0 = topo) da coleção `queryset`,
+    que não deve incluir o próprio item sendo movido.
+    """
+    index = max(int(index), 0)
+
+    def compute():
+        if index == 0:
+            return rank_between(None, _ordered_ranks(queryset).first())
+        neighbours = list(_ordered_ranks(queryset)[index - 1:index + 1])
+        if not neighbours:
+            return last_rank(queryset)
+        return rank_between(*neighbours) if len(neighbours) == 2 else rank_between(neighbours[0], None)
+
+    try:
+        return compute()
+    except ValueError:
+        # Vizinhos empatados (inserções concorrentes): renumera e tenta de novo
+        rebalance(queryset)
+        return compute()
+
+
+def rebalance(queryset):
+    """Renumera a coleção com chaves curtas e igualmente espaçadas"""
+    model = queryset.model
+    now = timezone.now()
+    with transaction.atomic():
+        pks = list(queryset.select_for_update().order_by('position', 'pk').values_list('pk', flat=True))
+        # update_at junto: as novas chaves precisam aparecer no sync incremental
+        objs = [model(pk=pk, position=rank, update_at=now) for pk, rank in zip(pks, spaced_ranks(len(pks)))]
+        model.objects.bulk_update(objs, ['position', 'update_at'], batch_size=500)
+        positions_rebalanced.send(sender=model, pks=pks)
+    return len(objs)
+
+
+def _run_rebalance(queryset):
+    try:
+        rebalance(queryset)
+    except Exception:
+        logger.exception("Falha ao rebalancear posições de %s", queryset.model.__name__)
+    finally:
+        close_old_connections()
+
+
+def schedule_rebalance(queryset):
+    """Agenda o rebalance para depois do commit, fora do ciclo da requisição"""
+    transaction.on_commit(lambda: _executor.submit(_run_rebalance, queryset))
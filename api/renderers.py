@@ -0,0 +1,45 @@
+"""
+JSONRenderer com backend rápido: orjson quando instalado (`pip install
+orjson`), senão o json da stdlib pelo JSONRenderer do DRF.
+
+A saída é a mesma do renderer padrão (compacta, UTF-8, U+2028/U+2029
+escapados); tipos que o orjson não conhece, e datas/horas, passam pelo
+JSONEncoder do DRF, então o formato de datetime ('Z' no lugar de +00:00),
+Decimal, lazy strings etc. não muda. Com indentação (browsable API,
+`; indent=4`) ou COMPACT_JSON/UNICODE_JSON desligados, usa a stdlib.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+_LINE_SEPARATORS = ('\u2028'.encode(), b'\\u2028'), ('\u2029'.encode(), b'\\u2029')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Registrado em REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']"""
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            data is None or orjson is None or not self.compact or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder.default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            # Inteiros além de 64 bits, recursão profunda...: a stdlib resolve
+            return super().render(data, accepted_media_type, renderer_context)
+        for raw, escaped in _LINE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
@@ -1,20 +1,21 @@
+import logging
+
 from api.models import Company, User
-from rest_framework.authtoken.views import obtain_auth_token
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
+
+logger = logging.getLogger(__name__)
+
 
 def setup_company(company_name, admin_username, admin_email, admin_password):
-    """Cria uma empresa e seu administrador inicial"""
-    
-    # Criar empresa
+    """
+    Cria uma empresa e seu administrador inicial.
+
+    Para muitas empresas/usuários (exports de RH) use o comando em lote:
+    python manage.py onboard_users arquivo.csv
+    """
     company = Company.objects.create(
         name=company_name,
         slug=company_name.lower().replace(' ', '-'),
-        max_users=10,
-        max_boards=5
     )
-    
-    # Criar usuário admin
     admin = User.objects.create_user(
         username=admin_username,
         email=admin_email,
@@ -22,12 +23,9 @@ def setup_company(company_name, admin_username, admin_email, admin_password):
         company=company,
         role='admin'
     )
-    
-    print(f"✅ Empresa '{company_name}' criada!")
-    print(f"✅ Admin '{admin_username}' criado!")
-    # print(f"🔑 Token: {Token.objects.create(user=admin).key}")
-    
+
+    logger.info("Empresa '%s' criada com o admin '%s'", company_name, admin_username)
     return company, admin
 
 # Usar assim:
-# setup_company("Minha Empresa", "admin", "admin@minhaempresa.com", "senha123")
\ No newline at end of file
+# setup_company("Minha Empresa", "admin", "admin@minhaempresa.com", "senha123")
@@ -0,0 +1,142 @@
+"""
+Busca textual em boards e cards da empresa.
+
+Cada board e cada card tem uma SearchEntry, mantida incrementalmente pelos
+signals (e explicitamente pelas escritas em lote). A consulta usa o índice
+nativo do banco, criado na migração 0010:
+
+- PostgreSQL: GIN sobre to_tsvector('portuguese', ...), rank por ts_rank;
+- SQLite: tabela FTS5 (external content, sincronizada por triggers), rank bm25;
+- outros bancos: icontains, sem rank.
+"""
+import re
+
+from django.db import connection
+from django.db.models import TextField, Value
+from django.db.models.functions import Coalesce
+
+from .models import Board, Card, SearchEntry
+
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+
+# Mesma expressão do índice GIN: precisa ser idêntica para o planner usá-lo
+PG_DOCUMENT = "to_tsvector('portuguese', e.title || ' ' || e.body)"
+
+PG_SEARCH = f"""
+    SELECT e.id, e.kind, e.board_id, e.card_id, e.title, ts_rank({PG_DOCUMENT}, q) AS rank
+    FROM api_searchentry e, websearch_to_tsquery('portuguese', %s) q
+    WHERE e.company_id = %s AND {PG_DOCUMENT} @@ q
+    ORDER BY rank DESC
+    LIMIT %s
+"""
+
+SQLITE_SEARCH = """
+    SELECT e.id, e.kind, e.board_id, e.card_id, e.title, -bm25(api_searchentry_fts) AS rank
+    FROM api_searchentry_fts
+    JOIN api_searchentry e ON e.id = api_searchentry_fts.rowid
+    WHERE api_searchentry_fts MATCH %s AND e.company_id = %s
+    ORDER BY bm25(api_searchentry_fts)
+    LIMIT %s
+"""
+
+_WORD = re.compile(r'\w+')
+
+
+def _fts5_query(text):
+    """Termos do usuário como prefixos entre aspas (sem sintaxe FTS5 solta)"""
+    return ' '.join(f'"{word}"*' for word in _WORD.findall(text))
+
+
+def index_boards(board_ids):
+    """Reescreve as entradas dos boards informados (3 queries para qualquer lote)"""
+    board_ids = list(board_ids)
+    SearchEntry.objects.filter(board_id__in=board_ids, kind='board').delete()
+    rows = (
+        Board.objects.filter(pk__in=board_ids)
+        .annotate(body=Coalesce('description', Value(''), output_field=TextField()))
+        .values_list('pk', 'company_id', 'title', 'body')
+    )
+    SearchEntry.objects.bulk_create(
+        [
+            SearchEntry(kind='board', board_id=pk, company_id=company_id, title=title, body=body)
+            for pk, company_id, title, body in rows
+        ],
+        batch_size=500,
+    )
+
+
+def index_cards(card_ids):
+    """
+    Reescreve as entradas dos cards informados (3 queries para qualquer lote);
+    cards arquivados, ou de boards arquivados, só saem do índice
+    """
+    card_ids = list(card_ids)
+    SearchEntry.objects.filter(card_id__in=card_ids).delete()
+    rows = (
+        Card.objects.filter(pk__in=card_ids, list__board__archived_at__isnull=True)
+        .annotate(body=Coalesce('description', Value(''), output_field=TextField()))
+        .values_list('pk', 'list__board_id', 'list__board__company_id', 'title', 'body')
+    )
+    SearchEntry.objects.bulk_create(
+        [
+            SearchEntry(
+                kind='card', card_id=pk, board_id=board_id,
+                company_id=company_id, title=title, body=body,
+            )
+            for pk, board_id, company_id, title, body in rows
+        ],
+        batch_size=500,
+    )
+
+
+def rebuild_index(company_id=None, chunk_size=2000):
+    """Recria o índice inteiro (ou de uma empresa), em blocos"""
+    boards = Board.objects.all()
+    cards = Card.objects.filter(list__board__archived_at__isnull=True)
+    if company_id is not None:
+        boards = boards.filter(company_id=company_id)
+        cards = cards.filter(list__board__company_id=company_id)
+
+    board_ids = list(boards.values_list('pk', flat=True))
+    for start in range(0, len(board_ids), chunk_size):
+        index_boards(board_ids[start:start + chunk_size])
+
+    card_ids = list(cards.values_list('pk', flat=True))
+    for start in range(0, len(card_ids), chunk_size):
+        index_cards(card_ids[start:start + chunk_size])
+    return len(board_ids), len(card_ids)
+
+
+def search(company_id, text, limit=SEARCH_LIMIT):
+    """Resultados ranqueados de boards e cards da empresa"""
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+    vendor = connection.vendor
+
+    if vendor == 'postgresql':
+        sql, params = PG_SEARCH, [text, company_id, limit]
+    elif vendor == 'sqlite':
+        query = _fts5_query(text)
+        if not query:
+            return []
+        sql, params = SQLITE_SEARCH, [query, company_id, limit]
+    else:
+        rows = (
+            SearchEntry.objects.filter(company_id=company_id, title__icontains=text)
+            .values_list('id', 'kind', 'board_id', 'card_id', 'title')[:limit]
+        )
+        return [_result(*row, rank=None) for row in rows]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [_result(*row[:5], rank=row[5]) for row in cursor.fetchall()]
+
+
+def _result(entry_id, kind, board_id, card_id, title, rank):
+    return {
+        'type': kind,
+        'id': card_id if kind == 'card' else board_id,
+        'board_id': board_id,
+        'title': title,
+        'rank': rank,
+    }
@@ -0,0 +1,121 @@
+"""
+Geração de dados sintéticos (empresas × usuários × boards × listas × cards ×
+membros) para desenvolvimento e benchmark.
+
+Tudo via bulk_create, uma transação por empresa; signals não disparam, então
+contadores, CompanyStats e índice de busca são recalculados no fim.
+"""
+import random
+import secrets
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from .counters import rebuild_board_counters, rebuild_company_stats
+from .models import Board, BoardTemplate, Card, Company, List, User
+from .ranking import spaced_ranks
+from .search import rebuild_index
+
+BATCH_SIZE = 1000
+
+LIST_TITLES = ["A Fazer", "Em Andamento", "Revisão", "Bloqueado", "Validação", "Homologação"]
+DONE_TITLE = "Concluído"
+WORDS = (
+    "ajustar revisar publicar corrigir migrar integrar documentar testar medir "
+    "cliente relatório contrato pagamento cadastro login painel fatura estoque "
+    "pedido entrega campanha servidor backup deploy permissão notificação"
+).split()
+
+
+def _sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _list_titles(count):
+    """Última lista é sempre a de concluídos"""
+    if count <= 1:
+        return [DONE_TITLE][:count]
+    titles = [LIST_TITLES[i % len(LIST_TITLES)] for i in range(count - 1)]
+    return titles + [DONE_TITLE]
+
+
+def seed_company(rng, users=10, boards=5, lists=4, cards=25, members=2, password_hash=None):
+    """Uma empresa completa; `lists` por board e `cards` por lista"""
+    slug = f"seed-{secrets.token_hex(4)}"
+    with transaction.atomic():
+        company = Company.objects.create(
+            name=f"Seed {slug[5:]}", slug=slug,
+            max_users=max(users, 1) * 2, max_boards=max(boards, 1) * 2,
+        )
+        people = User.objects.bulk_create(
+            [
+                User(
+                    username=f"{slug}-{i}", email=f"user{i}@{slug}.example",
+                    password=password_hash, company=company,
+                    role='admin' if i == 0 else rng.choice(['manager', 'member', 'member']),
+                )
+                for i in range(max(users, 1))
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        # O primeiro board é do admin (benchmark usa o admin como cliente)
+        board_objs = Board.objects.bulk_create(
+            [
+                Board(
+                    title=_sentence(rng, 3), description=_sentence(rng, 12),
+                    company=company, owner=people[0] if i == 0 else rng.choice(people),
+                    priority=rng.choice(Board.PRIORITY_CHOICES)[0],
+                )
+                for i in range(boards)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        titles = _list_titles(lists)
+        BoardTemplate.objects.create(
+            company=company, name="Padrão",
+            lists=[{'title': title, 'is_done': title == DONE_TITLE} for title in titles],
+        )
+        list_objs = List.objects.bulk_create(
+            [
+                List(title=title, board=board, position=rank, is_done=title == DONE_TITLE)
+                for board in board_objs
+                for title, rank in zip(titles, spaced_ranks(lists))
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        # Cards em blocos de listas, para não montar tudo em memória
+        card_ranks = spaced_ranks(cards)
+        step = max(1, BATCH_SIZE // max(cards, 1))
+        for start in range(0, len(list_objs), step):
+            chunk = Card.objects.bulk_create(
+                [
+                    Card(title=_sentence(rng, 4), description=_sentence(rng, 20), list=list_obj, position=rank)
+                    for list_obj in list_objs[start:start + step]
+                    for rank in card_ranks
+                ],
+                batch_size=BATCH_SIZE,
+            )
+            Card.members.through.objects.bulk_create(
+                [
+                    Card.members.through(card_id=card.pk, user_id=user.pk)
+                    for card in chunk
+                    for user in rng.sample(people, min(members, len(people)))
+                ],
+                batch_size=BATCH_SIZE,
+            )
+
+        rebuild_board_counters(Board.objects.filter(company=company))
+        rebuild_company_stats(Company.objects.filter(pk=company.pk))
+        rebuild_index(company.pk)
+    return company
+
+
+def seed_companies(companies=1, password="senha123", seed=None, **sizes):
+    """Cria `companies` empresas com os tamanhos de `seed_company`"""
+    rng = random.Random(seed)
+    # Um hash para todos: hashear por usuário dominaria o tempo da geração
+    password_hash = make_password(password)
+    return [seed_company(rng, password_hash=password_hash, **sizes) for _ in range(companies)]
@@ -1,11 +1,18 @@
 from rest_framework import serializers
-from .models import Board, Card, List, Company
+from .models import Activity, Board, BoardTemplate, Card, List, Company
+from .fieldsets import SparseFieldsMixin
+from .profiling import ProfiledSerializerMixin
 from api.models import User
 
 
-class CompanySerializer(serializers.ModelSerializer):
-    users_count = serializers.SerializerMethodField()
-    boards_count = serializers.SerializerMethodField()
+class CompanySerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    # Totais de CompanyStats (mantidos por signals), sem COUNT
+    users_count = serializers.IntegerField(source='stats.active_users', read_only=True)
+    boards_count = serializers.IntegerField(source='stats.boards', read_only=True)
+    lists_count = serializers.IntegerField(source='stats.lists', read_only=True)
+    cards_count = serializers.IntegerField(source='stats.cards', read_only=True)
+    open_cards_count = serializers.IntegerField(source='stats.open_cards', read_only=True)
+    done_cards_count = serializers.IntegerField(source='stats.done_cards', read_only=True)
     
     class Meta:
         model = Company
@@ -13,17 +20,12 @@ class CompanySerializer(serializers.ModelSerializer):
             'id', 'name', 'slug', 
             'max_users', 'max_boards',
             'users_count', 'boards_count',
+            'lists_count', 'cards_count', 'open_cards_count', 'done_cards_count',
             'created_at'
         ]
-        
-    def get_users_count(self, obj):
-        return obj.user.filter(is_active=True).count()
-    
-    def get_boards_count(self, obj):
-        return obj.boards.count()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     company_name = serializers.CharField(source="company.name", read_only=True)
     
     class Meta:
@@ -45,7 +47,7 @@ class UserSerializer(serializers.ModelSerializer):
                 
             return user
 
-class CardSerializer(serializers.ModelSerializer):
+class CardSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     members = serializers.SlugRelatedField(
         many=True,
         read_only=True,
@@ -55,22 +57,39 @@ class CardSerializer(serializers.ModelSerializer):
     class Meta:
         model = Card
         fields = ["id", "title", "description", "position", "members", "created_at", "update_at"]
+        # Posição é definida por create/move (api/ranking.py)
+        read_only_fields = ["position"]
+
+
+class AssignedCardSerializer(CardSerializer):
+    """Card com o contexto de board e lista (GET /api/me/cards/)"""
+    board_id = serializers.IntegerField(source='list.board_id', read_only=True)
+    board_title = serializers.CharField(source='list.board.title', read_only=True)
+    list_title = serializers.CharField(source='list.title', read_only=True)
+    list_is_done = serializers.BooleanField(source='list.is_done', read_only=True)
+    
+    class Meta(CardSerializer.Meta):
+        fields = CardSerializer.Meta.fields + ["list", "list_title", "list_is_done", "board_id", "board_title"]
 
 
-class ListSerializer(serializers.ModelSerializer):
+class ListSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     cards = CardSerializer(many=True, read_only=True)
     
     class Meta:
         model = List
-        fields = ["id", "title", "position", "board", "cards", "created_at"]
+        fields = ["id", "title", "position", "is_done", "board", "cards", "created_at"]
         read_only_fields = ["board", "position", "created_at"] 
 
 
-class BoardSerializer(serializers.ModelSerializer):
+class BoardSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     lists = ListSerializer(many=True, read_only=True)
     owner = serializers.PrimaryKeyRelatedField(read_only=True)
     priority_display = serializers.CharField(source='get_priority_display', read_only=True)
     company_name = serializers.CharField(source='company.name', read_only=True)
+    # Só na criação: listas do template no lugar das padrão
+    template = serializers.PrimaryKeyRelatedField(
+        queryset=BoardTemplate.objects.all(), write_only=True, required=False
+    )
     
     class Meta:
         model = Board
@@ -86,18 +105,26 @@ class BoardSerializer(serializers.ModelSerializer):
             "start_date",
             "end_date",
             "lists", 
+            "template",
             "created_at", 
             "update_at"
         ]
         read_only_fields = ["created_at", "update_at", "company"]
+    
+    def validate_template(self, template):
+        if template.company_id != self.context['request'].user.company_id:
+            raise serializers.ValidationError("Template não encontrado")
+        return template
+    
+    def update(self, instance, validated_data):
+        validated_data.pop('template', None)
+        return super().update(instance, validated_data)
 
 
 # Serializer simplificado para listar projetos (sem as listas aninhadas)
-class BoardListSerializer(serializers.ModelSerializer):
+class BoardListSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     owner = serializers.PrimaryKeyRelatedField(read_only=True)
     priority_display = serializers.CharField(source='get_priority_display', read_only=True)
-    cards_count = serializers.SerializerMethodField()
-    lists_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Board
@@ -115,12 +142,119 @@ class BoardListSerializer(serializers.ModelSerializer):
             "created_at", 
             "update_at"
         ]
-        read_only_fields = ["created_at", "update_at"]
+        # cards_count/lists_count são colunas desnormalizadas (api/counters.py)
+        read_only_fields = ["created_at", "update_at", "cards_count", "lists_count"]
+
+class TemplateListSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255)
+    is_done = serializers.BooleanField(default=False)
+
+
+class BoardTemplateSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    lists = TemplateListSerializer(many=True, required=False, max_length=100)
+    # Alternativa a `lists`: copia a estrutura de um board da empresa
+    board = serializers.PrimaryKeyRelatedField(queryset=Board.objects.all(), write_only=True, required=False)
+    
+    class Meta:
+        model = BoardTemplate
+        fields = ["id", "name", "description", "lists", "board", "created_at"]
+        read_only_fields = ["created_at"]
+    
+    def validate_name(self, name):
+        templates = BoardTemplate.objects.filter(company_id=self.context['request'].user.company_id, name=name)
+        if self.instance is not None:
+            templates = templates.exclude(pk=self.instance.pk)
+        if templates.exists():
+            raise serializers.ValidationError("Já existe um template com este nome")
+        return name
+    
+    def validate_board(self, board):
+        if board.company_id != self.context['request'].user.company_id:
+            raise serializers.ValidationError("Board não encontrado")
+        return board
+    
+    def validate(self, attrs):
+        if self.instance is None and not attrs.get('lists') and not attrs.get('board'):
+            raise serializers.ValidationError({'lists': "Informe as listas ou um board de origem"})
+        return attrs
+
+
+class BoardCloneSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255, required=False)
+    include_cards = serializers.BooleanField(default=True)
+    include_members = serializers.BooleanField(default=True)
+
+
+class CardOperationSerializer(serializers.Serializer):
+    """Uma operação do lote de cards (ver api/batch.py)"""
+    REQUIRED_FIELDS = {
+        'create': ('list_id', 'title'),
+        'update': ('id',),
+        'move': ('id',),
+        'delete': ('id',),
+    }
     
-    def get_cards_count(self, obj):
-        """Conta total de cards em todas as listas do board"""
-        return Card.objects.filter(list__board=obj).count()
+    op = serializers.ChoiceField(choices=list(REQUIRED_FIELDS))
+    id = serializers.IntegerField(required=False)
+    list_id = serializers.IntegerField(required=False)
+    title = serializers.CharField(max_length=255, required=False)
+    description = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    position = serializers.IntegerField(required=False, min_value=0)
+    members = serializers.ListField(child=serializers.IntegerField(), required=False)
     
-    def get_lists_count(self, obj):
-        """Conta total de listas no board"""
-        return obj.lists.count()
\ No newline at end of file
+    def validate(self, attrs):
+        missing = [f for f in self.REQUIRED_FIELDS[attrs['op']] if f not in attrs]
+        if missing:
+            raise serializers.ValidationError({f: "Campo obrigatório para esta operação" for f in missing})
+        return attrs
+
+
+class CardBatchSerializer(serializers.Serializer):
+    operations = CardOperationSerializer(many=True, allow_empty=False, max_length=1000)
+
+
+class CardSelectionSerializer(serializers.Serializer):
+    cards = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=500)
+
+
+class CardMembersBatchSerializer(CardSelectionSerializer):
+    """Membros em lote (api/memberships.py): `add`/`remove` em todos os `cards`"""
+    add = serializers.ListField(child=serializers.IntegerField(), required=False, default=list, max_length=100)
+    remove = serializers.ListField(child=serializers.IntegerField(), required=False, default=list, max_length=100)
+    
+    def validate(self, attrs):
+        if not attrs['add'] and not attrs['remove']:
+            raise serializers.ValidationError("Informe usuários em add e/ou remove")
+        if set(attrs['add']) & set(attrs['remove']):
+            raise serializers.ValidationError("Um usuário não pode estar em add e remove")
+        return attrs
+
+
+class ActivitySerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Activity
+        fields = ["id", "verb", "actor", "actor_name", "board", "target_id", "data", "created_at"]
+        read_only_fields = fields
+
+
+# Itens arquivados (api/archive.py)
+class ArchivedBoardSerializer(BoardListSerializer):
+    class Meta(BoardListSerializer.Meta):
+        fields = BoardListSerializer.Meta.fields + ["archived_at"]
+
+
+class ArchivedCardSerializer(CardSerializer):
+    class Meta(CardSerializer.Meta):
+        fields = CardSerializer.Meta.fields + ["list", "archived_at"]
+
+
+# Serializers planos do sync incremental (api/sync.py)
+class SyncListSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = List
+        fields = ["id", "title", "position", "created_at", "update_at"]
+
+
+class SyncCardSerializer(CardSerializer):
+    class Meta(CardSerializer.Meta):
+        fields = CardSerializer.Meta.fields + ["list"]
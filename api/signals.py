@@ -0,0 +1,231 @@
+from functools import wraps
+
+from django.db.models import F, QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_tokens
+from .counters import adjust_board_counters, adjust_company_stats, board_updates_deferred, bump_board_version
+from .models import Board, Card, Company, CompanyStats, List, User
+from .ranking import positions_rebalanced
+from .search import index_boards, index_cards
+from .sync import record_deletions
+
+
+def _origin_model(origin):
+    """Model que iniciou o delete (instância ou QuerySet)"""
+    if isinstance(origin, QuerySet):
+        return origin.model
+    return type(origin)
+
+
+def _unless_deferred(handler):
+    """Ignora o signal dentro de deferred_board_updates() (escritas em lote)"""
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        if board_updates_deferred():
+            return
+        return handler(*args, **kwargs)
+    return wrapper
+
+
+@receiver(post_save, sender=Company)
+def company_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        CompanyStats.objects.get_or_create(company=instance)
+        return
+    # company_name faz parte do snapshot do board
+    Board.objects.filter(company=instance).update(version=F('version') + 1)
+    # A empresa também vai junto do usuário no cache de autenticação
+    invalidate_tokens(Token.objects.filter(user__company=instance).values_list('key', flat=True))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # Desativação, troca de role/empresa etc. não podem ficar no cache
+    if not created:
+        invalidate_tokens(Token.objects.filter(user=instance).values_list('key', flat=True))
+
+    current = (instance.company_id, instance.is_active)
+    previous = (None, False) if created else getattr(instance, '_loaded_membership', current)
+    if previous != current:
+        if previous[0] and previous[1]:
+            adjust_company_stats(company_id=previous[0], active_users=-1)
+        if current[0] and current[1]:
+            adjust_company_stats(company_id=current[0], active_users=1)
+    instance._loaded_membership = current
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, origin=None, **kwargs):
+    # Cascata de Company: as estatísticas vão junto
+    if _origin_model(origin) is Company:
+        return
+    if instance.company_id and instance.is_active:
+        adjust_company_stats(company_id=instance.company_id, active_users=-1)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=Board)
+@_unless_deferred
+def board_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        adjust_company_stats(company_id=instance.company_id, boards=1)
+    else:
+        bump_board_version(board_id=instance.pk)
+    index_boards([instance.pk])
+
+
+@receiver(pre_delete, sender=Board)
+@_unless_deferred
+def board_deleting(sender, instance, origin=None, **kwargs):
+    # Board arquivado já saiu das estatísticas (api/archive.py)
+    if _origin_model(origin) is Company or instance.archived_at:
+        return
+    # Listas e cards do board saem das estatísticas de uma vez
+    counts = Board.objects.filter(pk=instance.pk).values('lists_count', 'cards_count').first() or {}
+    adjust_company_stats(
+        company_id=instance.company_id,
+        boards=-1,
+        lists=-counts.get('lists_count', 0),
+        cards=-counts.get('cards_count', 0),
+        done_cards=-Card.objects.filter(list__board=instance, list__is_done=True).count(),
+    )
+
+
+@receiver(post_save, sender=List)
+@_unless_deferred
+def list_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        adjust_board_counters(board_id=instance.board_id, lists=1)
+        adjust_company_stats(board_id=instance.board_id, lists=1)
+    else:
+        bump_board_version(board_id=instance.board_id)
+        previous = getattr(instance, '_loaded_is_done', instance.is_done)
+        if previous != instance.is_done:
+            cards = instance.cards.count()
+            adjust_company_stats(board_id=instance.board_id, done_cards=cards if instance.is_done else -cards)
+    instance._loaded_is_done = instance.is_done
+
+
+@receiver(pre_delete, sender=List)
+@_unless_deferred
+def list_deleting(sender, instance, origin=None, **kwargs):
+    # Cascata de Board/Company/User: o próprio board está sendo apagado
+    if _origin_model(origin) is not List:
+        return
+    # Os cards apagados em cascata são descontados aqui, de uma vez só
+    card_ids = list(instance.cards.values_list('pk', flat=True))
+    adjust_board_counters(
+        board_id=instance.board_id, lists=-1, cards=-len(card_ids)
+    )
+    adjust_company_stats(
+        board_id=instance.board_id,
+        lists=-1,
+        cards=-len(card_ids),
+        done_cards=-len(card_ids) if instance.is_done else 0,
+    )
+    record_deletions(instance.board_id, lists=[instance.pk], cards=card_ids)
+
+
+@receiver(post_save, sender=Card)
+@_unless_deferred
+def card_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_list_id = getattr(instance, '_loaded_list_id', None)
+
+    text = (instance.title, instance.description)
+    reindex = created or text != getattr(instance, '_loaded_text', None)
+
+    if created:
+        adjust_board_counters(list_id=instance.list_id, cards=1)
+        adjust_company_stats(list_id=instance.list_id, cards=1, done_cards=int(instance.list.is_done))
+    elif previous_list_id is not None and previous_list_id != instance.list_id:
+        lists = {
+            pk: (board_id, is_done)
+            for pk, board_id, is_done in List.objects.filter(pk__in=[previous_list_id, instance.list_id])
+            .values_list('pk', 'board_id', 'is_done')
+        }
+        (old_board, was_done), (new_board, is_done) = lists[previous_list_id], lists[instance.list_id]
+        if old_board == new_board:
+            bump_board_version(board_id=new_board)
+            adjust_company_stats(board_id=new_board, done_cards=int(is_done) - int(was_done))
+        else:
+            # Mudou de board: para o board antigo é uma exclusão
+            adjust_board_counters(board_id=old_board, cards=-1)
+            adjust_board_counters(board_id=new_board, cards=1)
+            adjust_company_stats(board_id=old_board, cards=-1, done_cards=-int(was_done))
+            adjust_company_stats(board_id=new_board, cards=1, done_cards=int(is_done))
+            record_deletions(old_board, cards=[instance.pk])
+            reindex = True
+    else:
+        bump_board_version(list_id=instance.list_id)
+
+    if reindex:
+        index_cards([instance.pk])
+    instance._loaded_list_id = instance.list_id
+    instance._loaded_text = text
+
+
+@receiver(post_delete, sender=Card)
+@_unless_deferred
+def card_deleted(sender, instance, origin=None, **kwargs):
+    # Cascata de List já foi contabilizada em list_deleting; arquivado já saiu
+    if _origin_model(origin) is not Card or instance.archived_at:
+        return
+    board_id, is_done = List.objects.filter(pk=instance.list_id).values_list('board_id', 'is_done').first()
+    adjust_board_counters(board_id=board_id, cards=-1)
+    adjust_company_stats(board_id=board_id, cards=-1, done_cards=-int(is_done))
+    record_deletions(board_id, cards=[instance.pk])
+
+
+@receiver(m2m_changed, sender=Card.members.through)
+@_unless_deferred
+def card_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # user.assigned_cards.add/remove/clear: pk_set são ids de cards
+        if action == 'pre_clear':
+            instance._cleared_card_ids = list(instance.assigned_cards.values_list('pk', flat=True))
+            return
+        if action == 'post_clear':
+            card_ids = getattr(instance, '_cleared_card_ids', [])
+        elif action in ('post_add', 'post_remove') and pk_set:
+            card_ids = list(pk_set)
+        else:
+            return
+        bump_board_version(card_ids=card_ids)
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        card_ids = [instance.pk]
+        bump_board_version(list_id=instance.list_id)
+    else:
+        return
+    # Membros fazem parte do card no sync incremental
+    Card.objects.filter(pk__in=card_ids).update(update_at=timezone.now())
+
+
+@receiver(positions_rebalanced)
+@_unless_deferred
+def positions_rebalanced_handler(sender, pks, **kwargs):
+    # Só as chaves mudam, mas elas fazem parte do snapshot
+    if not pks:
+        return
+    if sender is Card:
+        bump_board_version(card_ids=pks[:1])
+    elif sender is List:
+        board_id = List.objects.filter(pk=pks[0]).values_list('board_id', flat=True).first()
+        bump_board_version(board_id=board_id)
@@ -0,0 +1,48 @@
+"""
+Snapshot serializado do board, em cache por versão.
+
+A chave inclui `Board.version`, então qualquer mudança gera uma chave nova e as
+antigas simplesmente saem do cache pelo LRU do backend (CACHES['boards']).
+`variant` separa as representações parciais (?fields=/?include=, ver
+api/fieldsets.py) da completa, na chave e no ETag.
+"""
+from django.core.cache import caches
+from django.utils.http import parse_etags
+
+SNAPSHOT_CACHE = 'boards'
+
+
+def board_etag(board_id, version, variant=''):
+    suffix = f'-{variant}' if variant else ''
+    return f'"board-{board_id}-v{version}{suffix}"'
+
+
+def etag_matches(etag, if_none_match):
+    """If-None-Match com comparação fraca: comprimido, o ETag sai como W/ (api/compression.py)"""
+    return etag in {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+
+
+def _key(board_id, version, variant):
+    return f'board-snapshot:{board_id}:{version}:{variant}' if variant else f'board-snapshot:{board_id}:{version}'
+
+
+def board_snapshot(board_id, version, build, variant=''):
+    """Retorna o snapshot da versão pedida; `build()` só roda em cache miss"""
+    cache = caches[SNAPSHOT_CACHE]
+    key = _key(board_id, version, variant)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data)
+    return data
+
+
+async def aboard_snapshot(board_id, version, build, variant=''):
+    """board_snapshot para views assíncronas; `build` é uma coroutine function"""
+    cache = caches[SNAPSHOT_CACHE]
+    key = _key(board_id, version, variant)
+    data = await cache.aget(key)
+    if data is None:
+        data = await build()
+        await cache.aset(key, data)
+    return data
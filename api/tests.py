@@ -1,3 +1,1682 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import os
+import tempfile
+import threading
+import zlib
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .activity import activity_buffer
+from .authentication import AUTH_CACHE
+from .compression import negotiate
+from .counters import adjust_board_counters, adjust_company_stats
+from .events import InProcessBroker, get_broker
+from .fastpath import board_tree
+from .fieldsets import Fieldset
+from . import cloning, imports
+from .models import Activity, Board, BoardTemplate, Card, Company, CompanyStats, List, SearchEntry, User
+from .profiling import metrics
+from .ranking import rank_between, rebalance, spaced_ranks
+from .renderers import BACKEND, FastJSONRenderer
+from .serializers import BoardSerializer
+from .snapshots import SNAPSHOT_CACHE
+from .sync import encode_cursor
+from .throttling import MemoryBuckets, reset_throttle
+
+
+class ApiTestCase(TestCase):
+    """Base com empresa, usuário admin e cliente autenticado por token"""
+
+    def setUp(self):
+        caches[SNAPSHOT_CACHE].clear()
+        caches[AUTH_CACHE].clear()
+        reset_throttle()
+        self.company = Company.objects.create(
+            name="Acme", slug="acme", created_at=timezone.now()
+        )
+        self.user = User.objects.create_user(
+            username="admin", password="senha123", company=self.company, role="admin"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def warm_auth_cache(self):
+        """Primeira requisição popula o cache de autenticação"""
+        self.client.get(reverse('user-list'))
+
+    def create_board(self, lists=3, cards_per_list=0, title="Board"):
+        board = Board.objects.create(title=title, company=self.company, owner=self.user)
+        for i, list_rank in enumerate(spaced_ranks(lists)):
+            list_obj = List.objects.create(title=f"Lista {i}", board=board, position=list_rank)
+            cards = Card.objects.bulk_create(
+                Card(title=f"Card {j}", list=list_obj, position=card_rank)
+                for j, card_rank in enumerate(spaced_ranks(cards_per_list))
+            )
+            Card.members.through.objects.bulk_create(
+                Card.members.through(card_id=card.id, user_id=self.user.id)
+                for card in cards
+            )
+            adjust_board_counters(board_id=board.pk, cards=len(cards))
+            adjust_company_stats(company_id=self.company.pk, cards=len(cards))
+        return board
+
+
+class BoardDetailQueryTests(ApiTestCase):
+
+    def count_detail_queries(self, board):
+        url = reverse('board-detail', kwargs={'pk': board.pk})
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.data
+
+    def test_query_count_independent_of_board_size(self):
+        small = self.create_board(lists=1, cards_per_list=10)
+        large = self.create_board(lists=5, cards_per_list=1000)
+        self.warm_auth_cache()
+
+        small_queries, _ = self.count_detail_queries(small)
+        large_queries, data = self.count_detail_queries(large)
+
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(sum(len(l['cards']) for l in data['lists']), 5000)
+
+    def test_detail_payload(self):
+        board = self.create_board(lists=2, cards_per_list=2)
+        _, data = self.count_detail_queries(board)
+
+        self.assertEqual(data['company_name'], "Acme")
+        self.assertEqual([l['title'] for l in data['lists']], ["Lista 0", "Lista 1"])
+        self.assertEqual(data['lists'][0]['cards'][0]['members'], ["admin"])
+
+
+class BoardCounterTests(ApiTestCase):
+
+    def assertCounters(self, board, lists, cards):
+        board.refresh_from_db()
+        self.assertEqual((board.lists_count, board.cards_count), (lists, cards))
+
+    def test_create_move_and_delete(self):
+        board = self.create_board(lists=2)
+        other = self.create_board(lists=1)
+        todo, doing = board.lists.all()
+        card = Card.objects.create(title="Card", list=todo)
+        Card.objects.create(title="Outro", list=doing)
+        self.assertCounters(board, 2, 2)
+
+        card = Card.objects.get(pk=card.pk)
+        card.list = other.lists.get()
+        card.save()
+        self.assertCounters(board, 2, 1)
+        self.assertCounters(other, 1, 1)
+
+        card.delete()
+        self.assertCounters(other, 1, 0)
+
+        doing.delete()
+        self.assertCounters(board, 1, 0)
+
+    def test_board_save_keeps_counters(self):
+        board = self.create_board(lists=1)
+        stale = Board.objects.get(pk=board.pk)
+        Card.objects.create(title="Card", list=board.lists.get())
+        stale.title = "Novo"
+        stale.save()
+        self.assertCounters(board, 1, 1)
+
+    def test_rebuild_command(self):
+        board = self.create_board(lists=2, cards_per_list=3)
+        Board.objects.update(lists_count=0, cards_count=42)
+
+        call_command('rebuild_board_counters', stdout=StringIO())
+        self.assertCounters(board, 2, 6)
+
+    def test_listing_is_single_query(self):
+        for i in range(5):
+            self.create_board(lists=3, title=f"Board {i}")
+        url = reverse('board-list')
+        self.warm_auth_cache()
+
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        for i in range(20):
+            self.create_board(lists=3, title=f"Board extra {i}")
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(response.data['results'][0]['lists_count'], 3)
+
+
+class CompanyStatsTests(ApiTestCase):
+
+    def assertStats(self, **expected):
+        stats = CompanyStats.objects.get(company=self.company)
+        self.assertEqual({field: getattr(stats, field) for field in expected}, expected)
+
+    def test_maintained_on_create_move_and_delete(self):
+        board = self.create_board(lists=2, cards_per_list=2)
+        todo, done = board.lists.all()
+        done.is_done = True
+        done.save()
+        self.assertStats(active_users=1, boards=1, lists=2, cards=4, done_cards=2)
+
+        card = Card.objects.filter(list=todo).first()
+        card.list = done
+        card.save()
+        self.assertStats(cards=4, done_cards=3)
+
+        Card.objects.filter(list=done).first().delete()
+        self.assertStats(cards=3, done_cards=2)
+
+        done.delete()
+        self.assertStats(lists=1, cards=1, done_cards=0)
+
+        User.objects.create_user(username="outro", company=self.company)
+        self.user.is_active = False
+        self.user.save()
+        self.assertStats(active_users=1)
+
+        board.delete()
+        self.assertStats(boards=0, lists=0, cards=0, done_cards=0)
+
+    def test_company_detail_without_counts(self):
+        self.create_board(lists=3, cards_per_list=2)
+        self.warm_auth_cache()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('company-list'))
+
+        self.assertEqual(len(queries), 1)
+        company = response.data[0]
+        self.assertEqual(
+            (company['boards_count'], company['lists_count'], company['cards_count']), (1, 3, 6)
+        )
+
+    def test_board_quota(self):
+        self.company.max_boards = 1
+        self.company.save()
+        url = reverse('board-list')
+        self.assertEqual(self.client.post(url, {'title': "Um"}).status_code, 201)
+        self.assertEqual(self.client.post(url, {'title': "Dois"}).status_code, 400)
+        self.assertTrue(Board.objects.get().lists.get(title="Concluído").is_done)
+        self.assertStats(boards=1, lists=3)
+
+    def test_rebuild_command(self):
+        self.create_board(lists=2, cards_per_list=3)
+        CompanyStats.objects.update(boards=9, cards=0, done_cards=5)
+
+        call_command('rebuild_company_stats', stdout=StringIO())
+        self.assertStats(active_users=1, boards=1, lists=2, cards=6, done_cards=0)
+
+
+class RankingTests(TestCase):
+
+    def test_rank_between_orders_strictly(self):
+        keys = spaced_ranks(3)
+        self.assertEqual(keys, sorted(keys))
+        low, high = keys[0], keys[1]
+        for _ in range(50):
+            mid = rank_between(low, high)
+            self.assertTrue(low < mid < high)
+            high = mid
+        self.assertLess(rank_between(None, keys[0]), keys[0])
+        self.assertGreater(rank_between(keys[-1], None), keys[-1])
+
+    def test_rank_between_rejects_ties(self):
+        with self.assertRaises(ValueError):
+            rank_between("i", "i")
+        with self.assertRaises(ValueError):
+            rank_between("i", "i00")
+
+    def test_appends_keep_fixed_width(self):
+        key = rank_between()
+        for _ in range(1000):
+            key = rank_between(key, None)
+        self.assertEqual(len(key), 6)
+
+
+class CardMoveTests(ApiTestCase):
+
+    def move(self, board, list_obj, card, **data):
+        url = reverse('list-card-move', kwargs={
+            'board_pk': board.pk, 'list_pk': list_obj.pk, 'pk': card.pk
+        })
+        return self.client.patch(url, data, format='json')
+
+    def titles(self, list_obj):
+        return list(list_obj.cards.values_list('title', flat=True))
+
+    def test_move_writes_only_the_moved_row(self):
+        board = self.create_board(lists=1, cards_per_list=50)
+        list_obj = board.lists.get()
+        card = list_obj.cards.last()
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.move(board, list_obj, card, position=1)
+
+        self.assertEqual(response.status_code, 200)
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "api_card"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.titles(list_obj)[:3], ["Card 0", "Card 49", "Card 1"])
+
+    def test_move_to_other_list_and_repeated_inserts(self):
+        board = self.create_board(lists=2, cards_per_list=3)
+        source, target = board.lists.all()
+        for card in list(source.cards.all()):
+            response = self.move(board, source, card, list_id=target.pk, position=1)
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.titles(source), [])
+        self.assertEqual(self.titles(target), ["Card 0", "Card 2", "Card 1", "Card 0", "Card 1", "Card 2"])
+
+    def test_reorder_list(self):
+        board = self.create_board(lists=3)
+        last = board.lists.last()
+        url = reverse('board-list-reorder', kwargs={'board_pk': board.pk, 'pk': last.pk})
+
+        response = self.client.patch(url, {'position': 0}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(board.lists.first(), last)
+
+
+class BoardSnapshotTests(ApiTestCase):
+
+    def get(self, board, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(reverse('board-detail', kwargs={'pk': board.pk}), **headers)
+
+    def assertChanged(self, board, etag):
+        response = self.get(board, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response['ETag']
+
+    def test_not_modified(self):
+        board = self.create_board(lists=1, cards_per_list=3)
+        etag = self.get(board)['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get(board, etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any('api_card' in q['sql'] for q in ctx.captured_queries))
+
+    def test_cached_snapshot_skips_nested_tables(self):
+        board = self.create_board(lists=1, cards_per_list=3)
+        first = self.get(board)
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.get(board)
+
+        self.assertEqual(first.data, second.data)
+        self.assertFalse(any('api_card' in q['sql'] for q in ctx.captured_queries))
+
+    def test_version_changes(self):
+        board = self.create_board(lists=2, cards_per_list=1)
+        list_obj = board.lists.first()
+        etag = self.get(board)['ETag']
+
+        card = Card.objects.create(title="Novo", list=list_obj)
+        etag = self.assertChanged(board, etag)
+
+        card.title = "Renomeado"
+        card.save()
+        etag = self.assertChanged(board, etag)
+
+        card.members.add(self.user)
+        etag = self.assertChanged(board, etag)
+
+        self.user.assigned_cards.clear()
+        etag = self.assertChanged(board, etag)
+
+        rebalance(list_obj.cards.all())
+        etag = self.assertChanged(board, etag)
+
+        board.lists.last().delete()
+        etag = self.assertChanged(board, etag)
+
+        board.title = "Outro"
+        board.save()
+        self.assertChanged(board, etag)
+
+
+class CachedTokenAuthenticationTests(ApiTestCase):
+
+    def get_users(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('user-list'))
+        return response, [q['sql'] for q in ctx.captured_queries]
+
+    def test_warm_cache_has_no_auth_queries(self):
+        self.get_users()
+        response, queries = self.get_users()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('authtoken_token', queries[0])
+
+    def test_deactivation_invalidates(self):
+        self.get_users()
+        self.user.is_active = False
+        self.user.save()
+
+        response, _ = self.get_users()
+        self.assertEqual(response.status_code, 401)
+
+    def test_token_delete_invalidates(self):
+        self.get_users()
+        self.token.delete()
+
+        response, _ = self.get_users()
+        self.assertEqual(response.status_code, 401)
+
+    def test_role_change_is_visible(self):
+        self.get_users()
+        self.user.role = "member"
+        self.user.save()
+
+        other = User.objects.create_user(username="outro", company=self.company)
+        url = reverse('user-change-role', kwargs={'pk': other.pk})
+        response = self.client.patch(url, {'role': 'admin'}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class KeysetPaginationTests(ApiTestCase):
+
+    def walk(self, url):
+        """Segue os cursores `next`, retornando ids e queries por página"""
+        ids, queries = [], []
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [item['id'] for item in response.data['results']]
+            queries.append(len(ctx))
+            url = response.data['next']
+        return ids, queries
+
+    def test_boards_pages(self):
+        boards = [self.create_board(lists=0, title=f"Board {i}") for i in range(25)]
+        self.warm_auth_cache()
+
+        ids, queries = self.walk(reverse('board-list') + '?page_size=10')
+
+        self.assertEqual(ids, [board.id for board in reversed(boards)])
+        self.assertEqual(len(set(queries)), 1)
+
+    def test_cards_pages(self):
+        board = self.create_board(lists=1, cards_per_list=23)
+        list_obj = board.lists.get()
+        url = reverse('list-card-list', kwargs={'board_pk': board.pk, 'list_pk': list_obj.pk})
+
+        ids, _ = self.walk(url + '?page_size=5')
+
+        self.assertEqual(ids, list(list_obj.cards.values_list('id', flat=True)))
+
+
+class CardBatchTests(ApiTestCase):
+
+    def batch(self, board, operations):
+        url = reverse('board-cards-batch', kwargs={'pk': board.pk})
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url, {'operations': operations}, format='json')
+        return response, len(ctx)
+
+    def test_constant_queries_per_batch(self):
+        board = self.create_board(lists=2)
+        todo = board.lists.first()
+        self.warm_auth_cache()
+
+        create = lambda n: [{'op': 'create', 'list_id': todo.pk, 'title': f"Card {i}"} for i in range(n)]
+        small, small_queries = self.batch(board, create(5))
+        large, large_queries = self.batch(board, create(100))
+
+        self.assertEqual(small.status_code, 200)
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(todo.cards.count(), 105)
+        board.refresh_from_db()
+        self.assertEqual(board.cards_count, 105)
+
+    def test_mixed_operations(self):
+        board = self.create_board(lists=2, cards_per_list=3)
+        todo, done = board.lists.all()
+        first, second, third = todo.cards.all()
+        other = User.objects.create_user(username="outro", company=self.company)
+
+        response, _ = self.batch(board, [
+            {'op': 'create', 'list_id': done.pk, 'title': "Novo", 'members': [other.pk]},
+            {'op': 'update', 'id': first.pk, 'title': "Renomeado"},
+            {'op': 'move', 'id': second.pk, 'list_id': done.pk, 'position': 0},
+            {'op': 'delete', 'id': third.pk},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['status'] for r in response.data['results']],
+                         ["created", "updated", "updated", "deleted"])
+        self.assertEqual(list(todo.cards.values_list('title', flat=True)), ["Renomeado"])
+        self.assertEqual(done.cards.first(), second)
+        self.assertEqual(done.cards.last().title, "Novo")
+        self.assertEqual(set(done.cards.last().members.all()), {self.user, other})
+        board.refresh_from_db()
+        self.assertEqual(board.cards_count, 6)
+
+    def test_tied_positions_mid_batch(self):
+        board = self.create_board(lists=2, cards_per_list=3)
+        todo, done = board.lists.all()
+        a, b, c = todo.cards.all()
+        d, e, _ = done.cards.all()
+        Card.objects.filter(pk__in=[b.pk, c.pk]).update(position=b.position)
+
+        response, _ = self.batch(board, [
+            {'op': 'update', 'id': c.pk, 'title': "Renomeado"},
+            {'op': 'create', 'list_id': todo.pk, 'title': "Novo"},
+            {'op': 'move', 'id': d.pk, 'list_id': todo.pk, 'position': 0},
+            # Entre b e c, empatados: renumera a lista no meio do lote
+            {'op': 'move', 'id': e.pk, 'list_id': todo.pk, 'position': 3},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        rows = list(todo.cards.order_by('position', 'pk').values_list('title', 'position'))
+        self.assertEqual([title for title, _ in rows], [d.title, a.title, b.title, e.title, "Renomeado", "Novo"])
+        self.assertEqual(len({position for _, position in rows}), 6)
+        positions = {r['id']: r['position'] for r in response.data['results'] if 'position' in r}
+        self.assertEqual(positions[e.pk], Card.objects.get(pk=e.pk).position)
+
+    def test_invalid_batch_writes_nothing(self):
+        board = self.create_board(lists=1, cards_per_list=1)
+        foreign = self.create_board(lists=1, cards_per_list=1)
+        outsider_company = Company.objects.create(name="Outra", slug="outra", created_at=timezone.now())
+        outsider = User.objects.create_user(username="intruso", company=outsider_company)
+
+        response, _ = self.batch(board, [
+            {'op': 'create', 'list_id': board.lists.get().pk, 'title': "Ok"},
+            {'op': 'delete', 'id': foreign.lists.get().cards.get().pk},
+            {'op': 'create', 'list_id': board.lists.get().pk, 'title': "X", 'members': [outsider.pk]},
+            {'op': 'update'},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Card.objects.count(), 2)
+
+
+class BoardEventTests(ApiTestCase):
+
+    def test_move_publishes_after_commit(self):
+        board = self.create_board(lists=2, cards_per_list=1)
+        source, target = board.lists.all()
+        card = source.cards.get()
+        url = reverse('list-card-move', kwargs={'board_pk': board.pk, 'list_pk': source.pk, 'pk': card.pk})
+        published = []
+
+        with mock.patch.object(get_broker(), 'publish', side_effect=lambda *args: published.append(args)):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.patch(url, {'list_id': target.pk}, format='json')
+
+        self.assertEqual(len(published), 1)
+        board_id, event = published[0]
+        self.assertEqual((board_id, event['type']), (board.pk, 'card.moved'))
+        self.assertEqual(event['data']['list_id'], target.pk)
+
+    async def test_stream_delivers_events(self):
+        board = await sync_to_async(self.create_board)(lists=1)
+        client = AsyncClient()
+        url = reverse('board-events', kwargs={'pk': board.pk})
+
+        response = await client.get(url, {'token': self.token.key})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+
+        get_broker().publish(board.pk, {'type': 'card.deleted', 'board': board.pk, 'data': {'id': 1}})
+        chunk = await asyncio.wait_for(anext(stream), timeout=1)
+
+        self.assertIn(b'event: card.deleted', chunk)
+
+    async def test_broker_fan_out(self):
+        broker = InProcessBroker()
+        async with broker.subscribe(1) as first, broker.subscribe(1) as second:
+            await sync_to_async(broker.publish, thread_sensitive=False)(1, {'type': 'list.reordered'})
+            events = await asyncio.wait_for(asyncio.gather(first.get(), second.get()), timeout=1)
+            self.assertEqual([e['type'] for e in events], ['list.reordered'] * 2)
+        self.assertEqual(broker.subscriber_count(1), 0)
+
+    async def test_stream_requires_board_access(self):
+        response = await AsyncClient().get(reverse('board-events', kwargs={'pk': 999}), {'token': self.token.key})
+        self.assertEqual(response.status_code, 404)
+
+
+class BoardChangesTests(ApiTestCase):
+
+    def changes(self, board, since=None):
+        params = {'since': since} if since is not None else {}
+        response = self.client.get(reverse('board-changes', kwargs={'pk': board.pk}), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_delta_since_cursor(self):
+        board = self.create_board(lists=2, cards_per_list=2)
+        todo, done = board.lists.all()
+        old = timezone.now() - timedelta(minutes=1)
+        Card.objects.update(update_at=old)
+        List.objects.update(update_at=old)
+        Board.objects.update(update_at=old)
+
+        start = self.changes(board)
+        self.assertTrue(start['reset'])
+
+        removed, kept = todo.cards.all()
+        removed.delete()
+        kept.members.clear()
+        done_id = done.pk
+        done.delete()
+        data = self.changes(board, start['cursor'])
+
+        self.assertFalse(data['reset'])
+        self.assertIsNone(data['board'])
+        self.assertEqual(data['lists'], [])
+        self.assertEqual([c['id'] for c in data['cards']], [kept.pk])
+        self.assertEqual(data['deleted']['lists'], [done_id])
+        self.assertEqual(len(data['deleted']['cards']), 3)
+
+    def test_old_cursor_requests_snapshot(self):
+        board = self.create_board(lists=1)
+        since = encode_cursor(timezone.now() - timedelta(days=30))
+        self.assertTrue(self.changes(board, since)['reset'])
+
+    def test_card_moved_to_other_board_is_a_deletion(self):
+        board = self.create_board(lists=1, cards_per_list=1)
+        other = self.create_board(lists=1)
+        cursor = self.changes(board)['cursor']
+        card = board.lists.get().cards.get()
+        card.list = other.lists.get()
+        card.save()
+
+        self.assertEqual(self.changes(board, cursor)['deleted']['cards'], [card.pk])
+        self.assertEqual(self.changes(other, cursor)['cards'][0]['id'], card.pk)
+
+
+class QueryPlanTests(ApiTestCase):
+    """
+    EXPLAIN das queries quentes sobre uma base grande: cada uma deve usar
+    índice, sem varredura completa nem ordenação em memória.
+    Roda em SQLite; em PostgreSQL confere Index Scan e ausência de Sort.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name="Plano", slug="plano", created_at=timezone.now())
+        owner = User.objects.create_user(username="plano", company=cls.company)
+        boards = Board.objects.bulk_create(
+            Board(title=f"Board {i}", company=cls.company, owner=owner) for i in range(200)
+        )
+        lists = List.objects.bulk_create(
+            List(title=f"Lista {j}", board=board, position=rank)
+            for board in boards for j, rank in enumerate(spaced_ranks(5))
+        )
+        Card.objects.bulk_create(
+            (Card(title=f"Card {k}", list=list_obj, position=rank)
+             for list_obj in lists for k, rank in enumerate(spaced_ranks(20))),
+            batch_size=500,
+        )
+        cls.owner, cls.board, cls.list = owner, boards[0], lists[0]
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        if connection.vendor == 'sqlite':
+            self.assertIn(f'INDEX {index}', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+        elif connection.vendor == 'postgresql':
+            self.assertIn(index, plan)
+            self.assertNotIn('Seq Scan', plan)
+            self.assertNotIn('Sort', plan)
+
+    def test_board_listing(self):
+        queryset = Board.objects.filter(company=self.company).order_by('-created_at', 'id')[:51]
+        self.assertUsesIndex(queryset, 'board_company_created_idx')
+
+    def test_list_listing(self):
+        queryset = List.objects.filter(
+            board__id=self.board.pk, board__owner=self.owner
+        ).order_by('position', 'id')[:51]
+        self.assertUsesIndex(queryset, 'list_board_position_idx')
+
+    def test_card_listing(self):
+        queryset = Card.objects.filter(
+            list__id=self.list.pk, list__board__owner=self.owner, list__board__archived_at__isnull=True
+        ).order_by('position', 'id')[:51]
+        self.assertUsesIndex(queryset, 'card_list_position_idx')
+
+    def test_board_detail_prefetch(self):
+        list_ids = list(self.board.lists.values_list('pk', flat=True))
+        lists = List.objects.filter(board_id__in=[self.board.pk]).order_by('board_id', 'position', 'id')
+        cards = Card.objects.filter(list_id__in=list_ids).order_by('list_id', 'position', 'id')
+        self.assertUsesIndex(lists, 'list_board_position_idx')
+        self.assertUsesIndex(cards, 'card_list_position_idx')
+
+    def test_append_position_lookup(self):
+        queryset = Card.objects.filter(list_id=self.list.pk).order_by('-position', '-pk').values_list('position')[:1]
+        self.assertUsesIndex(queryset, 'card_list_position_idx')
+
+    def test_delta_sync(self):
+        since = timezone.now() - timedelta(minutes=1)
+        queryset = Card.objects.filter(list__board=self.board, update_at__gte=since).order_by()
+        self.assertUsesIndex(queryset, 'card_list_updated_idx')
+
+    def test_archived_listings(self):
+        boards = Board.all_objects.filter(company=self.company, archived_at__isnull=False).order_by('-archived_at', 'id')
+        cards = Card.all_objects.filter(list=self.list, archived_at__isnull=False).order_by('-archived_at', 'id')
+        self.assertUsesIndex(boards[:51], 'board_company_archived_idx')
+        self.assertUsesIndex(cards[:51], 'card_list_archived_idx')
+
+
+class ArchiveTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.board = self.create_board(lists=2, cards_per_list=3)
+        self.done = self.board.lists.last()
+        self.done.is_done = True
+        self.done.save()
+        self.done_ids = list(self.done.cards.values_list('pk', flat=True))
+
+    def stats(self):
+        stats = CompanyStats.objects.get(company=self.company)
+        return stats.boards, stats.lists, stats.cards, stats.done_cards
+
+    def detail_cards(self):
+        response = self.client.get(reverse('board-detail', kwargs={'pk': self.board.pk}))
+        return [card['id'] for l in response.data['lists'] for card in l['cards']]
+
+    def test_archive_and_restore_cards(self):
+        since = encode_cursor(timezone.now())
+        url = reverse('board-cards-archive', kwargs={'pk': self.board.pk})
+        response = self.client.post(url, {'cards': self.done_ids[:2]}, format='json')
+
+        self.assertEqual(response.data, {'archived': 2})
+        self.assertEqual(len(self.detail_cards()), 4)
+        self.assertEqual(Board.objects.get(pk=self.board.pk).cards_count, 4)
+        self.assertEqual(self.stats(), (1, 2, 4, 1))
+        self.assertFalse(SearchEntry.objects.filter(card_id__in=self.done_ids[:2]).exists())
+        changes = self.client.get(reverse('board-changes', kwargs={'pk': self.board.pk}), {'since': since})
+        self.assertEqual(sorted(changes.data['deleted']['cards']), self.done_ids[:2])
+
+        archived = self.client.get(reverse('board-archived-cards', kwargs={'pk': self.board.pk}))
+        self.assertEqual(sorted(card['id'] for card in archived.data['results']), self.done_ids[:2])
+
+        url = reverse('board-cards-restore', kwargs={'pk': self.board.pk})
+        response = self.client.post(url, {'cards': self.done_ids}, format='json')
+        self.assertEqual(response.data, {'restored': 2})
+        self.assertEqual(self.detail_cards()[-3:], self.done_ids)
+        self.assertEqual(self.stats(), (1, 2, 6, 3))
+        self.assertEqual(SearchEntry.objects.filter(card_id__in=self.done_ids[:2]).count(), 2)
+
+        other = self.create_board(lists=1, cards_per_list=1)
+        foreign = Card.objects.get(list__board=other).pk
+        response = self.client.post(url, {'cards': [foreign]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_archive_and_restore_board(self):
+        response = self.client.post(reverse('board-archive', kwargs={'pk': self.board.pk}))
+        self.assertEqual(response.status_code, 204)
+
+        self.assertEqual(self.client.get(reverse('board-list')).data['results'], [])
+        self.assertEqual(self.client.get(reverse('board-detail', kwargs={'pk': self.board.pk})).status_code, 404)
+        self.assertEqual(self.stats(), (0, 0, 0, 0))
+        self.assertFalse(SearchEntry.objects.filter(board=self.board).exists())
+        archived = self.client.get(reverse('board-archived-list')).data['results']
+        self.assertEqual([board['id'] for board in archived], [self.board.pk])
+
+        response = self.client.post(reverse('board-restore', kwargs={'pk': self.board.pk}))
+        self.assertEqual(response.data, {'board': self.board.pk, 'restored': True})
+        self.assertEqual(len(self.detail_cards()), 6)
+        self.assertEqual(self.stats(), (1, 2, 6, 3))
+        self.assertEqual(SearchEntry.objects.filter(board=self.board).count(), 7)
+
+    def test_restore_respects_quota(self):
+        self.client.post(reverse('board-archive', kwargs={'pk': self.board.pk}))
+        Company.objects.filter(pk=self.company.pk).update(max_boards=1)
+        self.create_board(lists=1)
+        adjust_company_stats(company_id=self.company.pk, boards=1)
+
+        response = self.client.post(reverse('board-restore', kwargs={'pk': self.board.pk}))
+        self.assertEqual(response.status_code, 400)
+
+    def test_archive_command(self):
+        Card.objects.filter(pk__in=self.done_ids).update(update_at=timezone.now() - timedelta(days=40))
+        stale = self.create_board(lists=1, cards_per_list=2, title="Antigo")
+        Board.objects.filter(pk=stale.pk).update(end_date=(timezone.now() - timedelta(days=100)).date())
+
+        out = StringIO()
+        call_command('archive_data', dry_run=True, stdout=out)
+        self.assertIn("3 cards e 1 boards", out.getvalue())
+
+        with self.assertLogs('api.archive', 'INFO'):
+            call_command('archive_data', chunk_size=2, stdout=StringIO())
+        self.assertEqual(set(Card.all_objects.filter(archived_at__isnull=False).values_list('pk', flat=True)), set(self.done_ids))
+        self.assertEqual(list(Board.objects.values_list('pk', flat=True)), [self.board.pk])
+        self.assertEqual(self.stats(), (1, 2, 3, 0))
+        call_command('rebuild_company_stats', stdout=StringIO())
+        self.assertEqual(self.stats(), (1, 2, 3, 0))
+
+
+    def test_sweep_skips_archived_boards(self):
+        from .archive import archive_board, archive_done_cards, restore_board
+        Card.objects.filter(pk__in=self.done_ids).update(update_at=timezone.now() - timedelta(days=40))
+        archive_board(self.board)
+
+        self.assertEqual(archive_done_cards(), 0)
+        self.assertEqual(self.stats(), (0, 0, 0, 0))
+        restore_board(self.board)
+        self.assertEqual(self.stats(), (1, 2, 6, 3))
+        self.assertEqual(Board.objects.get(pk=self.board.pk).cards_count, 6)
+
+    def test_rebuild_counters_includes_archived_boards(self):
+        self.client.post(reverse('board-archive', kwargs={'pk': self.board.pk}))
+        Board.all_objects.filter(pk=self.board.pk).update(cards_count=99)
+        call_command('rebuild_board_counters', stdout=StringIO())
+        self.assertEqual(Board.all_objects.get(pk=self.board.pk).cards_count, 6)
+
+
+@override_settings(ACTIVITY_LOG={'FLUSH_SIZE': 200, 'FLUSH_INTERVAL': 3600})
+class ActivityTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        activity_buffer.flush()
+        self.board = self.create_board(lists=2, cards_per_list=2)
+        self.source, self.target = self.board.lists.all()
+
+    def move(self, card):
+        url = reverse('list-card-move', kwargs={
+            'board_pk': self.board.pk, 'list_pk': self.source.pk, 'pk': card.pk
+        })
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(url, {'list_id': self.target.pk, 'position': 1}, format='json')
+
+    def test_move_is_buffered_until_the_feed_is_read(self):
+        card = self.source.cards.first()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.move(card).status_code, 200)
+
+        self.assertFalse([q for q in ctx.captured_queries if 'api_activity' in q['sql']])
+        self.assertEqual(len(activity_buffer), 1)
+        response = self.client.get(reverse('board-activity', kwargs={'pk': self.board.pk}))
+        [entry] = response.data['results']
+        self.assertEqual((entry['verb'], entry['actor_name'], entry['target_id']), ('card.moved', 'admin', card.pk))
+        self.assertEqual((entry['data']['from_list'], entry['data']['to_list']), (self.source.pk, self.target.pk))
+        self.assertEqual(len(activity_buffer), 0)
+
+    @override_settings(ACTIVITY_LOG={'FLUSH_SIZE': 2, 'FLUSH_INTERVAL': 3600})
+    def test_flush_on_size(self):
+        first, second = self.source.cards.all()
+        self.move(first)
+        self.assertEqual(Activity.objects.count(), 0)
+        self.move(second)
+        self.assertEqual(Activity.objects.count(), 2)
+        self.assertEqual(len(activity_buffer), 0)
+
+    def test_rolled_back_write_records_nothing(self):
+        url = reverse('card-members-batch')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'cards': [0], 'add': [self.user.pk]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(activity_buffer), 0)
+
+    def test_company_feed_is_admin_only(self):
+        member = User.objects.create_user(username="ana", password="senha123", company=self.company)
+        url = reverse('user-change-role', kwargs={'pk': member.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {'role': 'manager'}, format='json')
+
+        [entry] = self.client.get(reverse('activity-list')).data['results']
+        self.assertEqual(entry['verb'], 'role.changed')
+        self.assertEqual(entry['data'], {'username': "ana", 'previous': 'member', 'role': 'manager'})
+
+        self.client.force_authenticate(member)
+        self.assertEqual(self.client.get(reverse('activity-list')).status_code, 403)
+
+    def test_prune_and_compact(self):
+        old = (timezone.now() - timedelta(days=10)).replace(hour=12)
+        card = self.source.cards.first()
+        Activity.objects.bulk_create([
+            Activity(verb='card.moved', target_id=card.pk, board=self.board, created_at=old + timedelta(minutes=i))
+            for i in range(3)
+        ] + [
+            Activity(verb='member.added', target_id=card.pk, board=self.board, created_at=old),
+            Activity(verb='card.moved', target_id=card.pk, board=self.board, created_at=old - timedelta(days=90)),
+        ])
+        out = StringIO()
+        call_command('prune_activity', stdout=out)
+
+        self.assertIn("2 movimentações compactadas, 1 atividades removidas", out.getvalue())
+        kept = Activity.objects.order_by('verb').values_list('verb', 'created_at')
+        self.assertEqual(list(kept), [('card.moved', old + timedelta(minutes=2)), ('member.added', old)])
+
+
+class SparseFieldsetTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.board = self.create_board(lists=2, cards_per_list=3)
+        self.board.start_date = timezone.now().date()
+        self.board.priority = 'high'
+        self.board.save()
+        self.url = reverse('board-detail', kwargs={'pk': self.board.pk})
+
+    def test_values_path_matches_serializer(self):
+        from .views import board_tree_queryset
+        queryset = Board.objects.filter(pk=self.board.pk)
+        expected = BoardSerializer(board_tree_queryset(queryset).get()).data
+        fast = board_tree(queryset, self.board.pk, BoardSerializer())
+        # Mesmas chaves, na mesma ordem, e mesmos valores renderizados
+        self.assertEqual(json.dumps(fast), json.dumps(expected))
+
+        fieldset = Fieldset.parse('id,lists.cards.title', include='lists.cards')
+        sparse = board_tree(queryset, self.board.pk, BoardSerializer(context={'fieldset': fieldset}))
+        self.assertEqual(list(sparse), ['id', 'lists'])
+        self.assertEqual(sparse['lists'][0], {'cards': [{'title': "Card 0"}, {'title': "Card 1"}, {'title': "Card 2"}]})
+
+    def test_board_detail_fields_and_include(self):
+        full = self.client.get(self.url)
+        response = self.client.get(self.url, {'fields': 'id,title,lists.title'})
+        self.assertEqual(response.data, {'id': self.board.pk, 'title': "Board", 'lists': [
+            {'title': "Lista 0"}, {'title': "Lista 1"},
+        ]})
+        self.assertNotEqual(response['ETag'], full['ETag'])
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {'include': 'lists'})
+        self.assertNotIn('cards', response.data['lists'][0])
+        self.assertFalse([q for q in ctx.captured_queries if 'api_card' in q['sql']])
+
+        response = self.client.get(self.url, {'fields': 'id,nope'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(self.url, {'include': 'title'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_endpoints_select_only_requested_columns(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('board-list'), {'fields': 'id,title'})
+        self.assertEqual(response.data['results'], [{'id': self.board.pk, 'title': "Board"}])
+        [query] = [q['sql'] for q in ctx.captured_queries if 'FROM "api_board"' in q['sql']]
+        self.assertNotIn('"description"', query)
+
+        response = self.client.get(reverse('user-list'), {'fields': 'username,company_name'})
+        self.assertEqual(response.data['results'], [{'username': "admin", 'company_name': "Acme"}])
+        response = self.client.get(reverse('company-list'), {'fields': 'name,cards_count'})
+        self.assertEqual(response.data, [{'name': "Acme", 'cards_count': 6}])
+
+        first = self.board.lists.first()
+        url = reverse('board-list-list', kwargs={'board_pk': self.board.pk})
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {'fields': 'title', 'include': ''})
+        self.assertEqual(response.data['results'][0], {'title': first.title})
+        self.assertFalse([q for q in ctx.captured_queries if 'api_card' in q['sql']])
+
+    def test_board_patch_queries_do_not_grow_with_cards(self):
+        def patch():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.patch(self.url, {'title': "Novo"}, format='json')
+            self.assertEqual(response.data['title'], "Novo")
+            return len(ctx.captured_queries)
+
+        self.warm_auth_cache()
+        small = patch()
+        List.objects.create(title="Mais", board=self.board, position=rank_between(None, None))
+        for list_obj in self.board.lists.all():
+            Card.objects.bulk_create(Card(title="Extra", list=list_obj, position=rank_between()) for _ in range(5))
+        self.assertEqual(patch(), small)
+
+    def test_serialization_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_serialization', cards=20, lists=2, iterations=2, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines], ['serializer', 'values', 'values+fields'])
+
+
+class RenderingTests(ApiTestCase):
+
+    def test_fast_renderer_matches_drf(self):
+        data = {
+            'when': timezone.now(), 'day': timezone.now().date(), 'price': Decimal('1.50'),
+            'text': "Ação \u2028 linha", 1: [None, True, 2.5], 'lazy': Board._meta.verbose_name,
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        indented = FastJSONRenderer().render(data, 'application/json; indent=2')
+        self.assertEqual(indented, JSONRenderer().render(data, 'application/json; indent=2'))
+
+    def test_negotiation(self):
+        self.assertEqual(negotiate('gzip, deflate, br', ('br', 'gzip')), 'br')
+        self.assertEqual(negotiate('br;q=0.5, gzip', ('br', 'gzip')), 'gzip')
+        self.assertEqual(negotiate('gzip;q=0, *;q=0.1', ('gzip',)), None)
+        self.assertEqual(negotiate('*', ('gzip',)), 'gzip')
+        self.assertEqual(negotiate('identity', ('br', 'gzip')), None)
+
+    def test_board_detail_is_compressed(self):
+        board = self.create_board(lists=3, cards_per_list=20)
+        url = reverse('board-detail', kwargs={'pk': board.pk})
+        plain = self.client.get(url)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(zlib.decompress(response.content, wbits=31), plain.content)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(response['ETag'], f"W/{plain['ETag']}")
+        # ETag fraco volta no If-None-Match
+        again = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+        small = self.client.get(reverse('company-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', small)
+
+    async def test_async_reads_are_compressed(self):
+        board = await sync_to_async(self.create_board)(lists=2, cards_per_list=20)
+        client = AsyncClient(AUTHORIZATION=f"Token {self.token.key}", ACCEPT_ENCODING='gzip')
+        response = await client.get(reverse('board-detail', kwargs={'pk': board.pk}))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        data = json.loads(zlib.decompress(response.content, wbits=31))
+        self.assertEqual([len(l['cards']) for l in data['lists']], [20, 20])
+
+    def test_streaming_export_is_compressed_once(self):
+        board = self.create_board(lists=2, cards_per_list=30)
+        url = reverse('board-export', kwargs={'pk': board.pk})
+        plain = b''.join(self.client.get(url).streaming_content)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(zlib.decompress(b''.join(response.streaming_content), wbits=31), plain)
+        # ?compression=gzip já é um arquivo .gz: não comprime de novo
+        response = self.client.get(url, {'compression': 'gzip'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+
+class SearchTests(ApiTestCase):
+
+    def search(self, q):
+        response = self.client.get(reverse('search'), {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return [(r['type'], r['id']) for r in response.data['results']]
+
+    def test_index_follows_writes(self):
+        board = Board.objects.create(title="Migração", description="Projeto de infraestrutura",
+                                     company=self.company, owner=self.user)
+        list_obj = List.objects.create(title="A Fazer", board=board, position=rank_between())
+        card = Card.objects.create(title="Configurar servidor", description="infraestrutura nova", list=list_obj)
+
+        self.assertEqual(self.search("migracao"), [('board', board.pk)])
+        self.assertCountEqual(self.search("infra"), [('board', board.pk), ('card', card.pk)])
+
+        card.title = "Configurar banco"
+        card.save()
+        self.assertEqual(self.search("servidor"), [])
+        self.assertEqual(self.search("banco"), [('card', card.pk)])
+
+        list_obj.delete()
+        self.assertEqual(self.search("banco"), [])
+
+    def test_scoped_to_company(self):
+        other = Company.objects.create(name="Outra", slug="outra", created_at=timezone.now())
+        owner = User.objects.create_user(username="outro", company=other)
+        Board.objects.create(title="Segredo", company=other, owner=owner)
+
+        self.assertEqual(self.search("segredo"), [])
+
+    def test_ranking_and_query_sanitizing(self):
+        weak = Board.objects.create(title="Relatório", description="mensal", company=self.company, owner=self.user)
+        strong = Board.objects.create(title="Relatório relatório", company=self.company, owner=self.user)
+
+        self.assertEqual(self.search('relatorio'), [('board', strong.pk), ('board', weak.pk)])
+        self.assertEqual(self.search('" OR * NEAR('), [])
+
+    def test_rebuild_command(self):
+        board = self.create_board(lists=1, cards_per_list=3)
+        SearchEntry.objects.all().delete()
+
+        call_command('rebuild_search_index', stdout=StringIO())
+
+        self.assertEqual(len(self.search("card")), 3)
+        self.assertEqual(self.search("board"), [('board', board.pk)])
+
+
+class ExportTests(ApiTestCase):
+
+    def records(self, response):
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_board_jsonl(self):
+        board = self.create_board(lists=2, cards_per_list=3)
+        response = self.client.get(reverse('board-export', kwargs={'pk': board.pk}))
+
+        self.assertTrue(response.streaming)
+        records = self.records(response)
+        self.assertEqual([r['type'] for r in records], ['board'] + ['list'] * 2 + ['card'] * 6)
+        self.assertEqual(records[-1]['members'], ['admin'])
+
+    def test_company_csv_gzip_queries_per_chunk(self):
+        for _ in range(2):
+            self.create_board(lists=2, cards_per_list=10)
+        url = reverse('company-export')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'output': 'csv', 'compression': 'gzip'})
+            rows = list(csv.DictReader(zlib.decompress(b''.join(response.streaming_content), wbits=31).decode().splitlines()))
+
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(len([r for r in rows if r['type'] == 'card']), 40)
+        self.assertEqual(rows[0]['slug'], 'acme')
+        # usuários + boards + (listas, cards, membros) por board
+        self.assertLessEqual(len(queries), 3 + 2 * 3 + 1)
+
+    def test_company_export_admin_only(self):
+        self.user.role = 'member'
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('company-export')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('company-export'), {'output': 'xml'}).status_code, 403)
+
+
+class ImportTests(ApiTestCase):
+
+    def trello(self, cards):
+        return {
+            'name': "Migração", 'desc': "do Trello",
+            'members': [{'id': 'm1', 'username': 'ADMIN'}, {'id': 'm2', 'username': 'fantasma'}],
+            'lists': [
+                {'id': 'l1', 'name': "Backlog", 'pos': 2, 'closed': False},
+                {'id': 'l2', 'name': "Done", 'pos': 1, 'closed': False},
+                {'id': 'l3', 'name': "Velha", 'pos': 3, 'closed': True},
+            ],
+            'cards': [
+                {'name': f"Card {i}", 'idList': 'l1' if i % 2 else 'l2', 'pos': i, 'closed': False, 'idMembers': ['m1', 'm2']}
+                for i in range(cards)
+            ] + [{'name': "Arquivado", 'idList': 'l1', 'pos': 99, 'closed': True, 'idMembers': []}],
+        }
+
+    def test_trello_import(self):
+        with self.assertLogs('api.imports', 'INFO'):
+            response = self.client.post(reverse('board-import'), self.trello(4), format='json')
+
+        self.assertEqual(response.status_code, 201)
+        report, = response.data['boards']
+        self.assertEqual((report['lists'], report['cards'], report['memberships']), (2, 4, 4))
+        self.assertEqual(report['unmatched_members'], ['fantasma'])
+        board = Board.objects.get(pk=report['board'])
+        self.assertEqual([l.title for l in board.lists.all()], ["Done", "Backlog"])
+        self.assertEqual((board.lists_count, board.cards_count), (2, 4))
+        stats = CompanyStats.objects.get(company=self.company)
+        self.assertEqual((stats.boards, stats.cards, stats.done_cards), (1, 4, 2))
+        self.assertEqual(SearchEntry.objects.filter(board=board).count(), 5)
+
+    def test_queries_do_not_grow_with_cards(self):
+        def import_queries(cards):
+            with CaptureQueriesContext(connection) as queries, self.assertLogs('api.imports', 'INFO'):
+                self.client.post(reverse('board-import'), self.trello(cards), format='json')
+            return len(queries)
+
+        self.warm_auth_cache()
+        self.assertEqual(import_queries(5), import_queries(50))
+
+    def test_native_round_trip(self):
+        board = self.create_board(lists=2, cards_per_list=3)
+        export = b''.join(self.client.get(reverse('board-export', kwargs={'pk': board.pk})).streaming_content)
+
+        with self.assertLogs('api.imports', 'INFO'):
+            call_command('import_boards', self.write_file(export), company='acme', stdout=StringIO())
+
+        copy = Board.objects.exclude(pk=board.pk).get()
+        self.assertEqual(
+            [(l.title, [c.title for c in l.cards.all()]) for l in copy.lists.all()],
+            [(l.title, [c.title for c in l.cards.all()]) for l in board.lists.all()],
+        )
+        self.assertEqual(Card.members.through.objects.filter(card__list__board=copy).count(), 6)
+
+    def native(self, boards):
+        return [
+            {'type': 'board', 'id': i, 'title': f"Board {i}", 'start_date': "2024-02-30", 'end_date': "2024-03-01"}
+            for i in range(boards)
+        ]
+
+    def test_native_dates_and_quota(self):
+        with self.assertLogs('api.imports', 'INFO') as logs:
+            response = self.client.post(reverse('board-import'), self.native(1), format='json')
+        self.assertEqual(response.status_code, 201)
+        board = Board.objects.get(pk=response.data['boards'][0]['board'])
+        self.assertEqual((board.start_date, str(board.end_date)), (None, "2024-03-01"))
+        self.assertIn("Data inválida", logs.output[0])
+
+        # Cota conferida para o export inteiro, antes de gravar qualquer board
+        self.company.max_boards = 3
+        self.company.save()
+        with self.assertLogs('api.imports', 'WARNING'):
+            response = self.client.post(reverse('board-import'), self.native(3), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Board.objects.count(), 1)
+
+    def test_partial_failure_reports_created_boards(self):
+        original = imports.import_board
+        def import_board(company, owner, data, *args):
+            if data['title'] == "Board 1":
+                raise ValidationError("Limite atingido")
+            return original(company, owner, data, *args)
+
+        with mock.patch.object(imports, 'import_board', import_board), self.assertLogs('api.imports', 'INFO'):
+            response = self.client.post(reverse('board-import'), self.native(2), format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([r['status'] for r in response.data['boards']], ['created', 'failed'])
+        self.assertEqual(list(Board.objects.values_list('title', flat=True)), ["Board 0"])
+
+    def test_malformed_payloads(self):
+        broken = [
+            {**self.trello(1), 'name': 42},
+            {**self.trello(1), 'cards': {'name': "x"}},
+            {**self.trello(1), 'lists': [{'id': 'l1', 'name': "A", 'pos': 1}, {'id': 'l2', 'name': "B", 'pos': "2"}]},
+            {**self.trello(0), 'cards': [{'name': "x", 'idList': 'l1', 'idMembers': [['m1']]}]},
+            {**self.trello(0), 'members': [{'id': 'm1', 'username': 7}]},
+            [{'type': 'board', 'title': ["x"]}],
+            [{'type': 'board', 'title': "B", 'priority': ["high"]}],
+            [{'type': 'board', 'title': "B"}, {'type': 'list', 'id': {'a': 1}, 'title': "L"}],
+            [{'type': 'board', 'title': "B"}, {'type': 'list', 'id': 1, 'title': "L", 'position': 3},
+             {'type': 'list', 'id': 2, 'title': "M", 'position': "a"}],
+            [{'type': 'board', 'title': "B"}, {'type': 'list', 'id': 1, 'title': "L"},
+             {'type': 'card', 'list_id': 1, 'title': "C", 'members': "admin"}],
+        ]
+        for payload in broken:
+            with self.subTest(payload=payload):
+                response = self.client.post(reverse('board-import'), payload, format='json')
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Board.objects.exists())
+
+    def test_user_without_company(self):
+        self.user.company = None
+        self.user.save()
+        response = self.client.post(reverse('board-import'), self.trello(1), format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def write_file(self, content):
+        handle, path = tempfile.mkstemp(suffix='.jsonl')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, 'wb') as output:
+            output.write(content)
+        return path
+
+
+class TemplateAndCloneTests(ApiTestCase):
+
+    def tree(self, board):
+        return [(l.title, l.is_done, [(c.title, c.position) for c in l.cards.all()]) for l in board.lists.all()]
+
+    def test_create_from_template(self):
+        template = BoardTemplate.objects.create(
+            company=self.company, name="Sprint",
+            lists=[{'title': "Backlog"}, {'title': "Entregue", 'is_done': True}],
+        )
+        response = self.client.post(reverse('board-list'), {'title': "Novo", 'template': template.pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        board = Board.objects.get(pk=response.data['id'])
+        self.assertEqual([(l.title, l.is_done) for l in board.lists.all()], [("Backlog", False), ("Entregue", True)])
+        self.assertEqual(board.lists_count, 2)
+        self.assertEqual(CompanyStats.objects.get(company=self.company).lists, 2)
+
+        other = BoardTemplate.objects.create(company=Company.objects.create(name="Outra", slug="outra"), name="X")
+        response = self.client.post(reverse('board-list'), {'title': "Novo", 'template': other.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_template_from_board(self):
+        board = self.create_board(lists=2)
+        response = self.client.post(reverse('board-template-list'), {'name': "Cópia", 'board': board.pk}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['lists'], [{'title': "Lista 0", 'is_done': False}, {'title': "Lista 1", 'is_done': False}])
+        response = self.client.post(reverse('board-template-list'), {'name': "Cópia", 'lists': [{'title': "A"}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_clone_copies_tree(self):
+        board = self.create_board(lists=2, cards_per_list=3)
+        done = board.lists.last()
+        done.is_done = True
+        done.save()
+
+        response = self.client.post(reverse('board-clone', kwargs={'pk': board.pk}), {}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['lists'], response.data['cards'], response.data['memberships']), (2, 6, 6))
+        copy = Board.objects.get(pk=response.data['board'])
+        self.assertEqual(copy.title, "Board (cópia)")
+        self.assertEqual(self.tree(copy), self.tree(board))
+        self.assertEqual((copy.lists_count, copy.cards_count), (2, 6))
+        stats = CompanyStats.objects.get(company=self.company)
+        self.assertEqual((stats.boards, stats.cards, stats.done_cards), (2, 12, 6))
+        self.assertEqual(SearchEntry.objects.filter(board=copy).count(), 7)
+
+    def test_clone_queries_do_not_grow_with_cards(self):
+        def clone_queries(board):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(reverse('board-clone', kwargs={'pk': board.pk}), {'include_members': True}, format='json')
+            return len(queries)
+
+        small, large = self.create_board(lists=2, cards_per_list=2), self.create_board(lists=2, cards_per_list=40)
+        self.warm_auth_cache()
+        self.assertEqual(clone_queries(small), clone_queries(large))
+
+    def test_large_board_is_cloned_after_commit(self):
+        board = self.create_board(lists=1, cards_per_list=3)
+        with mock.patch.object(cloning, 'SYNC_CLONE_LIMIT', 2), \
+                mock.patch.object(cloning._executor, 'submit') as submit, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('board-clone', kwargs={'pk': board.pk}), {'title': "Grande"}, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        copy = Board.objects.get(pk=response.data['board'])
+        submit.assert_called_once_with(cloning._run_clone, board.pk, copy.pk, True, True)
+        self.assertEqual(copy.lists_count, 0)
+
+        cloning.copy_board_contents(board.pk, copy)
+        self.assertEqual(self.tree(copy), self.tree(board))
+
+
+class CardMembershipTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.colleague = User.objects.create_user(username="colega", company=self.company)
+        other = Company.objects.create(name="Outra", slug="outra")
+        self.outsider = User.objects.create_user(username="fora", company=other)
+
+    def test_my_cards_across_boards(self):
+        first, second = self.create_board(lists=1, cards_per_list=3), self.create_board(lists=2, cards_per_list=30)
+        Card.objects.create(title="Sem mim", list=first.lists.get()).members.clear()
+        self.warm_auth_cache()
+
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(reverse('my-card-list'), {'page_size': 2})
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(reverse('my-card-list'), {'page_size': 60})
+
+        self.assertEqual(len(small), len(large))
+        card = response.data['results'][0]
+        self.assertEqual((card['board_id'], card['board_title'], card['list_title']), (second.pk, "Board", "Lista 1"))
+        self.assertIsNotNone(response.data['next'])
+
+        seen, url = set(), reverse('my-card-list')
+        while url:
+            response = self.client.get(url)
+            seen.update(card['id'] for card in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, set(Card.objects.filter(members=self.user).values_list('pk', flat=True)))
+        self.assertEqual(len(seen), 63)
+
+    def test_batch_members(self):
+        board = self.create_board(lists=2, cards_per_list=2)
+        cards = list(Card.objects.filter(list__board=board).values_list('pk', flat=True))
+        url = reverse('card-members-batch')
+        version = Board.objects.get(pk=board.pk).version
+
+        response = self.client.post(url, {'cards': cards, 'add': [self.colleague.pk], 'remove': [self.user.pk]}, format='json')
+
+        self.assertEqual(response.data, {'added': 4, 'removed': 4})
+        self.assertEqual(set(Card.members.through.objects.values_list('user_id', flat=True)), {self.colleague.pk})
+        self.assertEqual(Board.objects.get(pk=board.pk).version, version + 1)
+
+        response = self.client.post(url, {'cards': cards, 'add': [self.colleague.pk]}, format='json')
+        self.assertEqual(response.data, {'added': 0, 'removed': 0})
+
+        foreign = Board.objects.create(title="Alheio", company=self.outsider.company, owner=self.outsider)
+        foreign_card = Card.objects.create(title="X", list=List.objects.create(title="L", board=foreign))
+        for data in ({'cards': cards, 'add': [self.outsider.pk]}, {'cards': [foreign_card.pk], 'add': [self.user.pk]}):
+            response = self.client.post(url, data, format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(Card.members.through.objects.count(), 4)
+
+    def test_single_member_changes_are_company_scoped(self):
+        board = self.create_board(lists=1, cards_per_list=1)
+        card = Card.objects.get(list__board=board)
+        kwargs = {'board_pk': board.pk, 'list_pk': card.list_id, 'pk': card.pk}
+
+        response = self.client.post(reverse('list-card-add-member', kwargs=kwargs), {'user_id': self.outsider.pk})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(reverse('list-card-add-member', kwargs=kwargs), {'user_id': self.colleague.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({u.username for u in card.members.all()}, {"admin", "colega"})
+
+
+class AsyncReadTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Defaults do AsyncClient viram headers ASGI
+        self.async_client = AsyncClient(AUTHORIZATION=f"Token {self.token.key}")
+
+    async def test_concurrent_reads(self):
+        board = await sync_to_async(self.create_board)(lists=2, cards_per_list=3)
+        first = await board.lists.afirst()
+        urls = [
+            reverse('board-list'),
+            reverse('board-detail', kwargs={'pk': board.pk}),
+            reverse('list-card-list', kwargs={'board_pk': board.pk, 'list_pk': first.pk}),
+        ]
+
+        responses = await asyncio.gather(*(self.async_client.get(url) for url in urls * 5))
+
+        self.assertEqual({r.status_code for r in responses}, {200})
+        boards, detail, cards = (r.json() for r in responses[:3])
+        self.assertEqual(boards['results'][0]['cards_count'], 6)
+        self.assertEqual([len(l['cards']) for l in detail['lists']], [3, 3])
+        self.assertEqual([c['members'] for c in cards['results']], [['admin']] * 3)
+
+    async def test_etag_and_auth(self):
+        board = await sync_to_async(self.create_board)()
+        url = reverse('board-detail', kwargs={'pk': board.pk})
+
+        etag = (await self.async_client.get(url))['ETag']
+        response = await self.async_client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        self.assertEqual((await AsyncClient().get(url)).status_code, 401)
+        other = await Company.objects.acreate(name="Outra", slug="outra")
+        await User.objects.filter(pk=self.user.pk).aupdate(company=other)
+        caches[AUTH_CACHE].clear()
+        self.assertEqual((await self.async_client.get(url)).status_code, 404)
+
+    async def test_async_board_tree_matches_sync(self):
+        from .fastpath import aboard_tree
+        board = await sync_to_async(self.create_board)(lists=2, cards_per_list=3)
+        for fieldset in (None, Fieldset.parse('id,title,lists.cards.title'), Fieldset.parse(include='lists')):
+            serializer = BoardSerializer(context={'fieldset': fieldset})
+            expected = await sync_to_async(board_tree)(Board.objects.all(), board.pk, serializer)
+            self.assertEqual(await aboard_tree(Board.objects.all(), board.pk, serializer), expected)
+        self.assertIsNone(await aboard_tree(Board.objects.none(), board.pk, BoardSerializer()))
+
+    async def test_writes_go_to_viewset(self):
+        response = await self.async_client.post(reverse('board-list'), {'title': "Novo"}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(await Board.objects.filter(title="Novo").acount(), 1)
+
+
+THROTTLE_TEST = {'RATE': 1, 'BURST': 4, 'WEIGHTS': {'read': 1, 'write': 2, 'batch': 3}}
+
+
+@override_settings(THROTTLING=THROTTLE_TEST)
+class ThrottlingTests(ApiTestCase):
+
+    def test_bucket_refill(self):
+        buckets = MemoryBuckets()
+        self.assertEqual([buckets.take('a', 2, 1, 4, now=0) for _ in range(3)], [0, 0, 2.0])
+        # Outra chave tem o próprio balde
+        self.assertEqual(buckets.take('b', 4, 1, 4, now=0), 0)
+        self.assertEqual(buckets.take('a', 2, 1, 4, now=1.5), 0.5)
+        self.assertEqual(buckets.take('a', 2, 1, 4, now=2), 0)
+        # Custo acima do balde cobra o balde inteiro
+        self.assertEqual(buckets.take('c', 10, 1, 4, now=0), 0)
+
+    def test_retry_after_and_tenant_isolation(self):
+        url = reverse('board-list')
+        self.assertEqual([self.client.get(url).status_code for _ in range(4)], [200] * 4)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+
+        # Outro usuário da mesma empresa divide o balde; outra empresa não
+        other = Company.objects.create(name="Outra", slug="outra")
+        for username, company, expected in (("colega", self.company, 429), ("outro", other, 200)):
+            user = User.objects.create_user(username=username, company=company)
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}")
+            self.assertEqual(client.get(url).status_code, expected)
+
+    def test_batch_weight(self):
+        board = self.create_board(lists=1, cards_per_list=1)
+        url = reverse('board-cards-batch', kwargs={'pk': board.pk})
+        self.assertEqual(self.client.post(url, {'operations': []}, format='json').status_code, 400)
+        # 1 ficha sobrando não paga outro lote (3), mas paga uma leitura
+        response = self.client.post(url, {'operations': []}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertEqual(self.client.get(reverse('board-list')).status_code, 200)
+
+    @override_settings(THROTTLING={**THROTTLE_TEST, 'BACKEND': 'cache'})
+    def test_cache_backend(self):
+        caches['default'].clear()
+        url = reverse('company-list')
+        self.assertEqual([self.client.get(url).status_code for _ in range(5)], [200] * 4 + [429])
+        reset_throttle(self.company.pk)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    async def test_async_reads(self):
+        client = AsyncClient(AUTHORIZATION=f"Token {self.token.key}")
+        url = reverse('board-list')
+        responses = [await client.get(url) for _ in range(5)]
+        self.assertEqual([r.status_code for r in responses], [200] * 4 + [429])
+        self.assertEqual(responses[-1]['Retry-After'], '1')
+
+
+@override_settings(PROFILING={'EXPOSE_HEADER': True})
+class ProfilingTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        metrics.reset()
+
+    def server_timing(self, response):
+        return dict(
+            (part.split(';')[0].strip(), part) for part in response['Server-Timing'].split(',')
+        )
+
+    def test_server_timing_header(self):
+        board = self.create_board(lists=2, cards_per_list=2)
+        response = self.client.get(reverse('board-detail', kwargs={'pk': board.pk}))
+
+        timing = self.server_timing(response)
+        self.assertTrue({'auth', 'db', 'serialize', 'render', 'total'} <= set(timing))
+        self.assertRegex(timing['db'], r'desc="\d+ queries"')
+
+    def test_server_timing_is_opt_in(self):
+        url = reverse('board-list')
+        with override_settings(PROFILING={'EXPOSE_HEADER': False}):
+            self.assertNotIn('Server-Timing', APIClient().get(url))
+        with override_settings(PROFILING={'EXPOSE_HEADER': 'staff'}):
+            self.assertNotIn('Server-Timing', self.client.get(url))
+            self.assertNotIn('Server-Timing', APIClient().get(url))
+            self.user.is_staff = True
+            self.user.save()
+            self.assertIn('Server-Timing', self.client.get(url))
+            self.assertIn('Server-Timing', self.client.get(reverse('user-list')))
+
+    def test_route_histograms(self):
+        self.user.is_staff = True
+        self.user.save()
+        board = self.create_board()
+        for _ in range(3):
+            self.client.get(reverse('board-detail', kwargs={'pk': board.pk}))
+
+        routes = self.client.get(reverse('metrics')).data['routes']
+        self.assertEqual(routes['GET board-detail']['count'], 3)
+        self.assertEqual(sum(routes['GET board-detail']['buckets'].values()), 3)
+
+    def test_metrics_restricted_to_staff(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    @override_settings(PROFILING={'SLOW_QUERY_MS': 0, 'SLOW_QUERY_SAMPLE_RATE': 1})
+    def test_slow_query_sampling(self):
+        with self.assertLogs('api.profiling', 'WARNING'):
+            self.client.get(reverse('company-list'))
+        self.assertTrue(metrics.snapshot()['slow_queries'])
+
+
+class OnboardingTests(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def write(self, name, rows):
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'w', newline='') as output:
+            if name.endswith('.jsonl'):
+                output.writelines(json.dumps(row) + '\n' for row in rows)
+            else:
+                writer = csv.DictWriter(output, fieldnames=['company', 'company_name', 'username', 'role', 'password'])
+                writer.writeheader()
+                writer.writerows(rows)
+        return path
+
+    def onboard(self, path, **options):
+        with self.assertLogs('api.onboarding', 'INFO'):
+            call_command('onboard_users', path, workers=0, chunk_size=2, stdout=StringIO(), **options)
+
+    def test_csv_creates_companies_users_and_tokens(self):
+        path = self.write('rh.csv', [
+            {'company': 'acme', 'company_name': "Acme", 'username': 'ana', 'role': 'admin', 'password': 'segredo123'},
+            {'company': 'acme', 'username': 'bia', 'role': 'chefe'},
+            {'company': '', 'username': 'sem-empresa'},
+            {'company': 'globex', 'username': 'caio'},
+        ])
+        tokens = os.path.join(self.dir.name, 'tokens.csv')
+        self.onboard(path, tokens_out=tokens)
+
+        self.assertEqual(
+            sorted(User.objects.values_list('username', 'company__slug', 'role')),
+            [('ana', 'acme', 'admin'), ('bia', 'acme', 'member'), ('caio', 'globex', 'member')],
+        )
+        self.assertTrue(User.objects.get(username='ana').check_password('segredo123'))
+        self.assertFalse(User.objects.get(username='bia').has_usable_password())
+        self.assertEqual(CompanyStats.objects.get(company__slug='acme').active_users, 2)
+        with open(tokens) as output:
+            self.assertEqual(
+                {username: key for username, key in csv.reader(output)},
+                dict(Token.objects.values_list('user__username', 'key')),
+            )
+        self.assertFalse(os.path.exists(path + '.checkpoint'))
+
+    def test_resumes_after_failure(self):
+        rows = [{'company': 'acme', 'username': f'user{i}'} for i in range(5)]
+        path = self.write('rh.jsonl', rows)
+        from .onboarding import Onboarding
+        write_chunk = Onboarding._write_chunk
+        calls = []
+
+        def failing(self, chunk, executor):
+            calls.append(chunk)
+            if len(calls) == 2:
+                raise RuntimeError("queda")
+            return write_chunk(self, chunk, executor)
+
+        with mock.patch.object(Onboarding, '_write_chunk', failing), self.assertRaises(RuntimeError):
+            self.onboard(path)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertTrue(os.path.exists(path + '.checkpoint'))
+
+        self.onboard(path)
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Token.objects.count(), 5)
+        self.assertEqual(CompanyStats.objects.get().active_users, 5)
+
+    def test_respects_max_users(self):
+        Company.objects.create(name="Acme", slug='acme', max_users=3)
+        rows = [{'company': 'acme', 'username': f'user{i}'} for i in range(5)]
+        rows += [{'company': 'globex', 'username': f'g{i}'} for i in range(4)]
+        path = self.write('rh.jsonl', rows)
+
+        with self.assertLogs('api.onboarding', 'INFO') as logs:
+            call_command('onboard_users', path, workers=0, chunk_size=2, max_users=2, stdout=StringIO())
+        self.assertEqual(User.objects.filter(company__slug='acme').count(), 3)
+        self.assertEqual(User.objects.filter(company__slug='globex').count(), 2)
+        self.assertEqual(sum("recusado:" in line for line in logs.output), 4)
+
+        more = self.write('mais.jsonl', [{'company': 'acme', 'username': f'extra{i}'} for i in range(3)])
+        self.onboard(more, grow_limits=True)
+        acme = Company.objects.get(slug='acme')
+        self.assertEqual((acme.max_users, acme.stats.active_users), (6, 6))
+
+
+class SeedAndBenchmarkTests(TestCase):
+
+    def test_seed_data_is_consistent(self):
+        call_command('seed_data', users=3, boards=2, lists=3, cards=4, members=2, seed=1, stdout=StringIO())
+        company = Company.objects.get()
+        stats = CompanyStats.objects.get(company=company)
+
+        self.assertEqual((stats.active_users, stats.boards, stats.lists, stats.cards), (3, 2, 6, 24))
+        self.assertEqual(stats.done_cards, Card.objects.filter(list__title="Concluído").count())
+        self.assertEqual(set(Board.objects.values_list('cards_count', flat=True)), {12})
+        self.assertEqual(Card.members.through.objects.count(), 48)
+        self.assertEqual(SearchEntry.objects.count(), 2 + 24)
+
+    def test_benchmark_covers_every_route(self):
+        from . import urls
+        from .benchmark import SKIPPED_ROUTES, compare, run_benchmark
+        from .seeding import seed_companies
+
+        company, = seed_companies(users=2, boards=1, lists=3, cards=3, password="x", seed=1)
+        with self.assertLogs('api.imports', 'INFO'):
+            results = run_benchmark(company, iterations=2, warmup=0, password="x")
+
+        routes = {name.split(' ', 1)[1] for name in results}
+        self.assertEqual(routes | set(SKIPPED_ROUTES), {pattern.name for pattern in urls.urlpatterns})
+        self.assertEqual({name: m['status'] for name, m in results.items() if m['status'] >= 400}, {})
+        # Mutações são desfeitas
+        self.assertEqual(Board.objects.get().cards_count, 9)
+
+        baseline = {name: dict(m) for name, m in results.items()}
+        self.assertEqual(compare(results, baseline), [])
+        baseline['GET board-detail']['queries'] -= 1
+        self.assertEqual(len(compare(results, baseline)), 1)
+
+    def test_load_counts_throttled_apart(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from .loadtest import run_load
+
+        statuses = iter([200, 429] * 10)
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                self.send_response(next(statuses))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.shutdown)
+
+        result = run_load(f"http://127.0.0.1:{server.server_port}", ['/'], "x", concurrency=1, requests=6)
+        self.assertEqual((result['requests'], result['errors'], result['throttled']), (6, 0, 3))
+
+    def test_rendering_benchmark(self):
+        from .benchmark import rendering_benchmark
+        from .seeding import seed_companies
+
+        company, = seed_companies(users=2, boards=1, lists=3, cards=20, password="x", seed=1)
+        results = rendering_benchmark(company, iterations=2)
+
+        self.assertEqual(set(results), {'board-list', 'board-detail'})
+        detail = results['board-detail']
+        self.assertEqual(set(detail['render']), {'json', BACKEND})
+        self.assertLess(detail['bytes']['gzip'], detail['bytes']['identity'])
@@ -0,0 +1,174 @@
+"""
+Throttling por empresa (tenant) com token bucket: cada empresa tem um balde
+de BURST fichas que enche RATE fichas por segundo, dividido entre todos os
+seus usuários. Uma empresa que estoura o balde recebe 429 com Retry-After e
+não consome a capacidade das outras, então a latência de quem se comporta
+não depende do vizinho barulhento.
+
+Cada requisição custa WEIGHTS[escopo]: `read` (GET/HEAD), `write` (demais
+métodos) ou o `throttle_scope` da view/action (`batch` para lotes, imports,
+clones e exports). Usuário sem empresa tem balde próprio; anônimo, por IP.
+
+BACKEND 'memory' guarda os baldes no processo (sem I/O, um balde por worker);
+'cache' usa CACHES[THROTTLING['CACHE']] para dividir os baldes entre
+processos. No cache a leitura e a escrita não são atômicas: requisições
+simultâneas da mesma empresa podem passar algumas fichas além do limite.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+DEFAULTS = {
+    'ENABLED': True,
+    'RATE': 100,
+    'BURST': 500,
+    'WEIGHTS': {'read': 1, 'write': 2, 'batch': 25},
+    'BACKEND': 'memory',
+    'CACHE': 'default',
+}
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Acima disso, baldes que já encheram de novo saem da memória
+MAX_BUCKETS = 10000
+
+
+def throttle_settings():
+    return {**DEFAULTS, **getattr(settings, 'THROTTLING', {})}
+
+
+def _refill(state, cost, rate, burst, now):
+    """(novo estado, espera em segundos; 0 = passou)"""
+    tokens, updated = state if state is not None else (burst, now)
+    tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+    cost = min(cost, burst)  # custo maior que o balde nunca passaria
+    if tokens >= cost:
+        return (tokens - cost, now), 0.0
+    return (tokens, now), (cost - tokens) / rate
+
+
+class MemoryBuckets:
+    """Baldes no processo, protegidos por lock (threads do servidor WSGI)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def take(self, key, cost, rate, burst, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if len(self._buckets) >= MAX_BUCKETS and key not in self._buckets:
+                self._prune(rate, burst, now)
+            self._buckets[key], wait = _refill(self._buckets.get(key), cost, rate, burst, now)
+        return wait
+
+    async def atake(self, key, cost, rate, burst):
+        return self.take(key, cost, rate, burst)
+
+    def _prune(self, rate, burst, now):
+        full = burst / rate
+        for key, (_, updated) in list(self._buckets.items()):
+            if now - updated >= full:
+                del self._buckets[key]
+
+    def reset(self, key=None):
+        with self._lock:
+            if key is None:
+                self._buckets.clear()
+            else:
+                self._buckets.pop(key, None)
+
+
+class CacheBuckets:
+    """Baldes num alias de CACHES, compartilhados entre processos"""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def _args(self, key, rate, burst):
+        # Expira quando o balde já estaria cheio de novo
+        return f'throttle:{key}', int(burst / rate) + 1
+
+    def take(self, key, cost, rate, burst):
+        cache_key, timeout = self._args(key, rate, burst)
+        cache = caches[self.alias]
+        state, wait = _refill(cache.get(cache_key), cost, rate, burst, time.time())
+        cache.set(cache_key, state, timeout)
+        return wait
+
+    async def atake(self, key, cost, rate, burst):
+        cache_key, timeout = self._args(key, rate, burst)
+        cache = caches[self.alias]
+        state, wait = _refill(await cache.aget(cache_key), cost, rate, burst, time.time())
+        await cache.aset(cache_key, state, timeout)
+        return wait
+
+    def reset(self, key=None):
+        if key is not None:
+            caches[self.alias].delete(f'throttle:{key}')
+
+
+memory_buckets = MemoryBuckets()
+
+
+def get_buckets(options):
+    if options['BACKEND'] == 'cache':
+        return CacheBuckets(options['CACHE'])
+    return memory_buckets
+
+
+def tenant_key(user, ident):
+    if user is not None and user.is_authenticated:
+        if user.company_id:
+            return f'company:{user.company_id}'
+        return f'user:{user.pk}'
+    return f'ip:{ident}'
+
+
+def view_scope(view):
+    """
+    `throttle_scope` do @action em execução (as rotas em api/urls.py usam
+    as_view() direto, então os kwargs do @action não viram atributos) ou da view
+    """
+    handler = getattr(view, getattr(view, 'action', None) or '', None)
+    return getattr(handler, 'kwargs', {}).get('throttle_scope') or getattr(view, 'throttle_scope', None)
+
+
+def request_cost(method, scope, options):
+    if scope is None:
+        scope = 'read' if method in READ_METHODS else 'write'
+    return options['WEIGHTS'][scope]
+
+
+def reset_throttle(company_id=None):
+    """Esvazia o balde da empresa (ou todos, no backend em memória)"""
+    key = None if company_id is None else f'company:{company_id}'
+    get_buckets(throttle_settings()).reset(key)
+
+
+async def athrottle(request, user, scope=None):
+    """Segundos de espera para as views async (0 = passou)"""
+    options = throttle_settings()
+    if not options['ENABLED']:
+        return 0.0
+    key = tenant_key(user, TenantThrottle().get_ident(request))
+    cost = request_cost(request.method, scope, options)
+    return await get_buckets(options).atake(key, cost, options['RATE'], options['BURST'])
+
+
+class TenantThrottle(BaseThrottle):
+    """Registrado em REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES']"""
+
+    def allow_request(self, request, view):
+        options = throttle_settings()
+        if not options['ENABLED']:
+            return True
+        key = tenant_key(request.user, self.get_ident(request))
+        cost = request_cost(request.method, view_scope(view), options)
+        self.delay = get_buckets(options).take(key, cost, options['RATE'], options['BURST'])
+        return self.delay == 0
+
+    def wait(self):
+        return self.delay
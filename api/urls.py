@@ -1,31 +1,74 @@
 from django.urls import path
-from .views import BoardViewSet, ListViewSet, CardViewSet, UserViewSet, CompanyViewSet
+from .views import ActivityViewSet, AssignedCardViewSet, BoardViewSet, BoardTemplateViewSet, ListViewSet, CardViewSet, UserViewSet, CompanyViewSet, SearchViewSet, MetricsViewSet, board_events
 from rest_framework.authtoken.views import obtain_auth_token
+from . import async_views
+from .async_views import async_reads
 
 urlpatterns = [
-    # URLs para Board
-    path('boards/', BoardViewSet.as_view({'get': 'list', 'post': 'create'}), name='board-list'),
-    path('boards/<int:pk>/', BoardViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='board-detail'),
+    # URLs para Board (leituras assíncronas: api/async_views.py)
+    path('boards/', async_reads(async_views.board_list, BoardViewSet.as_view({'post': 'create'})), name='board-list'),
+    path('boards/archived/', BoardViewSet.as_view({'get': 'archived'}), name='board-archived-list'),
+    path('boards/import/', BoardViewSet.as_view({'post': 'import_boards'}), name='board-import'),
+    path('boards/<int:pk>/', async_reads(async_views.board_detail, BoardViewSet.as_view({'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'})), name='board-detail'),
+    path('boards/<int:pk>/cards/batch/', BoardViewSet.as_view({'post': 'batch_cards'}), name='board-cards-batch'),
+    path('boards/<int:pk>/events/', board_events, name='board-events'),
+    path('boards/<int:pk>/export/', BoardViewSet.as_view({'get': 'export'}), name='board-export'),
+    path('boards/<int:pk>/changes/', BoardViewSet.as_view({'get': 'changes'}), name='board-changes'),
+    path('boards/<int:pk>/activity/', BoardViewSet.as_view({'get': 'activity'}), name='board-activity'),
+    path('boards/<int:pk>/clone/', BoardViewSet.as_view({'post': 'clone'}), name='board-clone'),
+    
+    # Arquivamento (api/archive.py)
+    path('boards/<int:pk>/archive/', BoardViewSet.as_view({'post': 'archive'}), name='board-archive'),
+    path('boards/<int:pk>/restore/', BoardViewSet.as_view({'post': 'restore'}), name='board-restore'),
+    path('boards/<int:pk>/cards/archived/', BoardViewSet.as_view({'get': 'archived_cards'}), name='board-archived-cards'),
+    path('boards/<int:pk>/cards/archive/', BoardViewSet.as_view({'post': 'archive_cards'}), name='board-cards-archive'),
+    path('boards/<int:pk>/cards/restore/', BoardViewSet.as_view({'post': 'restore_cards'}), name='board-cards-restore'),
+    
+    # URLs para templates de board da empresa
+    path('board-templates/', BoardTemplateViewSet.as_view({'get': 'list', 'post': 'create'}), name='board-template-list'),
+    path('board-templates/<int:pk>/', BoardTemplateViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='board-template-detail'),
     
     # URLs para List (aninhadas em Board)
     path('boards/<int:board_pk>/lists/', ListViewSet.as_view({'get': 'list', 'post': 'create'}), name='board-list-list'),
     path('boards/<int:board_pk>/lists/<int:pk>/', ListViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='board-list-detail'),
+    path('boards/<int:board_pk>/lists/<int:pk>/reorder/', ListViewSet.as_view({'patch': 'reorder'}), name='board-list-reorder'),
     
     # URLs para Card (aninhadas em List)
-    path('boards/<int:board_pk>/lists/<int:list_pk>/cards/', CardViewSet.as_view({'get': 'list', 'post': 'create'}), name='list-card-list'),
+    path('boards/<int:board_pk>/lists/<int:list_pk>/cards/', async_reads(async_views.card_list, CardViewSet.as_view({'post': 'create'})), name='list-card-list'),
     path('boards/<int:board_pk>/lists/<int:list_pk>/cards/<int:pk>/', CardViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='list-card-detail'),
     
     # URLs para mover o card
     path('boards/<int:board_pk>/lists/<int:list_pk>/cards/<int:pk>/move/', CardViewSet.as_view({'patch': 'move'}), name='list-card-move'),
     
+    # URLs de membros de um card (usuários da mesma empresa)
+    path('boards/<int:board_pk>/lists/<int:list_pk>/cards/<int:pk>/add_member/', CardViewSet.as_view({'post': 'add_member'}), name='list-card-add-member'),
+    path('boards/<int:board_pk>/lists/<int:list_pk>/cards/<int:pk>/remove_member/', CardViewSet.as_view({'post': 'remove_member'}), name='list-card-remove-member'),
+    
+    # Membros em lote, em cards de qualquer board da empresa
+    path('cards/members/', CardViewSet.as_view({'post': 'batch_members'}), name='card-members-batch'),
+    
+    # Cards atribuídos ao usuário autenticado
+    path('me/cards/', AssignedCardViewSet.as_view({'get': 'list'}), name='my-card-list'),
+    
     #URL de auth
     path("auth-token/", obtain_auth_token, name="auth-token"),
     
     #URL da company
     path('company/', CompanyViewSet.as_view({'get': 'list'}), name='company-list'),
+    path('company/export/', CompanyViewSet.as_view({'get': 'export'}), name='company-export'),
+    
+    #URL do log de atividades da empresa (admin)
+    path('activity/', ActivityViewSet.as_view({'get': 'list'}), name='activity-list'),
+    
+    #URL de busca
+    path('search/', SearchViewSet.as_view({'get': 'list'}), name='search'),
+    
+    #URL das métricas do ProfilingMiddleware (staff)
+    path('metrics/', MetricsViewSet.as_view({'get': 'list'}), name='metrics'),
     
     #URL de Users
     path('users/', UserViewSet.as_view({'get': 'list'}), name='user-list'),
-    path('users/<int:pk>/', UserViewSet.as_view({'get': 'retrieve', 'patch': 'partial_update', 'delete': 'destroy'}), name='user-detail'),
+    # UserViewSet é somente leitura: update/destroy não existem nele
+    path('users/<int:pk>/', UserViewSet.as_view({'get': 'retrieve'}), name='user-detail'),
     path('users/<int:pk>/change_role/', UserViewSet.as_view({'patch': 'change_role'}), name='user-change-role'),
 ]
@@ -1,47 +1,100 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.authentication import TokenAuthentication
-from .models import Board, List, Card, Company
-from .serializers import BoardSerializer, BoardListSerializer, ListSerializer, CardSerializer, UserSerializer, CompanySerializer
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from .activity import activity_buffer, record_activity
+from .archive import archive_board, archive_cards, restore_board, restore_cards
+from .batch import apply_card_operations
+from .cloning import DEFAULT_LISTS, clone_board, create_lists, template_lists
+from .counters import locked_company_stats
+from .events import card_event_data, get_broker, publish_event
+from .fastpath import board_tree
+from .exports import FORMATS, board_records, company_records, export_response
+from .fieldsets import SparseFieldsetViewMixin, prefetch_lookups, validate_fieldset
+from .imports import import_boards
+from .memberships import change_card_members
+from .models import Activity, Board, BoardTemplate, List, Card, Company
+from .profiling import metrics
+from .pagination import ActivityPagination, ArchivePagination, AssignedCardPagination, BoardPagination, PositionPagination, UserPagination
+from .ranking import last_rank, needs_rebalance, rank_for_index, schedule_rebalance
+from .search import SEARCH_LIMIT, search
+from .snapshots import board_etag, board_snapshot, etag_matches
+from .sync import board_changes, decode_cursor, encode_cursor
+from .serializers import BoardSerializer, BoardListSerializer, ListSerializer, CardSerializer, UserSerializer, CompanySerializer, CardBatchSerializer, BoardTemplateSerializer, BoardCloneSerializer, AssignedCardSerializer, CardMembersBatchSerializer, CardSelectionSerializer, ArchivedBoardSerializer, ArchivedCardSerializer, ActivitySerializer
 from api.models import User
 
 
-class CompanyViewSet(viewsets.ReadOnlyModelViewSet):
+def board_tree_queryset(queryset):
+    """
+    Carrega board -> listas -> cards -> membros com número fixo de queries
+    (board + company, listas, cards, membros), independente do tamanho do board.
+    O detalhe do board usa api/fastpath.py; isto fica para o BoardSerializer
+    sobre instâncias (comparação em api/benchmark.py).
+    """
+    # Ordenar pelo pai primeiro deixa o índice (pai, position, id) servir o ORDER BY
+    members = Prefetch('members', queryset=User.objects.only('id', 'username'))
+    cards = Prefetch('cards', queryset=Card.objects.order_by('list_id', 'position', 'id').prefetch_related(members))
+    lists = Prefetch('lists', queryset=List.objects.order_by('board_id', 'position', 'id').prefetch_related(cards))
+    return queryset.select_related('company').prefetch_related(lists)
+
+
+def export_options(request):
+    """(output, compression) da query string, validados"""
+    output = request.query_params.get('output', 'jsonl')
+    compression = request.query_params.get('compression') or None
+    if output not in FORMATS or compression not in (None, 'gzip'):
+        from rest_framework.exceptions import ValidationError
+        raise ValidationError(f"output deve ser um de {sorted(FORMATS)}; compression, 'gzip'")
+    return output, compression
+
+
+class CompanyViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     permission_classes= [IsAuthenticated]
-    authentication_classes = [TokenAuthentication]
     serializer_class = CompanySerializer
     
     def get_queryset(self):
-        return Company.objects.filter(id=self.request.user.company_id)
+        # Totais vêm de CompanyStats, sem COUNT por requisição
+        return Company.objects.filter(id=self.request.user.company_id).select_related('stats')
+    
+    @action(detail=False, methods=['get'], throttle_scope='batch')
+    def export(self, request):
+        """Empresa inteira em JSON Lines/CSV, em streaming (?output=, ?compression=gzip)"""
+        if not request.user.is_company_admin():
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied("Apenas Login admin pode exportar a empresa")
+        
+        company = request.user.company
+        return export_response(company_records(company), f"{company.slug}-export", *export_options(request))
 
 
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+class UserViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [TokenAuthentication]
     serializer_class = UserSerializer
+    pagination_class = UserPagination
     
     def get_queryset(self):
         if not self.request.user.company:
             return User.objects.none()
-        return User.objects.filter(company=self.request.user.company, is_active=True)
+        return User.objects.filter(
+            company=self.request.user.company, is_active=True
+        ).select_related('company')  # company_name
+    
+    # Somente leitura: usuários entram pelo onboarding em lote
+    # (api/onboarding.py), que confere max_users
     
-    def perform_create(self, serializer):
-        if not self.request.user.is_company_admin():
-            from rest_framework.exceptions import PermissionDenied
-            raise PermissionDenied("Apenas Login admin pode criar usuários")
-        
-        company = self.request.user.company
-        current_users = company.users.count()
-        
-        # if current_users >= company.max_users:
-        #     from rest_framework.exceptions import ValidationError
-        #     raise ValidationError(f"Limite de {company.max_users} usuários atingido")
-        
-        serializer.save(company=self.request.user.company)
-        
     @action(detail=True, methods=['patch'])
     def change_role(self, request, pk=None):
         if not request.user.is_company_admin():
@@ -54,9 +107,14 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         if new_role not in ['admin', 'manager', 'member']:
             return Response({'error': 'Role inválido'}, status=400)
     
-    
+        previous = user.role
         user.role = new_role
         user.save()
+        if previous != new_role:
+            record_activity(
+                'role.changed', request.user, target_id=user.pk,
+                username=user.username, previous=previous, role=new_role,
+            )
         
         return Response({'status': 'Role atualizado', 'role': new_role})
         
@@ -66,9 +124,58 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
 
 
 
-class BoardViewSet(viewsets.ModelViewSet):
+class SearchViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+    
+    def list(self, request):
+        """Busca em boards e cards da empresa (?q=, ?limit=)"""
+        text = request.query_params.get('q', '').strip()
+        if not text or not request.user.company_id:
+            return Response({'results': []})
+        
+        try:
+            limit = int(request.query_params.get('limit', SEARCH_LIMIT))
+        except ValueError:
+            limit = SEARCH_LIMIT
+        
+        return Response({'results': search(request.user.company_id, text, limit)})
+
+
+class ActivityViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+    
+    def list(self, request):
+        """Feed de atividades da empresa (inclui mudanças de role); só admin"""
+        if not request.user.is_company_admin():
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied("Apenas admin pode ver as atividades da empresa")
+        activity_buffer.flush()
+        paginator = ActivityPagination()
+        activities = Activity.objects.filter(company_id=request.user.company_id)
+        page = paginator.paginate_queryset(activities, request, view=self)
+        return paginator.get_paginated_response(ActivitySerializer(page, many=True).data)
+
+
+class MetricsViewSet(viewsets.ViewSet):
+    """Histogramas por rota do ProfilingMiddleware (deste processo)"""
+    permission_classes = [IsAdminUser]
+    
+    def list(self, request):
+        return Response(metrics.snapshot())
+
+
+# Evento publicado para cada resultado do lote de cards
+BATCH_EVENTS = {
+    'create': 'card.created',
+    'update': 'card.updated',
+    'move': 'card.moved',
+    'delete': 'card.deleted',
+}
+
+
+class BoardViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [TokenAuthentication]
+    pagination_class = BoardPagination
     
     def get_serializer_class(self):
         # Usa serializer leve para listagem
@@ -79,75 +186,284 @@ class BoardViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         if not self.request.user.company:
             return Board.objects.none()
+        if self.action in ('archived', 'restore'):
+            return Board.all_objects.filter(company=self.request.user.company)
+        # Só boards ativos (Board.objects): arquivados ficam em /boards/archived/
         return Board.objects.filter(company=self.request.user.company)
+    
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Snapshot em cache por versão do board (e por ?fields=/?include=), com
+        ETag / 304; montado de linhas .values() (api/fastpath.py)
+        """
+        serializer = self.get_serializer()
+        validate_fieldset(serializer)
+        version = self.get_queryset().filter(pk=kwargs['pk']).values_list('version', flat=True).first()
+        if version is None:
+            raise Http404
         
+        fieldset = self.get_fieldset()
+        variant = fieldset.key if fieldset else ''
+        etag = board_etag(kwargs['pk'], version, variant)
+        if etag_matches(etag, request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        
+        data = board_snapshot(
+            kwargs['pk'], version,
+            lambda: board_tree(self.get_queryset(), kwargs['pk'], serializer),
+            variant,
+        )
+        return Response(data, headers={'ETag': etag})
     
-    def perform_create(self, serializer):
-        company = self.request.user.company
-        current_boards = company.boards.count()
+    def update(self, request, *args, **kwargs):
+        """Resposta montada por board_tree: o serializer aninhado faria N+1 queries"""
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=kwargs.pop('partial', False))
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return Response(board_tree(self.get_queryset(), instance.pk, self.get_serializer()))
         
-        if current_boards >= company.max_boards:
+    
+    def check_board_quota(self, company):
+        """Trava as estatísticas da empresa até o fim da transação"""
+        if locked_company_stats(company).boards >= company.max_boards:
             from rest_framework.exceptions import ValidationError
             raise ValidationError(f"Limite de {company.max_boards} projetos atingido")
+    
+    def perform_create(self, serializer):
+        company = self.request.user.company
+        template = serializer.validated_data.pop('template', None)
+        with transaction.atomic():
+            self.check_board_quota(company)
+            
+            board = serializer.save(
+                owner=self.request.user,
+                company=company
+            )
+            # Listas do template (ou as padrão) num INSERT só
+            create_lists(board, template.lists if template else DEFAULT_LISTS)
+        
+        return board
+    
+    @action(detail=True, methods=['post'], throttle_scope='batch')
+    def clone(self, request, pk=None):
+        """
+        Cópia do board com listas, cards e membros dos cards; boards grandes
+        são copiados em segundo plano (202, evento board.cloned no fim)
+        """
+        source = self.get_object()
+        serializer = BoardCloneSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        with transaction.atomic():
+            self.check_board_quota(source.company)
+            board, report = clone_board(source, request.user, **serializer.validated_data)
         
-        board = serializer.save(
-            owner=self.request.user,
-            company=self.request.user.company
+        if report is None:
+            return Response({'board': board.pk, 'status': 'pending'}, status=status.HTTP_202_ACCEPTED)
+        return Response({'board': board.pk, 'status': 'done', **report}, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['get'])
+    def changes(self, request, pk=None):
+        """Listas/cards alterados ou removidos desde ?since=<cursor>"""
+        board = self.get_object()
+        
+        try:
+            since = decode_cursor(request.query_params['since'])
+        except KeyError:
+            # Sem cursor: cliente deve carregar o snapshot e seguir deste ponto
+            return Response({'cursor': encode_cursor(timezone.now()), 'reset': True})
+        except (ValueError, OverflowError, OSError):
+            return Response(
+                {'error': 'since inválido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(board_changes(board, since))
+    
+    @action(detail=False, methods=['post'], url_path='import', throttle_scope='batch')
+    def import_boards(self, request):
+        """
+        Importa export do Trello (JSON do board) ou nativo (JSON Lines de
+        /export/), no corpo JSON ou como arquivo multipart `file`
+        (?include_archived=1 traz também o que estava arquivado); 207 com o
+        status de cada board se algum falhar depois de outros gravados
+        """
+        upload = request.FILES.get('file')
+        payload = upload.read() if upload else request.data
+        reports = import_boards(
+            request.user.company, request.user, payload,
+            include_archived=request.query_params.get('include_archived') in ('1', 'true'),
         )
+        failed = any(report['status'] == 'failed' for report in reports)
+        return Response({'boards': reports}, status=status.HTTP_207_MULTI_STATUS if failed else status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['get'], throttle_scope='batch')
+    def export(self, request, pk=None):
+        """Board com listas, cards e membros em JSON Lines/CSV, em streaming"""
+        board = self.get_object()
+        return export_response(board_records([board.pk]), f"board-{board.pk}", *export_options(request))
+    
+    @action(detail=True, methods=['get'])
+    def activity(self, request, pk=None):
+        """Feed de atividades do board, mais recentes primeiro"""
+        board = self.get_object()
+        # Eventos deste processo ainda no buffer entram antes da leitura
+        activity_buffer.flush()
+        paginator = ActivityPagination()
+        page = paginator.paginate_queryset(Activity.objects.filter(board_id=board.pk), request, view=self)
+        return paginator.get_paginated_response(ActivitySerializer(page, many=True).data)
+    
+    @action(detail=True, methods=['post'])
+    def archive(self, request, pk=None):
+        """Arquiva o board (sai da listagem, da busca e da cota de boards)"""
+        archive_board(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=True, methods=['post'])
+    def restore(self, request, pk=None):
+        """Restaura o board arquivado (conferindo a cota)"""
+        board = self.get_object()
+        restored = restore_board(board)
+        return Response({'board': board.pk, 'restored': restored})
+    
+    @action(detail=False, methods=['get'])
+    def archived(self, request):
+        """Boards arquivados da empresa, mais recentes primeiro"""
+        paginator = ArchivePagination()
+        page = paginator.paginate_queryset(self.get_queryset().filter(archived_at__isnull=False), request, view=self)
+        return paginator.get_paginated_response(ArchivedBoardSerializer(page, many=True).data)
+    
+    @action(detail=True, methods=['get'], url_path='cards/archived')
+    def archived_cards(self, request, pk=None):
+        """Cards arquivados do board, mais recentes primeiro"""
+        board = get_object_or_404(Board, pk=pk, owner=request.user)
+        paginator = ArchivePagination()
+        cards = Card.all_objects.filter(list__board=board, archived_at__isnull=False).prefetch_related('members')
+        page = paginator.paginate_queryset(cards, request, view=self)
+        return paginator.get_paginated_response(ArchivedCardSerializer(page, many=True).data)
+    
+    @action(detail=True, methods=['post'], url_path='cards/archive', throttle_scope='batch')
+    def archive_cards(self, request, pk=None):
+        """Arquiva os `cards` informados do board"""
+        board = get_object_or_404(Board, pk=pk, owner=request.user)
+        serializer = CardSelectionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'archived': archive_cards(serializer.validated_data['cards'], board)})
+    
+    @action(detail=True, methods=['post'], url_path='cards/restore', throttle_scope='batch')
+    def restore_cards(self, request, pk=None):
+        """Restaura os `cards` arquivados informados, nas posições originais"""
+        board = get_object_or_404(Board, pk=pk, owner=request.user)
+        serializer = CardSelectionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'restored': restore_cards(board, serializer.validated_data['cards'])})
+    
+    @action(detail=True, methods=['post'], throttle_scope='batch')
+    def batch_cards(self, request, pk=None):
+        """Aplica um lote de operações em cards do board numa transação"""
+        # Mesmo critério de acesso do CardViewSet, verificado uma vez só
+        board = get_object_or_404(Board, pk=pk, owner=request.user)
         
-        List.objects.create(title="A Fazer", board=board, position=0)
-        List.objects.create(title="Em Andamento", board=board, position=1)
-        List.objects.create(title="Concluído", board=board, position=2)
+        serializer = CardBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        return board
+        results = apply_card_operations(board, request.user, serializer.validated_data['operations'])
+        for result in results:
+            data = {k: v for k, v in result.items() if k not in ('op', 'status')}
+            publish_event(board.pk, BATCH_EVENTS[result['op']], **data)
+        return Response({'results': results})
+
+
+class BoardTemplateViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
+    serializer_class = BoardTemplateSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return BoardTemplate.objects.filter(company_id=self.request.user.company_id)
+    
+    def perform_create(self, serializer):
+        board = serializer.validated_data.pop('board', None)
+        if board and not serializer.validated_data.get('lists'):
+            serializer.validated_data['lists'] = template_lists(board)
+        serializer.save(company=self.request.user.company)
+    
+    def perform_update(self, serializer):
+        board = serializer.validated_data.pop('board', None)
+        if board:
+            serializer.validated_data['lists'] = template_lists(board)
+        serializer.save()
 
 
-class ListViewSet(viewsets.ModelViewSet):
+class ListViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = ListSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PositionPagination
     
     def get_queryset(self):
         board_pk = self.kwargs.get('board_pk')
         return List.objects.filter(
             board__id=board_pk, 
-            board__owner=self.request.user
-        ).prefetch_related('cards')  # Otimização
+            board__owner=self.request.user,
+            board__archived_at__isnull=True
+        ).prefetch_related(*prefetch_lookups(self.get_fieldset(), 'cards__members'))
     
     def perform_create(self, serializer):
         board_pk = self.kwargs.get('board_pk')
         board = Board.objects.get(id=board_pk, owner=self.request.user)
         
-        # Define posição automaticamente
-        last_position = board.lists.count()
-        serializer.save(board=board, position=last_position)
+        # Define posição automaticamente (fim do board)
+        list_obj = serializer.save(board=board, position=last_rank(board.lists.all()))
+        publish_event(board.pk, 'list.created', id=list_obj.pk, title=list_obj.title, position=list_obj.position)
+    
+    def perform_update(self, serializer):
+        list_obj = serializer.save()
+        publish_event(list_obj.board_id, 'list.updated', id=list_obj.pk, title=list_obj.title)
+    
+    def perform_destroy(self, instance):
+        board_id = instance.board_id
+        list_id = instance.pk
+        instance.delete()
+        publish_event(board_id, 'list.deleted', id=list_id)
     
     @action(detail=True, methods=['patch'])
     def reorder(self, request, board_pk=None, pk=None):
-        """Reordena a posição da lista"""
+        """Reordena a posição da lista (position = índice de destino)"""
         list_obj = self.get_object()
         new_position = request.data.get('position')
         
-        if new_position is not None:
-            list_obj.position = new_position
-            list_obj.save()
-            return Response({'status': 'position updated'})
+        try:
+            new_position = int(new_position)
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'position is required'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        return Response(
-            {'error': 'position is required'}, 
-            status=status.HTTP_400_BAD_REQUEST
-        )
+        siblings = List.objects.filter(board_id=list_obj.board_id).exclude(pk=list_obj.pk)
+        list_obj.position = rank_for_index(siblings, new_position)
+        list_obj.save(update_fields=['position', 'update_at'])
+        
+        if needs_rebalance(list_obj.position):
+            schedule_rebalance(List.objects.filter(board_id=list_obj.board_id))
+        
+        publish_event(list_obj.board_id, 'list.reordered', id=list_obj.pk, position=list_obj.position)
+        
+        return Response({'status': 'position updated', 'position': list_obj.position})
 
 
-class CardViewSet(viewsets.ModelViewSet):
+class CardViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = CardSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PositionPagination
     
     def get_queryset(self):
         list_pk = self.kwargs.get("list_pk")
         return Card.objects.filter(
             list__id=list_pk, 
-            list__board__owner=self.request.user
-        ).select_related('list').prefetch_related('members')  # Otimização
+            list__board__owner=self.request.user,
+            list__board__archived_at__isnull=True
+        ).select_related('list').prefetch_related(*prefetch_lookups(self.get_fieldset(), 'members'))
     
     def perform_create(self, serializer):
         list_pk = self.kwargs.get("list_pk")
@@ -156,19 +472,30 @@ class CardViewSet(viewsets.ModelViewSet):
             board__owner=self.request.user
         )
         
-        # Define posição automaticamente
-        last_position = list_obj.cards.count()
-        card = serializer.save(list=list_obj, position=last_position)
+        # Define posição automaticamente (fim da lista)
+        card = serializer.save(list=list_obj, position=last_rank(list_obj.cards.all()))
         
         # Adiciona o usuário atual como membro
         card.members.add(self.request.user)
         
+        publish_event(list_obj.board_id, 'card.created', **card_event_data(card))
         return card
     
+    def perform_update(self, serializer):
+        card = serializer.save()
+        publish_event(card.list.board_id, 'card.updated', **card_event_data(card))
+    
+    def perform_destroy(self, instance):
+        data = {'id': instance.pk, 'list_id': instance.list_id}
+        board_id = instance.list.board_id
+        instance.delete()
+        publish_event(board_id, 'card.deleted', **data)
+    
     @action(detail=True, methods=['patch'])
     def move(self, request, board_pk=None, list_pk=None, pk=None):
         """Move o card para outra lista e/ou reordena"""
         card = self.get_object()
+        previous_list_id = card.list_id
         new_list_id = request.data.get('list_id')
         new_position = request.data.get('position')
         
@@ -181,43 +508,147 @@ class CardViewSet(viewsets.ModelViewSet):
             card.list = new_list
         
         if new_position is not None:
-            card.position = new_position
+            try:
+                new_position = int(new_position)
+            except (TypeError, ValueError):
+                return Response(
+                    {'error': 'position must be an integer'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            # Só o card movido é escrito: a chave fica entre os vizinhos de destino
+            siblings = Card.objects.filter(list_id=card.list_id).exclude(pk=card.pk)
+            card.position = rank_for_index(siblings, new_position)
         
         card.save()
         
+        if needs_rebalance(card.position):
+            schedule_rebalance(Card.objects.filter(list_id=card.list_id))
+        
+        publish_event(card.list.board_id, 'card.moved', **card_event_data(card))
+        record_activity(
+            'card.moved', request.user, board_id=card.list.board_id, target_id=card.pk,
+            title=card.title, from_list=previous_list_id, to_list=card.list_id, position=card.position,
+        )
+        
         serializer = self.get_serializer(card)
         return Response(serializer.data)
     
+    def company_user(self, request):
+        """Usuário da mesma empresa pelo user_id do corpo (None se não houver)"""
+        try:
+            return User.objects.get(id=int(request.data.get('user_id')), company_id=request.user.company_id)
+        except (TypeError, ValueError, User.DoesNotExist):
+            return None
+    
     @action(detail=True, methods=['post'])
     def add_member(self, request, board_pk=None, list_pk=None, pk=None):
         """Adiciona um membro ao card"""
         card = self.get_object()
-        user_id = request.data.get('user_id')
-        
-        try:
-            from api.models import User
-            user = User.objects.get(id=user_id)
-            card.members.add(user)
-            return Response({'status': 'member added'})
-        except User.DoesNotExist:
+        user = self.company_user(request)
+        if user is None or not user.is_active:
             return Response(
                 {'error': 'User not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        card.members.add(user)
+        publish_event(card.list.board_id, 'member.added', card_id=card.pk, username=user.username)
+        record_activity('member.added', request.user, board_id=card.list.board_id, target_id=card.pk, username=user.username)
+        return Response({'status': 'member added'})
     
     @action(detail=True, methods=['post'])
     def remove_member(self, request, board_pk=None, list_pk=None, pk=None):
         """Remove um membro do card"""
         card = self.get_object()
-        user_id = request.data.get('user_id')
-        
-        try:
-            from api.models import User
-            user = User.objects.get(id=user_id)
-            card.members.remove(user)
-            return Response({'status': 'member removed'})
-        except User.DoesNotExist:
+        user = self.company_user(request)
+        if user is None:
             return Response(
                 {'error': 'User not found'}, 
                 status=status.HTTP_404_NOT_FOUND
-            )
\ No newline at end of file
+            )
+        card.members.remove(user)
+        publish_event(card.list.board_id, 'member.removed', card_id=card.pk, username=user.username)
+        record_activity('member.removed', request.user, board_id=card.list.board_id, target_id=card.pk, username=user.username)
+        return Response({'status': 'member removed'})
+    
+    @action(detail=False, methods=['post'], url_path='members', throttle_scope='batch')
+    def batch_members(self, request):
+        """Adiciona/remove vários usuários em vários cards da empresa de uma vez"""
+        serializer = CardMembersBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        return Response(change_card_members(
+            request.user.company_id, data['cards'], data['add'], data['remove'], actor=request.user
+        ))
+
+
+class AssignedCardViewSet(SparseFieldsetViewMixin, viewsets.GenericViewSet):
+    """Cards atribuídos ao usuário, em todos os boards da empresa"""
+    serializer_class = AssignedCardSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = AssignedCardPagination
+    
+    def get_queryset(self):
+        # Número fixo de queries: cards + lista + board num JOIN, membros num prefetch
+        queryset = Card.objects.filter(
+            members=self.request.user, list__board__company_id=self.request.user.company_id,
+            list__board__archived_at__isnull=True,
+        ).select_related('list__board')
+        if prefetch_lookups(self.get_fieldset(), 'members'):
+            queryset = queryset.prefetch_related(Prefetch('members', queryset=User.objects.only('id', 'username')))
+        return queryset
+    
+    def list(self, request):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+
+# Intervalo do comentário de keepalive no stream (proxies derrubam conexões ociosas)
+EVENTS_KEEPALIVE = 15
+
+
+@sync_to_async
+def _stream_user(request, board_pk):
+    """
+    Autentica pelo header Authorization ou por ?token= (EventSource não envia
+    headers) e confere o acesso ao board como no BoardViewSet.
+    """
+    authenticator = next(
+        (cls() for cls in api_settings.DEFAULT_AUTHENTICATION_CLASSES if issubclass(cls, TokenAuthentication)),
+        TokenAuthentication(),
+    )
+    key = request.GET.get('token')
+    header = request.headers.get('Authorization', '').split()
+    if len(header) == 2 and header[0] == authenticator.keyword:
+        key = header[1]
+    if not key:
+        return None
+
+    try:
+        user, _ = authenticator.authenticate_credentials(key)
+    except AuthenticationFailed:
+        return None
+    if not user.company_id or not Board.objects.filter(pk=board_pk, company_id=user.company_id).exists():
+        return None
+    return user
+
+
+async def board_events(request, pk):
+    """Stream (Server-Sent Events) das mudanças do board; usar sob ASGI"""
+    if await _stream_user(request, pk) is None:
+        return JsonResponse({'detail': 'Board não encontrado.'}, status=404)
+
+    async def stream():
+        async with get_broker().subscribe(pk) as subscription:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
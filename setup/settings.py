@@ -38,14 +38,29 @@ AUTH_USER_MODEL = 'api.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',  # IMPORTANTE!
+        # TokenAuthentication com cache (api/authentication.py).
+        # Para desligar: 'rest_framework.authentication.TokenAuthentication'
+        'api.authentication.CachedTokenAuthentication',  # IMPORTANTE!
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # JSON via orjson quando instalado, senão stdlib (api/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Token bucket por empresa, configurado em THROTTLING (api/throttling.py)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.TenantThrottle',
+    ],
 }
 
 MIDDLEWARE = [
+    # Histogramas por rota e Server-Timing opcional (api/profiling.py); primeiro da pilha
+    'api.profiling.ProfilingMiddleware',
+    # gzip/brotli negociado pelo Accept-Encoding (api/compression.py)
+    'api.compression.CompressionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.common.CommonMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -56,6 +71,43 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Desligar com ENABLED=False; queries lentas só são guardadas numa amostra das requisições
+PROFILING = {
+    'ENABLED': True,
+    'SLOW_QUERY_MS': 100,
+    'SLOW_QUERY_SAMPLE_RATE': 0.05,
+    # Server-Timing na resposta: False, True ou 'staff'
+    'EXPOSE_HEADER': False,
+}
+
+# Respostas de texto/JSON a partir de MIN_SIZE bytes; brotli só com o pacote instalado
+COMPRESSION = {
+    'ENABLED': True,
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 4,
+}
+
+# Balde por empresa: BURST fichas, repostas a RATE por segundo; cada requisição
+# custa WEIGHTS[read|write|batch]. BACKEND 'cache' divide os baldes entre
+# processos pelo alias CACHES[CACHE]. THROTTLING_ENABLED=0 desliga (ex.: servidores
+# medidos pelo benchmark_deployments, que manda toda a carga de uma empresa)
+THROTTLING = {
+    'ENABLED': os.getenv('THROTTLING_ENABLED', '1') != '0',
+    'RATE': 100,
+    'BURST': 500,
+    'WEIGHTS': {'read': 1, 'write': 2, 'batch': 25},
+    'BACKEND': 'memory',
+    'CACHE': 'default',
+}
+
+# Log de atividades (api/activity.py): gravado em lote a cada FLUSH_SIZE eventos
+# ou, ao fim de uma requisição, quando o mais antigo passou de FLUSH_INTERVAL segundos
+ACTIVITY_LOG = {
+    'FLUSH_SIZE': 200,
+    'FLUSH_INTERVAL': 2.0,
+}
+
 CORS_ALLOW_ALL_ORIGINS = True  # Em desenvolvimento
 CORS_ALLOW_CREDENTIALS = True
 
@@ -84,6 +136,12 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'setup.wsgi.application'
 
+# Necessário para o stream de eventos dos boards (api/events.py)
+ASGI_APPLICATION = 'setup.asgi.application'
+
+# Pub/sub dos eventos; trocar por um broker compartilhado com vários processos
+BOARD_EVENTS_BROKER = 'api.events.InProcessBroker'
+
 
 
 DATABASES = {
@@ -99,6 +157,46 @@ DATABASES = {
 
 
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Snapshots serializados dos boards (api/snapshots.py).
+    # CULL_FREQUENCY == MAX_ENTRIES: ao lotar, descarta só o menos usado (LRU)
+    'boards': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'board-snapshots',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+            'CULL_FREQUENCY': 1000,
+        },
+    },
+    # Token -> usuário/empresa (api/authentication.py). Em processo só serve a
+    # um worker: com vários, AUTH_CACHE_URL (redis://...) compartilha o cache e
+    # a invalidação por signal passa a valer para todos
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth-tokens',
+        'TIMEOUT': 5 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'CULL_FREQUENCY': 10000,
+        },
+    },
+}
+
+if os.getenv('AUTH_CACHE_URL'):
+    # Requer o pacote `redis`
+    CACHES['auth'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('AUTH_CACHE_URL'),
+        'KEY_PREFIX': 'auth',
+        'TIMEOUT': 5 * 60,
+    }
+
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -129,3 +227,18 @@ STATIC_URL = 'static/'
 
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Logs do app (onboarding, queries lentas etc.) no console
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '{asctime} {levelname} {name}: {message}', 'style': '{'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'loggers': {
+        'api': {'handlers': ['console'], 'level': os.getenv('API_LOG_LEVEL', 'INFO')},
+    },
+}